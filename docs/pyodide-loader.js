@@ -1,12 +1,30 @@
 // docs/pyodide-loader.js
+
+// Single archive built by `python tools/cadl_bundle.py pyodide`. The
+// manifest is small and always revalidated; the archive it names is
+// content addressed so it can be kept in the Cache API across loads.
+const BUNDLE_DIR = "bundle/";
+const BUNDLE_CACHE = "cadl-bundle";
+
+// Fallback when no bundle has been deployed: fetch the sources one by one.
+// Every module a program can need at run time has to be listed, also
+// those the interpreter only imports on first use (litters, prototypes,
+// positioned draws, imports, memoized function calls).
 const PY_FILES = [
   { name: "cadl_interp.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_interp.py" },
   { name: "cadl_fe.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_fe.py" },
+  { name: "cadl_ll1.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_ll1.py" },
+  { name: "cadl_ll1_table.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_ll1_table.py" },
   { name: "cadl_interp_walk.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_interp_walk.py" },
   { name: "cadl_symtab.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_symtab.py" },
   { name: "dumpast.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/dumpast.py" },
   { name: "cadl_ascii_render.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_ascii_render.py" },
   { name: "cadl_lexer.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_lexer.py" },
+  { name: "cadl_purity.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_purity.py" },
+  { name: "cadl_proto.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_proto.py" },
+  { name: "cadl_litter.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_litter.py" },
+  { name: "cadl_canvas.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_canvas.py" },
+  { name: "cadl_import.py", url: "https://raw.githubusercontent.com/twill386/Cat-ASCII-Design-Language/main/src/cadl_import.py" },
 ];
 
 let pyodide;
@@ -130,25 +148,77 @@ function getProgramSource() {
   return (sampleEl?.textContent || "").trim();
 }
 
+async function sha256Hex(bytes) {
+  const digest = await crypto.subtle.digest("SHA-256", bytes);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+// Returns { name, bytes } for the current bundle, or null if none is deployed.
+async function fetchBundle() {
+  let manifest;
+  try {
+    const res = await fetch(BUNDLE_DIR + "manifest.json", { cache: "no-cache" });
+    if (!res.ok) return null;
+    manifest = await res.json();
+  } catch (err) {
+    return null;
+  }
+
+  const url = new URL(BUNDLE_DIR + manifest.archive, document.baseURI).href;
+  const cache = "caches" in window ? await caches.open(BUNDLE_CACHE) : null;
+
+  let res = cache ? await cache.match(url) : undefined;
+  if (!res) {
+    res = await fetch(url);
+    if (!res.ok) throw new Error(`Fetch failed for ${manifest.archive}: ${res.status}`);
+    if (cache) {
+      await cache.put(url, res.clone());
+      // drop archives of older versions
+      for (const req of await cache.keys()) {
+        if (req.url !== url) await cache.delete(req);
+      }
+    }
+  }
+
+  const bytes = new Uint8Array(await res.arrayBuffer());
+  if ((await sha256Hex(bytes)) !== manifest.sha256) {
+    if (cache) await cache.delete(url);
+    throw new Error(`Checksum mismatch for ${manifest.archive}`);
+  }
+  return { name: manifest.archive, bytes };
+}
+
 async function loadCadl() {
   ui.status.textContent = "Loading Pyodide…";
   pyodide = await loadPyodide();
 
-  ui.status.textContent = "Fetching CADL files…";
-  for (const { name, url } of PY_FILES) {
-    const res = await fetch(url);
-    if (!res.ok) throw new Error(`Fetch failed for ${name}: ${res.status}`);
-    pyodide.FS.writeFile(name, await res.text());
-  }
+  ui.status.textContent = "Fetching CADL…";
+  const bundle = await fetchBundle();
 
   ui.status.textContent = "Importing CADL…";
-  await pyodide.runPythonAsync(`
+  if (bundle) {
+    pyodide.FS.writeFile(bundle.name, bundle.bytes);
+    await pyodide.runPythonAsync(`
+import os, sys
+sys.path.insert(0, os.path.abspath(${JSON.stringify(bundle.name)}))
+import cadl_interp
+`);
+  } else {
+    for (const { name, url } of PY_FILES) {
+      const res = await fetch(url);
+      if (!res.ok) throw new Error(`Fetch failed for ${name}: ${res.status}`);
+      pyodide.FS.writeFile(name, await res.text());
+    }
+    await pyodide.runPythonAsync(`
 import importlib.util, sys
 spec = importlib.util.spec_from_file_location("cadl_interp", "cadl_interp.py")
 cadl_interp = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(cadl_interp)
 sys.modules["cadl_interp"] = cadl_interp
 `);
+  }
   ui.status.textContent = "CADL is Ready.";
 }
 
@@ -159,6 +229,12 @@ async function runCadlSample() {
     ui.status.textContent = "No sample source found.";
     return;
   }
+  // positioned draws need numpy (see cadl_canvas), which is only
+  // fetched for programs that look like they have one
+  if (/\bdraw\s+[A-Za-z]\w*\s+at\b/.test(source)) {
+    ui.status.textContent = "Loading numpy…";
+    await pyodide.loadPackage("numpy");
+  }
   ui.status.textContent = "Running sample…";
   const result = await pyodide.runPythonAsync(`
 import io, contextlib, cadl_interp
@@ -0,0 +1,157 @@
+"""
+Terminal animation for CADL draws
+
+Animator is an on_draw sink (see CADLInterpWalk) that shows every draw
+in the same place on the terminal, so a program that draws a cat over
+and over plays as an animation instead of scrolling.
+
+Only the first frame is written in full.  For every following frame
+the cell-level difference against the frame on screen is computed and
+only the changed characters are sent, each run preceded by an ANSI
+cursor move; nearby runs are merged when rewriting the few unchanged
+cells between them is cheaper than another cursor move.
+
+The display is limited to `fps` frames per second, the program is not:
+a draw that comes in less than a frame interval after the last frame
+shown is only kept as the pending frame, replacing the one before it,
+and a timer shows the latest pending frame once the interval is over.
+A simulation that draws thousands of frames a second runs at full
+speed and the terminal shows where it is at, a dozen times a second.
+The scene of positioned draws (see cadl_canvas) comes last, as a frame
+like any other.
+"""
+
+import sys
+import threading
+import time
+
+from cadl_interp_walk import draw_text
+
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+CLEAR_SCREEN = "\x1b[2J"
+
+# merge two changed runs when they are at most this many cells apart,
+# a cursor move costs about as many bytes
+MERGE_GAP = 6
+
+
+def move(row, col):
+    # ANSI positions are 1-based
+    return "\x1b[{};{}H".format(row + 1, col + 1)
+
+
+def frame_diff(old, new):
+    """
+    Return the escape sequences that turn the lines of frame old,
+    as displayed, into the lines of frame new.
+    """
+    out = []
+    for row in range(max(len(old), len(new))):
+        o = old[row] if row < len(old) else ""
+        n = new[row] if row < len(new) else ""
+        width = max(len(o), len(n))
+        o = o.ljust(width)
+        n = n.ljust(width)
+        if o == n:
+            continue
+
+        col = 0
+        start = end = None
+        while col < width:
+            if o[col] != n[col]:
+                if start is None:
+                    start = col
+                elif col - end > MERGE_GAP:
+                    out.append(move(row, start) + n[start:end])
+                    start = col
+                end = col + 1
+            col += 1
+        out.append(move(row, start) + n[start:end])
+    return "".join(out)
+
+
+class Animator:
+
+    def __init__(self, write=None, flush=None, fps=10.0,
+                 clock=time.monotonic):
+        self.write = write or sys.stdout.write
+        self.flush = flush or sys.stdout.flush
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.clock = clock
+        self.screen = None      # lines currently on the terminal
+        self.height = 0         # most lines any frame has used
+        self.next_time = None   # earliest time of the next frame shown
+        # latest frame not shown yet (see submit) and the timer
+        # that will show it; the lock keeps the timer thread and the
+        # program from drawing at the same time
+        self.pending = None
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def __call__(self, name, cat):
+        # a copy, the program goes on changing the cat
+        self.submit((name, dict(cat["traits"])))
+
+    def scene(self, text):
+        self.submit(text)
+
+    def submit(self, frame):
+        """
+        Show frame, (name, traits) of a cat or the text of a scene,
+        now or at the next tick.
+        """
+        with self.lock:
+            now = self.clock()
+            if self.next_time is None or now >= self.next_time:
+                self.pending = None
+                self.show(frame, now)
+                return
+            self.pending = frame
+            if self.timer is None:
+                self.timer = threading.Timer(self.next_time - now, self.tick)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def tick(self):
+        with self.lock:
+            self.timer = None
+            if self.pending is not None:
+                frame, self.pending = self.pending, None
+                self.show(frame, self.clock())
+
+    def show(self, frame, now):
+        """
+        Put frame on the terminal.
+        """
+        if frame.__class__ is str:
+            lines = frame.splitlines()
+        else:
+            name, traits = frame
+            lines = draw_text(name, {"type": "cat",
+                                     "traits": traits}).splitlines()
+        self.next_time = now + self.interval
+
+        if self.screen is None:
+            out = HIDE_CURSOR + CLEAR_SCREEN + frame_diff([], lines)
+        else:
+            out = frame_diff(self.screen, lines)
+        self.screen = lines
+        self.height = max(self.height, len(lines))
+        # park the cursor under the frame
+        self.write(out + move(self.height, 0))
+        self.flush()
+
+    def close(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            # the last frame is always shown
+            if self.pending is not None:
+                frame, self.pending = self.pending, None
+                self.show(frame, self.clock())
+        if self.screen is not None:
+            self.write(move(self.height, 0) + SHOW_CURSOR)
+            self.flush()
+            self.screen = None
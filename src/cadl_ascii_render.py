@@ -2,8 +2,6 @@
 ASCII renderer for CADL cats
 """
 
-from typing import Dict, Any
-
 # Ears
 ####################################################################
 def ears_fragment(ears: str) -> str:
@@ -131,7 +129,7 @@ def tail_fragment(tail: str):
 
 # Main Function for the renderer
 ####################################################################
-def render_cat(cat: Dict[str, Any]) -> str:
+def render_cat(cat: dict) -> str:
     """
     Render a CADL cat object (as produced by your interpreter) to ASCII.
 
@@ -0,0 +1,89 @@
+"""
+Scene canvas for positioned draws
+
+    draw Miso at 10, 4;
+
+does not print the cat right away; it is placed on a scene canvas with
+its top left corner at column 10, row 4, and the whole scene is printed
+once when the program ends.  Spaces in a cat are transparent, so cats
+drawn later cover earlier ones only where they have ink.
+
+The canvas is a 2D NumPy array of characters.  Each distinct cat glyph
+is converted to an array (plus its ink mask) once, and placing it is a
+single masked slice assignment, so composing a scene costs a few NumPy
+operations per cat instead of string surgery on every line it touches.
+NumPy is only needed by programs that use positioned draws.
+
+A scene is at most MAX_WIDTH columns by MAX_HEIGHT rows; placing a cat
+any further out is an error, not a canvas of gigabytes.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAX_WIDTH = 1000
+MAX_HEIGHT = 1000
+
+
+class Canvas:
+
+    def __init__(self):
+        if np is None:
+            raise RuntimeError("positioned draws (draw ... at x, y) "
+                               "need numpy, which is not installed")
+        self.cells = np.full((16, 64), " ", dtype="<U1")
+        # extent actually drawn on
+        self.height = 0
+        self.width = 0
+        # draw text -> (glyph array, ink mask)
+        self.glyphs = {}
+
+    def glyph(self, text):
+        g = self.glyphs.get(text)
+        if g is None:
+            lines = text.rstrip("\n").split("\n")
+            w = max(len(line) for line in lines)
+            arr = np.array([list(line.ljust(w)) for line in lines],
+                           dtype="<U1")
+            g = (arr, arr != " ")
+            self.glyphs[text] = g
+        return g
+
+    def _reserve(self, rows, cols):
+        # grow geometrically so big scenes are not copied on every draw
+        h, w = self.cells.shape
+        if rows <= h and cols <= w:
+            return
+        cells = np.full((max(rows, min(2 * h, MAX_HEIGHT)),
+                         max(cols, min(2 * w, MAX_WIDTH))), " ", dtype="<U1")
+        cells[:h, :w] = self.cells
+        self.cells = cells
+
+    def blit(self, x, y, text):
+        """
+        Place text (as printed by a draw) with its top left corner
+        at column x, row y.
+        """
+        arr, ink = self.glyph(text)
+        h, w = arr.shape
+        if x + w > MAX_WIDTH or y + h > MAX_HEIGHT:
+            raise ValueError("the cat at {}, {} does not fit on the scene, "
+                             "which is at most {} columns by {} rows"
+                             .format(x, y, MAX_WIDTH, MAX_HEIGHT))
+        self._reserve(y + h, x + w)
+        region = self.cells[y:y + h, x:x + w]
+        region[ink] = arr[ink]
+        self.height = max(self.height, y + h)
+        self.width = max(self.width, x + w)
+
+    def render(self):
+        """
+        Return the scene as text, trailing blanks removed.
+        """
+        if not self.height:
+            return ""
+        rows = np.ascontiguousarray(self.cells[:self.height, :self.width])
+        rows = rows.view("<U{}".format(self.width)).ravel()
+        return "\n".join(str(row).rstrip() for row in rows)
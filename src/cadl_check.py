@@ -0,0 +1,112 @@
+"""
+Static checker for CADL programs
+
+Finds the trait mistakes the interpreter would otherwise only notice
+while running the program, or never notice at all because the
+renderer silently falls back to a default look:
+
+  - unquoted values, cat { mood = happy; } or x = y;, which the
+    walker rejects every time such a statement runs
+  - trait names that are not in the registry (see cadl_traits), in
+    declarations, assignments, trait access and where clauses
+  - literal trait values that are not in the registry, in
+    declarations, assignments, where clauses and comparisons like
+    Miso.mood == "hapy"
+
+All problems in the program are reported at once.  A program that
+passed the check can run with CADLInterpWalk.checked set, which skips
+the walker's own unquoted value checks.
+"""
+
+from cadl_traits import TRAITS, is_trait, is_value
+
+
+class CheckError(ValueError):
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__("static check failed:\n  " + "\n  ".join(problems))
+
+
+def check(ast, lines=None):
+    """
+    Return the list of problems in ast, in source order.  With the
+    statement line map of cadl_fe.parse every problem starts with the
+    line of the statement it is in.
+    """
+    problems = []
+    # nodes to look at and the line of the statement they are in
+    stack = [(ast, 0)]
+    while stack:
+        node, line = stack.pop()
+        if isinstance(node, list):
+            stack.extend((c, line) for c in reversed(node))
+            continue
+        if not isinstance(node, tuple):
+            continue
+        if lines is not None:
+            line = lines.get(id(node), line)
+
+        def report(msg):
+            problems.append("line {}: {}".format(line, msg) if line else msg)
+
+        tag = node[0]
+        if tag == "CATDECL" or tag == "CATDECL_PROTO":
+            for trait_node in node[-1][1]:
+                _, (_, tname), expr = trait_node
+                _check_trait(tname, report)
+                _check_value(tname, expr, report)
+        elif tag in ("TRAITASSIGN", "TRAITASSIGN_WHERE"):
+            tname = node[2][1]
+            _check_trait(tname, report)
+            _check_value(tname, node[3], report)
+        elif tag == "ASSIGN":
+            expr = node[2]
+            if expr[0] == "ID":
+                report("value '{0}' must be quoted, e.g. {1} = \"{0}\";"
+                       .format(expr[1], node[1][1]))
+        elif tag == "WHERE":
+            _, _, (_, tname), expr = node
+            _check_trait(tname, report)
+            _check_literal(tname, expr, report)
+        elif tag == "ATTR":
+            _check_trait(node[2][1], report)
+        elif tag in ("EQ", "NOTEQ"):
+            # Miso.mood == "hapy"
+            _, lhs, rhs = node
+            for a, b in ((lhs, rhs), (rhs, lhs)):
+                if a[0] == "ATTR" and is_trait(a[2][1]):
+                    _check_literal(a[2][1], b, report)
+
+        stack.extend((c, line) for c in reversed(node[1:]))
+    return problems
+
+
+def _check_trait(tname, report):
+    if not is_trait(tname):
+        from difflib import get_close_matches
+        close = get_close_matches(tname, TRAITS, n=1)
+        hint = ", did you mean '{}'?".format(close[0]) if close else ""
+        report("unknown trait '{}'{}".format(tname, hint))
+
+
+def _check_value(tname, expr, report):
+    # value assigned to a trait
+    if expr[0] == "ID":
+        report("trait value '{0}' must be quoted, e.g. {1} = \"{0}\";"
+               .format(expr[1], tname))
+        return
+    _check_literal(tname, expr, report)
+
+
+def _check_literal(tname, expr, report):
+    # literal compared with or assigned to a trait
+    if not is_trait(tname):
+        return
+    if expr[0] == "INTEGER":
+        report("{} expects a string, got {}".format(tname, expr[1]))
+    elif expr[0] == "STRING":
+        value = expr[1][1:-1]
+        if not is_value(tname, value):
+            report("'{}' is not a valid {} (one of: {})"
+                   .format(value, tname, ", ".join(TRAITS[tname])))
@@ -0,0 +1,392 @@
+"""
+Tiered execution for CADL
+
+Programs start out in the tree walker (cadl_interp_walk), which looks
+at every node each time it runs it.  Most of a program runs once, so
+that is the cheapest way to run it, but a function body called a
+million times or a hot while loop pays the dispatch over and over.
+
+Tier counts the calls of every function and the back-edges (finished
+iterations) of every while and repeat loop the walker runs.  Once a
+count crosses its threshold the function body or loop is compiled
+into a tree of Python closures, one per node, with everything that
+can be decided ahead of time (node tags, names, literal values, the
+shape of the node) decided once, and the walker runs the closures from
+then on.  A loop is switched over in the middle: the compiled loop
+picks up with the next iteration.
+
+The closures do exactly what the walker does, in the same order and
+with the same errors.  Statements they have no fast path for (imports,
+litters, positioned draws, ...) call back into the walker.
+
+    walker.tier = Tier(walker, call_threshold=..., loop_threshold=...)
+
+is all it takes (see interp(..., tiered=True)); Tier.stats() says how
+much was counted and compiled.
+"""
+
+import time
+
+from cadl_symtab import symtab
+from cadl_interp_walk import draw_text, is_node
+
+# default number of calls / loop iterations before tiering up
+CALL_THRESHOLD = 50
+LOOP_THRESHOLD = 200
+
+
+class Tier:
+
+    def __init__(self, walker, call_threshold=CALL_THRESHOLD,
+                 loop_threshold=LOOP_THRESHOLD):
+        self.walker = walker
+        self.call_threshold = call_threshold
+        self.loop_threshold = loop_threshold
+        # id(node) -> count, and id(node) -> (node, compiled code);
+        # the node is kept so that its id cannot be reused
+        self.counts = {}
+        self.compiled = {}
+        self.calls = 0
+        self.back_edges = 0
+        self.functions_compiled = 0
+        self.loops_compiled = 0
+        self.compile_time = 0.0
+
+    def _compile(self, node, compile_fn):
+        start = time.perf_counter()
+        code = compile_fn(self.walker, node)
+        self.compile_time += time.perf_counter() - start
+        self.compiled[id(node)] = (node, code)
+        return code
+
+    def function(self, func):
+        """
+        Count a call of FUNDECL func and return its compiled body, or
+        None while it is not hot yet.
+        """
+        entry = self.compiled.get(id(func))
+        if entry is not None:
+            return entry[1]
+        self.calls += 1
+        n = self.counts.get(id(func), 0) + 1
+        self.counts[id(func)] = n
+        if n < self.call_threshold:
+            return None
+        self.functions_compiled += 1
+        del self.counts[id(func)]
+        return self._compile(func, lambda w, f: compile_stmt(w, f[3]))
+
+    def loop(self, node):
+        """
+        Compiled code of a WHILE or REPEAT node that has been hot
+        before, or None.
+        """
+        entry = self.compiled.get(id(node))
+        return None if entry is None else entry[1]
+
+    def back_edge(self, node):
+        """
+        Count an iteration of loop node and return its compiled code
+        once it is hot, None before that.  For a WHILE the code runs
+        the rest of the loop, for a REPEAT it is the body, to be run
+        for the iterations that are left.
+        """
+        self.back_edges += 1
+        n = self.counts.get(id(node), 0) + 1
+        self.counts[id(node)] = n
+        if n < self.loop_threshold:
+            return None
+        self.loops_compiled += 1
+        del self.counts[id(node)]
+        if node[0] == "WHILE":
+            return self._compile(node, compile_stmt)
+        return self._compile(node, lambda w, n: compile_stmt(w, n[2]))
+
+    def stats(self):
+        return {
+            "call_threshold": self.call_threshold,
+            "loop_threshold": self.loop_threshold,
+            "calls": self.calls,
+            "back_edges": self.back_edges,
+            "functions_compiled": self.functions_compiled,
+            "loops_compiled": self.loops_compiled,
+            "compile_ms": round(self.compile_time * 1000, 3),
+        }
+
+
+# Statements
+########################################################################
+
+def compile_stmt(walker, node):
+    """
+    Return a closure that runs statement node like walker.visit(node).
+    """
+    compiler = STMTS.get(node[0])
+    if compiler is None:
+        visit = walker.visit
+        return lambda: visit(node)
+    return compiler(walker, node)
+
+
+def _stmt_list(walker, node):
+    fns = [compile_stmt(walker, s) for s in node[1]]
+    if len(fns) == 1:
+        return fns[0]
+
+    def run():
+        for fn in fns:
+            fn()
+            if walker.return_flag:
+                break
+    return run
+
+
+def _block(walker, node):
+    return compile_stmt(walker, node[1])
+
+
+def _nil(walker, node):
+    return lambda: None
+
+
+def _draw(walker, node):
+    _, (_, name) = node
+    lookup = symtab.lookup
+    override = walker.apply_mood_override
+
+    def draw():
+        cat = lookup(name)
+        if cat["type"] == "litter":
+            walker._draw_litter(cat, None)
+            return
+        cat = override(cat)
+        if walker.on_draw is not None:
+            walker.on_draw(name, cat)
+            return
+        print(draw_text(name, cat), end="")
+    return draw
+
+
+def _value(walker, expr, what, name):
+    # expression assigned to a trait or variable, with the walker's
+    # check for unquoted values
+    fn = compile_exp(walker, expr)
+    if expr[0] != "ID":
+        return fn
+    bad = expr[1]
+    message = (f"{what} '{bad}' must be quoted.\n"
+               f"Example: {name} = \"{bad}\";")
+
+    def value():
+        if not walker.checked:
+            raise ValueError(message)
+        return fn()
+    return value
+
+
+def _trait_assign(walker, node):
+    _, (_, catname), (_, traitname), expr = node
+    value_fn = _value(walker, expr, "Trait value", traitname)
+    lookup = symtab.lookup
+    update = symtab.update
+    override = walker.apply_mood_override
+    is_mood = traitname == "mood"
+
+    def trait_assign():
+        value = value_fn()
+        cat = lookup(catname)
+        if cat["type"] == "litter":
+            from cadl_litter import assign
+            assign(cat, traitname, value)
+            return
+        cat["traits"][traitname] = value
+        if is_mood:
+            override(cat)
+        update(catname, cat)
+    return trait_assign
+
+
+def _assign(walker, node):
+    _, (_, name), expr = node
+    value_fn = _value(walker, expr, "Value", name)
+    update = symtab.update
+
+    def assign():
+        update(name, value_fn())
+    return assign
+
+
+def _return(walker, node):
+    _, expr = node
+    if expr[0] == "NIL":
+        value_fn = _nil(walker, expr)
+    else:
+        value_fn = compile_exp(walker, expr)
+
+    def ret():
+        walker.return_value = value_fn()
+        walker.return_flag = True
+    return ret
+
+
+def _while(walker, node):
+    _, expr, stmt = node
+    cond = compile_exp(walker, expr)
+    body = compile_stmt(walker, stmt)
+
+    def loop():
+        while cond():
+            body()
+            if walker.return_flag:
+                break
+    return loop
+
+
+def _repeat(walker, node):
+    _, expr, stmt = node
+    count_fn = compile_exp(walker, expr)
+    body = compile_stmt(walker, stmt)
+
+    def repeat():
+        count = count_fn()
+        if not isinstance(count, int) or isinstance(count, bool):
+            raise ValueError(
+                f"repeat count must be an integer, got {count!r}"
+            )
+        for _ in range(count):
+            body()
+            if walker.return_flag:
+                break
+    return repeat
+
+
+def _if(walker, node):
+    _, expr, then_stmt, else_stmt = node
+    cond = compile_exp(walker, expr)
+    then_fn = compile_stmt(walker, then_stmt)
+    if not (is_node(else_stmt) and else_stmt[0] != "NIL"):
+        def if_then():
+            if cond():
+                then_fn()
+        return if_then
+    else_fn = compile_stmt(walker, else_stmt)
+
+    def if_else():
+        if cond():
+            then_fn()
+        else:
+            else_fn()
+    return if_else
+
+
+def _call_stmt(walker, node):
+    call = _call(walker, node)
+
+    def call_stmt():
+        call()
+    return call_stmt
+
+
+STMTS = {
+    "STMTLIST": _stmt_list,
+    "BLOCK": _block,
+    "NIL": _nil,
+    "DRAW": _draw,
+    "TRAITASSIGN": _trait_assign,
+    "ASSIGN": _assign,
+    "RETURN": _return,
+    "WHILE": _while,
+    "REPEAT": _repeat,
+    "IF": _if,
+    "CALLSTMT": _call_stmt,
+}
+
+
+# Expressions
+########################################################################
+
+def compile_exp(walker, node):
+    """
+    Return a closure that evaluates expression node like
+    walker.visit(node).
+    """
+    compiler = EXPS.get(node[0])
+    if compiler is None:
+        visit = walker.visit
+        return lambda: visit(node)
+    return compiler(walker, node)
+
+
+def _constant(walker, node):
+    value = walker.visit(node)
+    return lambda: value
+
+
+def _id(walker, node):
+    name = node[1]
+    lookup = symtab.lookup
+    return lambda: lookup(name)
+
+
+def _attr(walker, node):
+    _, (_, catname), (_, traitname) = node
+    lookup = symtab.lookup
+
+    def attr():
+        cat = lookup(catname)
+        if cat["type"] == "litter":
+            raise ValueError(
+                f"{catname}.{traitname}: a litter has no single "
+                f"trait value"
+            )
+        return cat["traits"][traitname]
+    return attr
+
+
+def _not(walker, node):
+    fn = compile_exp(walker, node[1])
+    return lambda: not fn()
+
+
+def _eq(walker, node):
+    tag, left, right = node
+    lfn = compile_exp(walker, left)
+    rfn = compile_exp(walker, right)
+    if tag == "EQ":
+        def eq():
+            lval = lfn()
+            return lval == rfn()
+        return eq
+
+    def noteq():
+        lval = lfn()
+        return lval != rfn()
+    return noteq
+
+
+def _call(walker, node):
+    _, (_, name), args_list = node
+    if args_list[0] == "LIST":
+        arg_fns = [compile_exp(walker, a) for a in args_list[1]]
+    else:
+        arg_fns = []
+    lookup_function = walker._lookup_function
+    call_function = walker._call_function
+
+    def call():
+        func = lookup_function(name)
+        return call_function(func, [fn() for fn in arg_fns])
+    return call
+
+
+EXPS = {
+    "NIL": _nil,
+    "INTEGER": _constant,
+    "STRING": _constant,
+    "ID": _id,
+    "ATTR": _attr,
+    "NOT": _not,
+    "EQ": _eq,
+    "NOTEQ": _eq,
+    "CALLEXP": _call,
+}
@@ -0,0 +1,237 @@
+"""
+Gallery export for CADL draws
+
+GalleryWriter is an on_draw sink (see CADLInterpWalk) that writes
+every drawn cat into a self-contained HTML page or SVG image instead
+of printing it:
+
+    python cadl_interp.py --export gallery.html program.cadl
+    python cadl_interp.py --export gallery.svg program.cadl
+
+The gallery is written as the program runs.  Draws are collected in a
+small buffer that goes out to the file every CHUNK characters, so a
+program drawing a million cats never holds more than one chunk of the
+page.  The escaped markup for the picture of a cat is built once for
+each distinct combination of traits and reused for every draw of it,
+only the (escaped) name is added per draw.
+
+The page needs nothing but the file itself: no scripts, fonts or
+other resources are loaded.
+
+The scene of positioned draws (see cadl_canvas) ends the gallery, as
+a figure of its own in HTML and below the grid of cats in SVG.
+
+An SVG has to state its size up front, but the number of rows and the
+size of the scene are only known once the program has finished.  The
+header therefore holds fixed-width, zero-padded placeholders that
+close() overwrites in place, which is why SVG output must go to a
+regular (seekable) file.
+"""
+
+from html import escape
+
+from cadl_ascii_render import render_cat
+
+# write the buffer out once it holds this many characters
+CHUNK = 1 << 16
+
+# most distinct pictures kept, trait values are not limited to the
+# registry unless the program was checked
+TEMPLATE_LIMIT = 1 << 16
+
+HTML_HEAD = """\
+<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; background: #f6f6f6; margin: 1em; }}
+.cats {{ display: flex; flex-wrap: wrap; gap: 8px; }}
+figure {{ margin: 0; padding: 8px; background: #fff;
+          border: 1px solid #ddd; border-radius: 4px; }}
+pre {{ margin: 0; font: 14px/1.2 monospace; }}
+figcaption {{ text-align: center; font-size: 12px; color: #555; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div class="cats">
+"""
+
+HTML_TAIL = """\
+</div>
+</body>
+</html>
+"""
+
+# SVG grid: cells of CELL_W x CELL_H pixels, COLUMNS to a row
+COLUMNS = 8
+CELL_W = 140
+CELL_H = 100
+LINE_H = 17
+# width of a character of the scene, about that of 14px monospace
+CHAR_W = 9
+
+# width and height placeholder, wide enough for any number of rows
+SIZE_FIELD = 12
+
+SVG_HEAD = """\
+<?xml version="1.0" encoding="utf-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">
+<title>{title}</title>
+<style>
+text {{ font: 14px monospace; white-space: pre; }}
+.name {{ font: 12px sans-serif; fill: #555; }}
+</style>
+"""
+
+SVG_TAIL = "</svg>\n"
+
+
+class GalleryWriter:
+
+    def __init__(self, path, fmt=None, title="CADL gallery"):
+        # format from the file name unless given, "html" or "svg"
+        if fmt is None:
+            fmt = "svg" if path.lower().endswith(".svg") else "html"
+        if fmt not in ("html", "svg"):
+            raise ValueError("unknown gallery format {}".format(fmt))
+        self.svg = fmt == "svg"
+        self.path = path
+        self.title = escape(title)
+        self.out = None
+        self.parts = []
+        self.size = 0
+        self.count = 0
+        # lines of the scene of positioned draws, if there is one
+        self.scene_lines = None
+        # picture markup by frozenset of traits
+        self.templates = {}
+
+    def open(self):
+        """
+        Create the file and write the header.  Done on the first draw
+        (or close), so a program that does not parse leaves no file.
+        """
+        self.out = open(self.path, "w", encoding="utf-8")
+        title = self.title
+        if self.svg:
+            head = SVG_HEAD.format(width="0" * SIZE_FIELD,
+                                   height="0" * SIZE_FIELD, title=title)
+            # remember where the width and height go, see close
+            w = head.index('width="') + len('width="')
+            h = head.index('height="') + len('height="')
+            self.out.write(head[:w])
+            self.width_at = self.out.tell()
+            self.out.write(head[w:h])
+            self.height_at = self.out.tell()
+            self.out.write(head[h:])
+        else:
+            self.out.write(HTML_HEAD.format(title=title))
+
+    def template(self, cat):
+        """
+        Escaped picture markup of cat, built once per trait combination.
+        """
+        traits = cat["traits"]
+        try:
+            key = frozenset(traits.items())
+            markup = self.templates.get(key)
+        except TypeError:
+            key = None  # unhashable trait value, never cached
+            markup = None
+        if markup is not None:
+            return markup
+
+        art = render_cat(cat)
+        if self.svg:
+            markup = "".join(
+                '<text x="0" y="{}">{}</text>'.format(
+                    (i + 1) * LINE_H, escape(line))
+                for (i, line) in enumerate(art.split("\n")))
+        else:
+            markup = "<pre>{}</pre>".format(escape(art))
+        if key is not None and len(self.templates) < TEMPLATE_LIMIT:
+            self.templates[key] = markup
+        return markup
+
+    def __call__(self, name, cat):
+        if cat["traits"].__class__ is not dict:
+            # prototype-based cat, draw from its flat traits
+            from cadl_proto import flat_cat
+            cat = flat_cat(cat)
+        if self.out is None:
+            self.open()
+        markup = self.template(cat)
+        caption = name.lower() != "noname"
+        if self.svg:
+            row, col = divmod(self.count, COLUMNS)
+            text = '<g transform="translate({} {})">{}{}</g>\n'.format(
+                col * CELL_W + 8, row * CELL_H + 4, markup,
+                '<text class="name" x="0" y="{}">{}</text>'.format(
+                    4 * LINE_H + 4, escape(name)) if caption else "")
+        else:
+            text = "<figure>{}{}</figure>\n".format(
+                markup,
+                "<figcaption>{}</figcaption>".format(escape(name))
+                if caption else "")
+        self.count += 1
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= CHUNK:
+            self.flush()
+
+    def scene(self, text):
+        if self.out is None:
+            self.open()
+        if self.svg:
+            # placed in close, below the last row
+            self.scene_lines = text.split("\n")
+            return
+        text = ('<figure class="scene"><pre>{}</pre>'
+                '<figcaption>scene</figcaption></figure>\n'.format(
+                    escape(text)))
+        self.parts.append(text)
+        self.size += len(text)
+
+    def flush(self):
+        """
+        Write out the buffered draws.
+        """
+        if self.parts:
+            self.out.write("".join(self.parts))
+            self.parts.clear()
+            self.size = 0
+        self.out.flush()
+
+    def close(self):
+        if self.out is None:
+            self.open()
+        elif self.out.closed:
+            return
+        self.flush()
+        if self.svg:
+            width = COLUMNS * CELL_W
+            height = -(-self.count // COLUMNS) * CELL_H
+            lines = self.scene_lines
+            if lines is not None:
+                self.out.write(
+                    '<g transform="translate(8 {})">{}</g>\n'.format(
+                        height + 4, "".join(
+                            '<text x="0" y="{}">{}</text>'.format(
+                                (i + 1) * LINE_H, escape(line))
+                            for (i, line) in enumerate(lines))))
+                width = max(width,
+                            max(len(line) for line in lines) * CHAR_W + 16)
+                height += len(lines) * LINE_H + 8
+            self.out.write(SVG_TAIL)
+            # zero padded to the width of the placeholders, "000400"
+            # is a valid length
+            self.out.seek(self.width_at)
+            self.out.write(str(width).zfill(SIZE_FIELD))
+            self.out.seek(self.height_at)
+            self.out.write(str(max(height, CELL_H)).zfill(SIZE_FIELD))
+        else:
+            self.out.write(HTML_TAIL)
+        self.out.close()
@@ -0,0 +1,535 @@
+"""
+Compact flat AST for CADL
+
+The parser builds an AST of nested tuples in which every name is
+wrapped as ('ID', name), every list as ('LIST', [...]) and so on, so a
+program costs several small Python objects per node.  FlatAST stores
+the same tree in a handful of parallel arrays instead,
+
+    kinds[i]     kind of node i, an index into kind_table
+    args[i]      leaf nodes: the value (an int, or an index into
+                 strings); other nodes: offset of the first child
+                 in children
+    counts[i]    number of children of node i
+    children     the child node indices of all nodes, back to back
+
+plus the table of interned strings.  A kind is a (tag, shape) pair:
+
+    LEAF_STR, LEAF_INT   ('ID', 'Miso'), ('INTEGER', 3): a single entry
+                         holding the name or number
+    LIST                 ('LIST', [...]), ('STMTLIST', [...]): the list
+                         items are the children of the node itself
+    NODE                 any other tuple, children are node[1:]
+
+Values that are not tuples (a bare string, int or list inside a tuple,
+e.g. the operator of a where clause) get kinds with the empty tag.
+
+Nodes are only ever appended, children before their parents, so a
+tree is built bottom up while parsing: parse_flat runs the parser
+with actions that append the nodes (see cadl_ll1.rows_with_actions), and
+add turns a tuple AST into nodes.
+
+The interpreter and dumpast read the store through FlatAST.item and
+FlatNode, a read-only view of an inner node that indexes in constant
+time and otherwise behaves like the tuple it stands for; leaves come
+out as the small tuples they stand for, they need no view.  to_tuple
+turns (a part of) the store back into the tuple AST.
+"""
+
+import marshal
+import sys
+from array import array
+
+LEAF_STR = 0
+LEAF_INT = 1
+LIST = 2
+NODE = 3
+
+MAGIC = b"CADLFLAT\x01"
+
+
+class FlatAST:
+
+    def __init__(self):
+        self.kinds = array("H")
+        self.args = array("q")
+        self.counts = array("I")
+        self.children = array("I")
+        # interned strings and their indices
+        self.strings = []
+        self.string_ix = {}
+        # (tag, shape) of every kind and their codes
+        self.kind_table = []
+        self.kind_ix = {}
+        # index of the root node, the last top-level node added
+        self.root = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    # Building
+    ####################################################################
+    def _kind(self, tag, shape):
+        k = self.kind_ix.get((tag, shape))
+        if k is None:
+            k = self.kind_ix[(tag, shape)] = len(self.kind_table)
+            self.kind_table.append((tag, shape))
+        return k
+
+    def intern(self, s):
+        ix = self.string_ix.get(s)
+        if ix is None:
+            ix = self.string_ix[s] = len(self.strings)
+            self.strings.append(s)
+        return ix
+
+    def leaf(self, tag, value):
+        """
+        Append a leaf holding a string or an int and return its index.
+        """
+        i = len(self.kinds)
+        if isinstance(value, str):
+            self.kinds.append(self._kind(tag, LEAF_STR))
+            self.args.append(self.intern(value))
+        elif isinstance(value, int) and -(1 << 63) <= value < (1 << 63):
+            self.kinds.append(self._kind(tag, LEAF_INT))
+            self.args.append(value)
+        else:
+            raise TypeError("cannot store {!r} in a flat AST".format(value))
+        self.counts.append(0)
+        return i
+
+    def node(self, tag, children, shape=NODE):
+        """
+        Append a node with the given child indices and return its index.
+        """
+        i = len(self.kinds)
+        self.kinds.append(self._kind(tag, shape))
+        self.args.append(len(self.children))
+        self.counts.append(len(children))
+        self.children.extend(children)
+        return i
+
+    def add(self, tree):
+        """
+        Append a tuple AST (without recursion, any depth) and return
+        the index of its root.
+        """
+        done = []
+        # items still to add, and (tag, shape, number of children)
+        # markers for nodes whose children are all done
+        todo = [tree]
+        while todo:
+            item = todo.pop()
+            if item.__class__ is _Pending:
+                n = item.n
+                kids = done[len(done) - n:] if n else []
+                del done[len(done) - n:]
+                done.append(self.node(item.tag, kids, item.shape))
+            elif isinstance(item, tuple):
+                tag = item[0]
+                if len(item) == 2:
+                    child = item[1]
+                    if isinstance(child, list):
+                        todo.append(_Pending(tag, LIST, len(child)))
+                        todo.extend(reversed(child))
+                        continue
+                    if isinstance(child, (str, int)) \
+                            and not isinstance(child, bool):
+                        done.append(self.leaf(tag, child))
+                        continue
+                todo.append(_Pending(tag, NODE, len(item) - 1))
+                todo.extend(reversed(item[1:]))
+            elif isinstance(item, list):
+                todo.append(_Pending("", LIST, len(item)))
+                todo.extend(reversed(item))
+            else:
+                done.append(self.leaf("", item))
+        return done[0]
+
+    @classmethod
+    def from_tuple(cls, tree):
+        flat = cls()
+        flat.root = flat.add(tree)
+        return flat
+
+    # Reading
+    ####################################################################
+    def view(self, i=None):
+        """
+        Node i, the root by default, as item returns it.
+        """
+        return self.item(self.root if i is None else i)
+
+    def item(self, i):
+        """
+        Node i as it appears in the tuple of its parent: an inner node
+        as a FlatNode, a leaf as the tuple it stands for, e.g.
+        ('ID', 'Miso'), and a value that is not a tuple as the plain
+        value or list.
+        """
+        tag, shape = self.kind_table[self.kinds[i]]
+        if shape == LEAF_STR:
+            value = self.strings[self.args[i]]
+            return (tag, value) if tag else value
+        if shape == LEAF_INT:
+            value = self.args[i]
+            return (tag, value) if tag else value
+        if not tag:
+            return self.items(i)
+        return FlatNode(self, i)
+
+    def items(self, i):
+        """
+        The children of node i as a list of items (see item).
+        """
+        return list(map(self.item, self.child_ixs(i)))
+
+    def tag(self, i):
+        return self.kind_table[self.kinds[i]][0]
+
+    def child_ixs(self, i):
+        start = self.args[i]
+        return self.children[start:start + self.counts[i]]
+
+    def value(self, i):
+        tag, shape = self.kind_table[self.kinds[i]]
+        if shape == LEAF_STR:
+            return self.strings[self.args[i]]
+        if shape == LEAF_INT:
+            return self.args[i]
+        raise TypeError("{} node has no value".format(tag))
+
+    def to_tuple(self, i=None):
+        """
+        Return node i (the root by default) as a tuple AST.
+        """
+        if i is None:
+            i = self.root
+        kind_table = self.kind_table
+        done = []
+        todo = [i]
+        while todo:
+            item = todo.pop()
+            if item < 0:
+                # all children of node ~item are done
+                item = ~item
+                tag, shape = kind_table[self.kinds[item]]
+                n = self.counts[item]
+                kids = done[len(done) - n:] if n else []
+                del done[len(done) - n:]
+                if shape == LIST:
+                    done.append((tag, kids) if tag else kids)
+                else:
+                    done.append((tag,) + tuple(kids))
+                continue
+            tag, shape = kind_table[self.kinds[item]]
+            if shape == LEAF_STR or shape == LEAF_INT:
+                value = self.value(item)
+                done.append((tag, value) if tag else value)
+            else:
+                todo.append(~item)
+                todo.extend(reversed(self.child_ixs(item)))
+        return done[0]
+
+    # Serialization
+    ####################################################################
+    def dumps(self):
+        """
+        Serialize the store into bytes for loads.
+        """
+        return MAGIC + marshal.dumps((
+            sys.byteorder, self.kind_table, self.strings,
+            self.kinds.tobytes(), self.args.tobytes(),
+            self.counts.tobytes(), self.children.tobytes(), self.root,
+        ))
+
+    @classmethod
+    def loads(cls, data):
+        if not data.startswith(MAGIC):
+            raise ValueError("not a flat CADL AST")
+        (byteorder, kind_table, strings, kinds, args, counts, children,
+         root) = marshal.loads(data[len(MAGIC):])
+        flat = cls()
+        flat.kind_table = [tuple(k) for k in kind_table]
+        flat.kind_ix = {k: i for (i, k) in enumerate(flat.kind_table)}
+        flat.strings = strings
+        flat.string_ix = {s: i for (i, s) in enumerate(strings)}
+        for arr, raw in ((flat.kinds, kinds), (flat.args, args),
+                         (flat.counts, counts), (flat.children, children)):
+            arr.frombytes(raw)
+            if byteorder != sys.byteorder:
+                arr.byteswap()
+        flat.root = root
+        return flat
+
+
+class _Pending:
+    # node whose children are being added, see FlatAST.add
+    __slots__ = ("tag", "shape", "n")
+
+    def __init__(self, tag, shape, n):
+        self.tag = tag
+        self.shape = shape
+        self.n = n
+
+
+class FlatNode:
+    """
+    View of inner node index in a FlatAST that indexes, unpacks and
+    compares like the tuple node it stands for: node[0] is the tag,
+    node[k] child k as FlatAST.item makes it; the list of a LIST node
+    is node[1].
+
+    The items are made from the arrays on first use and kept by the
+    view (see as_tuple), so indexing is a tuple lookup from then on.
+    A view lives as long as the view of its parent (or whoever holds
+    it), so the body of a loop or of a function in the symbol table is
+    made once and runs like the tuple AST, with the same node objects
+    every time, while the views of a statement that has run are
+    dropped with it.
+    """
+
+    __slots__ = ("ast", "index", "_items")
+
+    def __init__(self, ast, index):
+        self.ast = ast
+        self.index = index
+        self._items = None
+
+    @property
+    def tag(self):
+        return self.ast.tag(self.index)
+
+    @property
+    def shape(self):
+        return self.ast.kind_table[self.ast.kinds[self.index]][1]
+
+    def as_tuple(self):
+        """
+        The node as a tuple of its tag and items, the children still
+        FlatNodes (unlike to_tuple); what the interpreter runs.
+        """
+        items = self._items
+        if items is None:
+            ast = self.ast
+            i = self.index
+            tag, shape = ast.kind_table[ast.kinds[i]]
+            if shape == LIST:
+                items = (tag, ast.items(i))
+            else:
+                items = (tag, *map(ast.item, ast.child_ixs(i)))
+            self._items = items
+        return items
+
+    def __len__(self):
+        return len(self._items or self.as_tuple())
+
+    def __getitem__(self, k):
+        return (self._items or self.as_tuple())[k]
+
+    def __iter__(self):
+        return iter(self._items or self.as_tuple())
+
+    def __eq__(self, other):
+        if isinstance(other, FlatNode):
+            return self.to_tuple() == other.to_tuple()
+        return self.to_tuple() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "FlatNode({!r})".format(self.to_tuple())
+
+    def to_tuple(self):
+        return self.ast.to_tuple(self.index)
+
+
+def _actions():
+    # the actions of cadl_ll1.GRAMMAR that make nodes, each replaced
+    # by one adding the same node to a FlatAST and returning its index;
+    # lists of indices stay plain lists until a node is made of them,
+    # just like the lists of tuples of the tuple actions.  Returns
+    # (actions, target): target(flat) makes the actions add to flat
+    # from then on, so the parse table made with them can be reused
+    import cadl_ll1 as ll1
+    # the kinds of the nodes the actions make, in every flat targeted
+    flat = FlatAST()
+    kinds = args = counts = children = intern = None
+
+    def target(new):
+        nonlocal flat, kinds, args, counts, children, intern
+        if new is not None:
+            new.kind_table[:] = kind_table
+            new.kind_ix.update(kind_ix)
+            kinds = new.kinds
+            args = new.args
+            counts = new.counts
+            children = new.children
+            intern = new.intern
+        else:
+            kinds = args = counts = children = intern = None
+        flat = new
+
+    def maker(tag, shape=NODE):
+        # function appending a node with the given child indices
+        kind = flat._kind(tag, shape)
+
+        def make(kids):
+            i = len(kinds)
+            kinds.append(kind)
+            args.append(len(children))
+            counts.append(len(kids))
+            children.extend(kids)
+            return i
+        return make
+
+    def leaf_maker(tag):
+        # function appending a leaf holding a string
+        kind = flat._kind(tag, LEAF_STR)
+
+        def make(s):
+            i = len(kinds)
+            kinds.append(kind)
+            args.append(intern(s))
+            counts.append(0)
+            return i
+        return make
+
+    ident = leaf_maker("ID")
+    string = leaf_maker("STRING")
+    operator = leaf_maker("")
+    stmtlist = maker("STMTLIST", LIST)
+    lst = maker("LIST", LIST)
+    catdecl_simple = maker("CATDECL_SIMPLE")
+    catdecl = maker("CATDECL")
+    catdecl_proto = maker("CATDECL_PROTO")
+    fundecl = maker("FUNDECL")
+    ret = maker("RETURN")
+    nil = maker("NIL")
+    while_ = maker("WHILE")
+    repeat = maker("REPEAT")
+    if_ = maker("IF")
+    block = maker("BLOCK")
+    import_ = maker("IMPORT")
+    litterdecl = maker("LITTERDECL")
+    draw = maker("DRAW")
+    draw_where = maker("DRAW_WHERE")
+    draw_at = maker("DRAW_AT")
+    randomcatdecl = maker("RANDOMCATDECL")
+    randomlitterdecl = maker("RANDOMLITTERDECL")
+    traitassign = maker("TRAITASSIGN")
+    traitassign_where = maker("TRAITASSIGN_WHERE")
+    assign = maker("ASSIGN")
+    assign_randomcat = maker("ASSIGN_RANDOMCAT")
+    callstmt = maker("CALLSTMT")
+    where = maker("WHERE")
+    attr = maker("ATTR")
+    callexp = maker("CALLEXP")
+    binop = {"EQ": maker("EQ"), "NOTEQ": maker("NOTEQ")}
+    not_ = maker("NOT")
+    trait = maker("TRAIT")
+    kind_table = list(flat.kind_table)
+    kind_ix = dict(flat.kind_ix)
+
+    def name(tk):
+        return ident(tk.value)
+
+    def stmt_cat(id_tk, suffix):
+        if suffix is None:
+            return catdecl_simple((name(id_tk),))
+        if suffix.__class__ is list:
+            return catdecl((name(id_tk), lst(suffix)))
+        return catdecl_proto((name(id_tk), suffix[0], lst(suffix[1])))
+
+    def add_trait(traits, id_tk, e):
+        traits.append(trait((name(id_tk), e)))
+        return traits
+
+    def add_id(ids, tk):
+        ids.append(name(tk))
+        return ids
+
+    return {
+        ll1._program: stmtlist,
+        ll1._stmt_cat: stmt_cat,
+        ll1._proto: lambda tk, traits: (name(tk), traits),
+        ll1._fundecl:
+            lambda id_tk, f: fundecl((name(id_tk), f[0], f[1])),
+        ll1._func_suffix: lambda params, body: (lst(params), body),
+        ll1._return: lambda e: ret((e,)),
+        ll1._nil: lambda: nil(()),
+        ll1._while: lambda e, s: while_((e, s)),
+        ll1._repeat: lambda e, s: repeat((e, s)),
+        ll1._if: lambda e, s1, s2: if_((e, s1, s2)),
+        ll1._block: lambda sl: block((stmtlist(sl),)),
+        ll1._import: lambda tk: import_((string(tk.value),)),
+        ll1._litter: lambda id_tk, ids: litterdecl((name(id_tk), lst(ids))),
+        ll1._draw: lambda id_tk: draw((name(id_tk),)),
+        ll1._draw_where: lambda id_tk, cond: draw_where((name(id_tk), cond)),
+        ll1._draw_at: lambda id_tk, x, y: draw_at((name(id_tk), x, y)),
+        ll1._randomcat: lambda id_tk: randomcatdecl((name(id_tk),)),
+        ll1._random_litter:
+            lambda id_tk, size: randomlitterdecl((name(id_tk), size)),
+        ll1._trait_assign:
+            lambda id_tk, trait_tk, e:
+                traitassign((name(id_tk), name(trait_tk), e)),
+        ll1._trait_assign_where:
+            lambda id_tk, trait_tk, e, cond:
+                traitassign_where((name(id_tk), name(trait_tk), e, cond)),
+        ll1._assign: lambda id_tk, e: assign((name(id_tk), e)),
+        ll1._assign_random: lambda id_tk: assign_randomcat((name(id_tk),)),
+        ll1._call_stmt: lambda id_tk, a: callstmt((name(id_tk), lst(a))),
+        ll1._where:
+            lambda trait_tk, op, e:
+                where((operator(op.type), name(trait_tk), e)),
+        ll1._id: name,
+        ll1._integer: lambda tk: flat.leaf("INTEGER", int(tk.value)),
+        ll1._string: lambda tk: string(tk.value),
+        ll1._not: lambda e: not_((e,)),
+        ll1._attr: lambda n, trait_tk: attr((n, name(trait_tk))),
+        ll1._call: lambda n, a: callexp((n, lst(a))),
+        ll1._binop: lambda e, op, rhs: binop[op.type]((e, rhs)),
+        ll1._first_trait: lambda id_tk, e: [trait((name(id_tk), e))],
+        ll1._add_trait: add_trait,
+        ll1._first_id: lambda tk: [name(tk)],
+        ll1._add_id: add_id,
+    }, target
+
+
+# (parse table rows, target) of _actions not in use, see parse_flat
+_spare = []
+
+
+def parse_flat(stream):
+    """
+    Parse stream (program text or a cadl_lexer token stream) straight
+    into a FlatAST: the parser runs with actions (see _actions) that
+    append every node to the arrays as soon as it is parsed, no tuple
+    node is ever made.  Syntax errors raise cadl_fe.CADLSyntaxError,
+    as they do for cadl_fe.parse.
+    """
+    import cadl_ll1
+    from cadl_fe import CADLSyntaxError
+    from cadl_lexer import Lexer
+
+    if not isinstance(stream, Lexer):
+        stream = Lexer(stream, [])
+    # the table made with the flat actions is the slow part of a short
+    # parse, it is made once and pointed at every new FlatAST
+    try:
+        rows, target = _spare.pop()
+    except IndexError:
+        actions, target = _actions()
+        rows = cadl_ll1.rows_with_actions(actions)
+    flat = FlatAST()
+    target(flat)
+    try:
+        root = cadl_ll1.parse(stream, rows=rows)
+    finally:
+        target(None)
+        _spare.append((rows, target))
+    if stream.diagnostics:
+        raise CADLSyntaxError(stream.diagnostics)
+    flat.root = root
+    return flat
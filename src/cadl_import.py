@@ -0,0 +1,167 @@
+"""
+Module loader for CADL
+
+Implements the import statement,
+
+    import "lib.cadl";
+
+A module is a plain CADL program.  The first time a session imports it,
+the module runs once in a global scope of its own; every top-level name
+it leaves behind (functions, cats, variables) is then declared in the
+importing scope.  Later imports of the same module within the session
+declare the very same objects again, nothing is re-parsed or re-run,
+so an imported cat is shared by reference between all its importers.
+
+Parsed modules are cached by the hash of their source, in memory for
+the lifetime of the process and on disk in a __cadlcache__ directory
+next to the module (like __pycache__), so a library is only parsed
+once no matter how many programs or processes use it.  A cache file
+starts with a header naming the AST version of the front end and the
+marshal and bytecode versions of the Python that wrote it; a file
+with any other header is parsed again and rewritten.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+
+from cadl_symtab import symtab
+
+CACHE_DIR = "__cadlcache__"
+CACHE_MAGIC = b"CADLAST"
+
+# content hash -> parsed module, shared by all sessions
+ast_cache = {}
+
+
+def load_ast(path):
+    """
+    Return the AST of the module at path, from the memory or disk
+    cache if the module has been parsed before.
+    """
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha256(source).hexdigest()
+
+    ast = ast_cache.get(digest)
+    if ast is not None:
+        return ast
+
+    name = os.path.basename(path)
+    cache_file = os.path.join(
+        os.path.dirname(path), CACHE_DIR, "{}.{}.{}.ast".format(
+            name, digest[:16], sys.implementation.cache_tag))
+    header = cache_header()
+    try:
+        with open(cache_file, "rb") as f:
+            data = f.read()
+        if data.startswith(header):
+            ast = marshal.loads(memoryview(data)[len(header):])
+    except (OSError, EOFError, ValueError, TypeError):
+        ast = None
+
+    if ast is None:
+        from cadl_fe import parse, CADLSyntaxError
+        try:
+            ast = parse(source.decode("utf-8"))
+        except CADLSyntaxError as e:
+            raise CADLSyntaxError([(line, col, "{}: {}".format(name, msg))
+                                   for (line, col, msg) in e.diagnostics])
+        except Exception as e:
+            raise type(e)("{}: {}".format(name, e))
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file, "wb") as f:
+                f.write(header)
+                marshal.dump(ast, f)
+        except OSError:
+            pass  # read-only location, just don't cache on disk
+
+    ast_cache[digest] = ast
+    return ast
+
+
+def cache_header():
+    """
+    Header of the cache files this front end and Python can read.
+    """
+    from importlib.util import MAGIC_NUMBER
+    from cadl_fe import AST_VERSION
+    return b"%s %d %d %s\n" % (CACHE_MAGIC, AST_VERSION, marshal.version,
+                               MAGIC_NUMBER.hex().encode())
+
+
+class ModuleLoader:
+    """
+    Per-session module state: which modules have run and what
+    they export.
+    """
+
+    def __init__(self, search_path=None):
+        # directories searched for modules imported by the main program
+        self.search_path = list(search_path or ["."])
+        # resolved path -> {name: value} exported by the module
+        self.modules = {}
+        # paths of the modules currently being loaded (innermost last)
+        self.loading = []
+
+    def resolve(self, name):
+        # modules importing modules search their own directory first
+        if self.loading:
+            dirs = [os.path.dirname(self.loading[-1])]
+        else:
+            dirs = []
+        for d in dirs + self.search_path:
+            path = os.path.join(d, name)
+            if os.path.isfile(path):
+                return os.path.realpath(path)
+        raise ValueError("cannot find module {}".format(name))
+
+    def load(self, name, walker):
+        """
+        Return the exports of module name, running it with walker
+        if this session has not done so yet.
+        """
+        path = self.resolve(name)
+        exports = self.modules.get(path)
+        if exports is not None:
+            return exports
+        if path in self.loading:
+            raise ValueError("circular import of {}".format(name))
+
+        ast = load_ast(path)
+
+        # a checked program only imports checked modules
+        if walker.checked:
+            from cadl_check import check, CheckError
+            problems = check(ast)
+            if problems:
+                raise CheckError(["{}: {}".format(name, p)
+                                  for p in problems])
+
+        # run the module in a fresh global scope
+        saved_scopes = symtab.scoped_symtab
+        symtab.scoped_symtab = [{}]
+        self.loading.append(path)
+        try:
+            walker.visit(ast)
+            exports = symtab.scoped_symtab[-1]
+        finally:
+            self.loading.pop()
+            symtab.scoped_symtab = saved_scopes
+            # a top-level return in the module only ends the module
+            walker.return_flag = False
+            walker.return_value = None
+
+        self.modules[path] = exports
+        return exports
+
+    def import_into_scope(self, name, walker):
+        """
+        Declare everything module name exports in the current scope.
+        """
+        for sym, val in self.load(name, walker).items():
+            if symtab.is_local(sym) and symtab.lookup(sym) is val:
+                continue  # already imported here
+            symtab.declare(sym, val)
@@ -13,27 +13,103 @@ The actual execution of the CADL program is handled by:
   - CADLInterpWalk
 """
 
-from cadl_fe import parse        
-from cadl_interp_walk import CADLInterpWalk
+from cadl_fe import parse
 from cadl_symtab import symtab
-from dumpast import dumpast
 
-def interp(input_stream, dump=False, exceptions=False):
+# The walker (and with it the renderer) and dumpast are imported
+# where they are used so that short runs such as --help or -d
+# do not pay for modules they never touch.
+
+def interp(input_stream, dump=False, exceptions=False, profile=None,
+           snapshot=None, save_snapshot=None, search_path=None,
+           on_draw=None, flat=False, dump_format="text", dump_file=None,
+           check=False, tiered=False, tier_stats=False, stats=None,
+           memoize=True):
     try:
-        # Reset symbol table before each run
-        symtab.initialize()
+        # Reset symbol table before each run, or start from the
+        # state captured in a snapshot (see cadl_snapshot)
+        if snapshot is None:
+            symtab.initialize()
+        else:
+            from cadl_snapshot import restore_snapshot
+            restore_snapshot(snapshot)
 
-        # Parse CADL source to AST
-        ast = parse(input_stream)
+        # Parse CADL source to AST, keeping statement line numbers
+        # around if we are going to profile or check it.  A flat AST
+        # (see cadl_flatast) is run as it is, through views of its
+        # nodes.
+        lines = {} if profile or check else None
+        if flat:
+            from cadl_flatast import parse_flat
+            ast = parse_flat(input_stream)
+        elif stats is not None and isinstance(input_stream, str):
+            # lexed and parsed as separate phases (see cadl_stats)
+            ast = stats.front_end(input_stream, lines)
+        else:
+            ast = parse(input_stream, lines)
 
-        # Dump AST if requested
+        # Dump AST if requested, as text to stdout (or dump_file),
+        # or exported in dump_format "json" or "sexp" to dump_file
         if dump:
-            dumpast(ast)
+            import dumpast
+            dumper = {
+                "text": dumpast.dumpast,
+                "json": dumpast.dump_json,
+                "sexp": dumpast.dump_sexp,
+            }[dump_format]
+            if dump_file is None:
+                dumper(ast, None)
+            else:
+                with open(dump_file, "w") as f:
+                    dumper(ast, f)
             return None
 
+        # Report every trait problem up front and run nothing if
+        # there are any (see cadl_check)
+        measure = phase(stats)
+        if check:
+            from cadl_check import check as check_ast, CheckError
+            with measure("check"):
+                problems = check_ast(ast, lines)
+            if problems:
+                raise CheckError(problems)
+
         # Interpret (execute CADL program)
-        walker = CADLInterpWalk()
-        walker.visit(ast)
+        from cadl_interp_walk import CADLInterpWalk
+        if stats is not None:
+            # draws are timed as the render phase
+            on_draw = stats.sink(on_draw)
+        walker = CADLInterpWalk(on_draw=on_draw, search_path=search_path)
+        walker.checked = check
+        start_tier(walker, tiered)
+        walker.memoize = memoize
+        try:
+            with measure("execute"):
+                if profile:
+                    from cadl_profile import Profiler
+                    with Profiler(lines) as profiler:
+                        walker.visit(ast)
+                    with open(profile, "w") as f:
+                        profiler.write_collapsed(f)
+                elif flat:
+                    # one top-level statement at a time, its views
+                    # (see cadl_flatast.FlatNode) go once it has run
+                    for s in map(ast.item, ast.child_ixs(ast.root)):
+                        walker.visit(s)
+                        if walker.return_flag:
+                            break
+                else:
+                    walker.visit(ast)
+                walker.finish()
+        finally:
+            close_sink(on_draw)
+            if tier_stats:
+                print_tier_stats(walker)
+
+        # Keep the final state around for later runs
+        if save_snapshot:
+            from cadl_snapshot import save_snapshot as save
+            save(save_snapshot)
 
     except Exception as e:
         if exceptions:
@@ -44,37 +120,576 @@ def interp(input_stream, dump=False, exceptions=False):
     return None
 
 
-if __name__ == "__main__":
+def start_tier(walker, tiered):
+    """
+    Run walker tiered (see cadl_compile) if tiered is true, either
+    with the default thresholds or with tiered as a dictionary of
+    Tier options, e.g. {"call_threshold": 10}.
+    """
+    if tiered:
+        from cadl_compile import Tier
+        options = tiered if isinstance(tiered, dict) else {}
+        walker.tier = Tier(walker, **options)
+
+
+def print_tier_stats(walker):
     import sys
+    if walker.tier is not None:
+        stats = walker.tier.stats()
+        print("tier: " + " ".join(f"{k}={v}" for (k, v) in stats.items()),
+              file=sys.stderr)
+
+
+class NoPhase:
+    # stands in for Stats.phase without stats; contextlib is not
+    # imported for it, plain runs do not need it otherwise
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_PHASE = NoPhase()
+
+
+def phase(stats):
+    """
+    stats.phase (see cadl_stats), or a stand-in measuring nothing.
+    """
+    if stats is not None:
+        return stats.phase
+    return lambda name: NO_PHASE
+
+
+def close_sink(on_draw):
+    """
+    Let an on_draw sink write out whatever it still holds.
+    """
+    close = getattr(on_draw, "close", None)
+    if close is not None:
+        close()
+
+
+def monte_carlo(input_file, opts, snapshot=None, search_path=None,
+                check=False, tiered=False, memoize=True, exceptions=False):
+    """
+    --runs: parse input_file once, run it --runs times with successive
+    seeds from --seed-base on -j processes and print the report.
+    """
     import os
+    from cadl_montecarlo import run_many, report
+    try:
+        runs = int(opts["--runs"])
+        seed_base = int(opts.get("--seed-base", 0))
+        workers = int(opts.get("-j", os.cpu_count() or 1))
+        if runs < 1 or workers < 1:
+            raise ValueError("--runs and -j must be at least 1")
+
+        with open(input_file, "r") as f:
+            lines = {} if check else None
+            ast = parse(f.read(), lines)
+        if check:
+            from cadl_check import check as check_ast, CheckError
+            problems = check_ast(ast, lines)
+            if problems:
+                raise CheckError(problems)
+
+        tally = run_many(ast, runs, seed_base=seed_base, workers=workers,
+                         checked=check, snapshot=snapshot,
+                         search_path=search_path, tiered=tiered,
+                         memoize=memoize)
+    except Exception as e:
+        if exceptions:
+            raise e
+        print("error: " + str(e))
+        return 1
+    report(tally, seed_base)
+    return 0
+
+
+def prelude_snapshot(input_stream):
+    """
+    Run input_stream once as a prelude and return a snapshot of the
+    state it leaves behind, to be passed as interp(..., snapshot=...).
+    Errors in the prelude are raised.
+    """
+    from cadl_snapshot import take_snapshot
+    interp(input_stream, exceptions=True)
+    return take_snapshot()
+
+
+def load_prelude(path):
+    """
+    Return the snapshot for --prelude path, which is either a snapshot
+    written by --save-snapshot or CADL source that is run right away.
+    """
+    from cadl_snapshot import is_snapshot
+    with open(path, "rb") as f:
+        data = f.read()
+    if is_snapshot(data):
+        return data
+    return prelude_snapshot(data.decode("utf-8"))
+
+
+def interp_stream(f, exceptions=False, chunk_size=1 << 16, snapshot=None,
+                  search_path=None, on_draw=None, tiered=False,
+                  tier_stats=False, memoize=True):
+    """
+    Run the CADL program read from the file object f (or from an
+    already constructed cadl_lexer token stream) one top-level
+    statement at a time: each statement is parsed, executed and
+    dropped before the next one is read, so memory is bounded by the
+    largest statement rather than the size of the program.
+
+    Unlike interp(), statements before a syntax error have already
+    run when the error is reported.
+    """
+    try:
+        from cadl_lexer import Lexer, StreamLexer, tokenize_file
+        from cadl_fe import iter_stmts
+        from cadl_interp_walk import CADLInterpWalk
+
+        if snapshot is None:
+            symtab.initialize()
+        else:
+            from cadl_snapshot import restore_snapshot
+            restore_snapshot(snapshot)
+        walker = CADLInterpWalk(on_draw=on_draw, search_path=search_path)
+        start_tier(walker, tiered)
+        walker.memoize = memoize
+        if isinstance(f, Lexer):
+            token_stream = f
+        else:
+            diagnostics = []
+            token_stream = StreamLexer(
+                tokenize_file(f, chunk_size, diagnostics), diagnostics)
+        try:
+            for s in iter_stmts(token_stream):
+                walker.visit(s)
+                if walker.return_flag:
+                    break
+            walker.finish()
+        finally:
+            close_sink(on_draw)
+            if tier_stats:
+                print_tier_stats(walker)
+
+    except Exception as e:
+        if exceptions:
+            raise e
+        else:
+            print("error: " + str(e))
+
+    return None
+
+
+# Streaming interface
+########################################################
+
+def make_frame(name, cat):
+    """
+    Render a drawn cat into a frame dictionary,
+
+        {"type": "frame", "name": ..., "traits": {...}, "ascii": ...}
+
+    traits is a copy, later changes to the cat do not affect the frame.
+    """
+    from cadl_ascii_render import render_cat
+    return {
+        "type": "frame",
+        "name": name,
+        "traits": dict(cat["traits"]),
+        "ascii": render_cat(cat),
+    }
+
+
+def make_scene(text):
+    """
+    The scene of positioned draws (see cadl_canvas) as a dictionary,
+
+        {"type": "scene", "ascii": ...}
+    """
+    return {"type": "scene", "ascii": text}
 
-    ast_switch = False
-    except_switch = False
+
+class _Cancelled(Exception):
+    # raised inside the walker when the consumer of interp_iter goes away
+    pass
+
+
+def interp_iter(input_stream, buffer=64):
+    """
+    Run a CADL program and yield a frame (see make_frame) for every
+    draw as soon as it happens, and the scene (see make_scene) last
+    if the program made positioned draws.
+
+    The program runs on a worker thread that blocks once `buffer`
+    frames are waiting, so memory stays bounded no matter how many
+    cats the program draws.  Errors are raised from the generator;
+    closing the generator early stops the program.
+    """
+    import queue
+    import threading
+    from cadl_interp_walk import CADLInterpWalk
+
+    frames = queue.Queue(maxsize=buffer)
+    cancelled = threading.Event()
+    done = object()
+
+    def put(item):
+        # blocking put that gives up if the consumer went away
+        while not cancelled.is_set():
+            try:
+                frames.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    class Sink:
+        def __call__(self, name, cat):
+            if not put(make_frame(name, cat)):
+                raise _Cancelled()
+
+        def scene(self, text):
+            if not put(make_scene(text)):
+                raise _Cancelled()
+
+    def run():
+        try:
+            symtab.initialize()
+            ast = parse(input_stream)
+            walker = CADLInterpWalk(on_draw=Sink())
+            walker.visit(ast)
+            walker.finish()
+            result = done
+        except _Cancelled:
+            return
+        except Exception as e:
+            result = e
+        put(result)
+
+    worker = threading.Thread(target=run, name="cadl-interp", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = frames.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+        worker.join()
+
+
+USAGE = """\
+usage: cadl_interp.py [options] [file]
+
+Runs the CADL program in file, or starts interactive mode
+if no file is given.
+
+options:
+  -h, --help          show this message and exit
+  -d                  dump the AST instead of running the program
+  --dump-json OUT     write the AST to OUT as JSON instead of running
+  --dump-sexp OUT     write the AST to OUT as S-expressions instead
+                      of running
+  -e                  raise Python exceptions instead of printing errors
+  --stream            parse and run one top-level statement at a time,
+                      reading the file in chunks (for huge programs)
+  --mmap              memory-map the file and lex the mapped bytes
+                      instead of reading it into a string
+  --dedup             draw runs of identical frames once, followed
+                      by a "(x N)" repeat count
+  --rle               write draws as a run-length encoded frame stream
+                      (expand with: python cadl_rle.py < stream)
+  --animate           show successive draws in place as a terminal
+                      animation, redrawing only the changed cells
+  --fps N             frame rate limit for --animate (default 10)
+  --export OUT        write the drawn cats to a gallery page instead of
+                      printing them, SVG if OUT ends in .svg, else HTML
+  --prelude FILE      start from the state left by FILE, either CADL
+                      source or a snapshot made with --save-snapshot
+  --save-snapshot OUT save the state at the end of the program to OUT
+  --profile OUT       sample the running program and write collapsed
+                      stacks (CADL function:line) to OUT for flamegraphs
+  --flat              keep the parsed program in the compact flat AST
+                      (see cadl_flatast) instead of nested tuples: far
+                      less memory for big programs, statements run up
+                      to about 20% slower
+  --check             check trait names and values before running and
+                      report all problems instead of running
+  --tiered            compile hot functions and loops to closures
+                      (see cadl_compile) once they cross a threshold
+  --tier-calls N      calls before a function is compiled (default 50)
+  --tier-loops N      iterations before a loop is compiled (default 200)
+  --tier-stats        print call, loop and compile counts to stderr
+  --no-memo           do not reuse the results of earlier calls of pure
+                      functions (see cadl_purity)
+  --runs N            run the program N times with different seeds and
+                      report the distribution of randomcats, frames and
+                      outputs (see cadl_montecarlo) instead of output
+  --seed-base S       seed of the first of the --runs (default 0)
+  -j K                worker processes for --runs (default: one per CPU)
+  --stats             report time, CPU time and peak memory of the lex,
+                      parse, execute and render phases to stderr
+  --stats-json OUT    write that report to OUT as JSON
+  --stats-no-memory   time the phases without tracing memory, which
+                      slows the program down a lot
+"""
+
+# options that take a value
+VALUE_OPTIONS = ["--profile", "--prelude", "--save-snapshot", "--fps",
+                 "--dump-json", "--dump-sexp", "--tier-calls",
+                 "--tier-loops", "--export", "--runs", "--seed-base", "-j",
+                 "--stats-json"]
+
+
+def parse_args(argv):
+    """
+    Split the command line into an options dictionary and
+    the (optional) input file.
+    """
+    opts = {}
+    input_file = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in VALUE_OPTIONS:
+            if i + 1 >= len(argv):
+                raise ValueError(f"option {arg} expects a value")
+            opts[arg] = argv[i + 1]
+            i += 2
+            continue
+        elif arg.startswith("-"):
+            opts[arg] = True
+        else:
+            input_file = arg
+        i += 1
+    return opts, input_file
+
+
+def main(argv):
+    try:
+        opts, input_file = parse_args(argv)
+    except ValueError as e:
+        print("error: " + str(e))
+        return 1
+
+    if "-h" in opts or "--help" in opts:
+        print(USAGE, end="")
+        return 0
+
+    ast_switch = "-d" in opts
+    except_switch = "-e" in opts
+
+    dump_format = "text"
+    dump_file = None
+    for fmt in ("json", "sexp"):
+        if "--dump-" + fmt in opts:
+            ast_switch = True
+            dump_format = fmt
+            dump_file = opts["--dump-" + fmt]
+
+    snapshot = None
+    if "--prelude" in opts:
+        try:
+            snapshot = load_prelude(opts["--prelude"])
+        except Exception as e:
+            if except_switch:
+                raise e
+            print("error: prelude: " + str(e))
+            return 1
 
     # CASE 1: FILE PROVIDED, run normally
     ########################################################
-    if len(sys.argv) > 1:
-        args = sys.argv[1:-1]      # all except last
-        input_file = sys.argv[-1]  # last argument
-
-        ast_switch = "-d" in args
-        except_switch = "-e" in args
+    if input_file is not None:
+        import os
 
         if not os.path.isfile(input_file):
             print(f"unknown file {input_file}")
-            sys.exit(0)
+            return 0
+
+        # imports are found next to the program
+        search_path = [os.path.dirname(input_file) or "."]
+
+        sinks = [o for o in ("--animate", "--dedup", "--rle", "--export")
+                 if o in opts]
+        if len(sinks) > 1:
+            print("error: {} cannot be combined".format(" and ".join(sinks)))
+            return 1
+
+        if "--stream" in opts and ast_switch:
+            print("error: dumping the AST cannot be combined with --stream")
+            return 1
+
+        flat = "--flat" in opts
+        if flat and ("--stream" in opts or "--profile" in opts):
+            print("error: --flat cannot be combined with "
+                  "--stream or --profile")
+            return 1
+
+        check = "--check" in opts
+        if check and ("--stream" in opts or flat):
+            print("error: --check cannot be combined with "
+                  "--stream or --flat")
+            return 1
+
+        tiered = False
+        if ("--tiered" in opts or "--tier-calls" in opts
+                or "--tier-loops" in opts):
+            if "--profile" in opts:
+                print("error: --tiered cannot be combined with --profile")
+                return 1
+            tiered = {}
+            for opt, key in (("--tier-calls", "call_threshold"),
+                             ("--tier-loops", "loop_threshold")):
+                if opt in opts:
+                    try:
+                        tiered[key] = int(opts[opt])
+                    except ValueError:
+                        tiered[key] = 0
+                    if tiered[key] < 1:
+                        print("error: {} must be a whole number of at "
+                              "least 1, not {!r}".format(opt, opts[opt]))
+                        return 1
+            tiered = tiered or True
+        tier_stats = "--tier-stats" in opts
+        run_opts = dict(tiered=tiered, tier_stats=tier_stats,
+                        memoize="--no-memo" not in opts)
+
+        stats = None
+        if ("--stats" in opts or "--stats-json" in opts
+                or "--stats-no-memory" in opts):
+            clash = [o for o in ("-d", "--dump-json", "--dump-sexp",
+                                 "--stream", "--mmap", "--flat", "--runs")
+                     if o in opts]
+            if clash:
+                print("error: --stats cannot be combined with "
+                      + " or ".join(clash))
+                return 1
+            from cadl_stats import Stats
+            stats = Stats(trace_memory="--stats-no-memory" not in opts)
+
+        if "--runs" in opts:
+            clash = [o for o in ("-d", "--dump-json", "--dump-sexp",
+                                 "--stream", "--mmap", "--flat", "--profile",
+                                 "--save-snapshot", "--tier-stats")
+                     if o in opts] + sinks
+            if clash:
+                print("error: --runs cannot be combined with "
+                      + " or ".join(clash))
+                return 1
+            return monte_carlo(input_file, opts, snapshot=snapshot,
+                               search_path=search_path, check=check,
+                               tiered=tiered, memoize=run_opts["memoize"],
+                               exceptions=except_switch)
+
+        on_draw = None
+        if "--export" in opts:
+            from cadl_export import GalleryWriter
+            on_draw = GalleryWriter(opts["--export"],
+                                    title=os.path.basename(input_file))
+        elif "--animate" in opts:
+            from cadl_animate import Animator
+            try:
+                fps = float(opts.get("--fps", 10))
+            except ValueError:
+                fps = 0.0
+            if not fps > 0:
+                print("error: --fps must be a number greater than 0, "
+                      "not {!r}".format(opts["--fps"]))
+                return 1
+            on_draw = Animator(fps=fps)
+        elif "--dedup" in opts or "--rle" in opts:
+            from cadl_rle import FrameDeduper
+            on_draw = FrameDeduper(rle="--rle" in opts)
+
+        if "--mmap" in opts:
+            from cadl_lexer import StreamLexer, tokenize_mmap, map_file
+            source = map_file(input_file)
+            diagnostics = []
+            tokens = tokenize_mmap(source, diagnostics)
+            try:
+                char_stream = StreamLexer(tokens, diagnostics)
+                if "--stream" in opts:
+                    interp_stream(char_stream, exceptions=except_switch,
+                                  snapshot=snapshot, search_path=search_path,
+                                  on_draw=on_draw, **run_opts)
+                else:
+                    interp(char_stream, dump=ast_switch,
+                           exceptions=except_switch,
+                           profile=opts.get("--profile"),
+                           snapshot=snapshot,
+                           save_snapshot=opts.get("--save-snapshot"),
+                           search_path=search_path, on_draw=on_draw,
+                           flat=flat, dump_format=dump_format,
+                           dump_file=dump_file, check=check, **run_opts)
+            finally:
+                # a lexer stopped early (by an error in the program)
+                # still holds a match on the map, which has to go
+                # before the map
+                tokens.close()
+                if source:
+                    source.close()
+            return 0
+
+        if "--stream" in opts:
+            with open(input_file, "r") as f:
+                interp_stream(f, exceptions=except_switch,
+                              snapshot=snapshot, search_path=search_path,
+                              on_draw=on_draw, **run_opts)
+            return 0
+
+        if flat:
+            # the flat AST is built as the program is parsed, so there
+            # is no need to hold all of the tokens at once either
+            from cadl_lexer import StreamLexer, tokenize_file
+            with open(input_file, "r") as f:
+                diagnostics = []
+                token_stream = StreamLexer(
+                    tokenize_file(f, diagnostics=diagnostics), diagnostics)
+                interp(token_stream, dump=ast_switch,
+                       exceptions=except_switch, snapshot=snapshot,
+                       save_snapshot=opts.get("--save-snapshot"),
+                       search_path=search_path, on_draw=on_draw, flat=True,
+                       dump_format=dump_format, dump_file=dump_file,
+                       **run_opts)
+            return 0
 
         with open(input_file, "r") as f:
             char_stream = f.read()
 
-        interp(char_stream, dump=ast_switch, exceptions=except_switch)
-        sys.exit(0)
+        interp(char_stream, dump=ast_switch, exceptions=except_switch,
+               profile=opts.get("--profile"), snapshot=snapshot,
+               save_snapshot=opts.get("--save-snapshot"),
+               search_path=search_path, on_draw=on_draw,
+               dump_format=dump_format, dump_file=dump_file, check=check,
+               stats=stats, **run_opts)
+        if stats is not None:
+            stats.finish()
+            if "--stats-json" in opts:
+                import json
+                with open(opts["--stats-json"], "w") as f:
+                    json.dump(stats.as_dict(), f, indent=2)
+                    f.write("\n")
+            if "--stats-json" not in opts or "--stats" in opts:
+                stats.report()
+        return 0
 
     # CASE 2: NO FILE PROVIDED, INTERACTIVE MODE
     ########################################################
     print("CADL Interactive Mode (type 'exit' to quit)")
+    from cadl_interp_walk import CADLInterpWalk
     walker = CADLInterpWalk()
-    symtab.initialize()
+    if snapshot is None:
+        symtab.initialize()
+    else:
+        from cadl_snapshot import restore_snapshot
+        restore_snapshot(snapshot)
 
     while True:
         try:
@@ -84,6 +699,17 @@ if __name__ == "__main__":
 
             ast = parse(line)
             walker.visit(ast)
+            walker.finish()
+
+        except EOFError:
+            break
 
         except Exception as e:
-            print("error:", e)
\ No newline at end of file
+            print("error:", e)
+
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main(sys.argv[1:]))
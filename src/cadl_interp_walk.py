@@ -2,23 +2,90 @@
 CADL Interpreter Walker
 
 This interpreter is able to support the following
-- cat declarations
+- cat declarations, with prototypes (see cadl_proto)
 - trait assignment and access
 - mood override logic
 - RANDOMCAT generation
-- draw statements
+- draw statements, positioned draws onto a scene (see cadl_canvas)
+- module imports (see cadl_import)
+- litters, collections of cats with bulk assignment and where
+  clauses (see cadl_litter)
 """
 
 from cadl_symtab import symtab
-import random
 from cadl_ascii_render import render_cat
 
+# Traits a mood sets, in the order they are set.  An explicitly
+# assigned mouth is never overridden.
+MOOD_OVERRIDES = {
+    "sleepy":  (("ears", "droopy"), ("mouth", "neutral"), ("whiskers", "short")),
+    "happy":   (("mouth", "smile"), ("ears", "short"), ("whiskers", "long")),
+    "angry":   (("mouth", "scowl"), ("ears", "round"), ("whiskers", "curled")),
+    "loving":  (("mouth", "kiss"), ("ears", "pointy"), ("whiskers", "long")),
+    "curious": (("ears", "short"), ("mouth", None), ("whiskers", "long")),
+    "excited": (("mouth", "open"), ("ears", "long"), ("whiskers", "long")),
+    "sad":     (("mouth", "frown"), ("ears", "droopy"), ("whiskers", "short")),
+}
+
+# Trait options randomcat picks from
+RANDOM_TRAITS = {
+    "ears": ["pointy", "droopy", "round", "long", "short"],
+    "mouth": ["smile", "frown", "neutral", "open", "smirk"],
+    "body": ["smooth", "fluffy", "normal", "chubby"],
+    "tail": ["none", "fluffy", "straight", "curled"],
+    "whiskers": ["long", "short", "curled"],
+    "mood": ["happy", "sleepy", "excited", "loving", "curious", "angry"],
+}
+
+
+def draw_text(name, cat):
+    """
+    Text a draw statement prints for cat: the ASCII art followed by
+    the cat's ID as its name unless the ID is "noname".
+    """
+    if cat["traits"].__class__ is not dict:
+        # prototype-based cat, draw from its flat traits
+        from cadl_proto import flat_cat
+        cat = flat_cat(cat)
+    if name.lower() != "noname":
+        return render_cat(cat) + "\n" + name + "\n"
+    return render_cat(cat) + "\n"
+
+
+def is_node(value):
+    """
+    True if value is an AST node: a tuple, or a view of a node of a
+    flat AST (see cadl_flatast.FlatNode).
+    """
+    return isinstance(value, tuple) or hasattr(value, "as_tuple")
+
 
 class CADLInterpWalk:
 
-    def __init__(self):
+    def __init__(self, on_draw=None, search_path=None):
         self.return_flag = False
         self.return_value = None
+        # Optional callable on_draw(name, cat) that receives every drawn
+        # cat (after mood override) instead of it being printed.  If it
+        # has a scene(text) method, that receives the scene of the
+        # positioned draws (see finish) instead of it being printed too.
+        self.on_draw = on_draw
+        # Directories searched by import, and the module loader that is
+        # created on the first import (one session per walker)
+        self.search_path = search_path
+        self.modules = None
+        # scene canvas, created by the first positioned draw
+        self.canvas = None
+        # set once the program passed cadl_check, which makes the
+        # unquoted value checks below redundant
+        self.checked = False
+        # cadl_compile.Tier when running tiered, which compiles hot
+        # functions and loops
+        self.tier = None
+        # answer repeated calls of pure functions from a memo (see
+        # cadl_purity), created on the first call
+        self.memoize = True
+        self.memo = None
 
     # Mood Override
     ####################################################################
@@ -33,53 +100,103 @@ class CADLInterpWalk:
         if mood is None:
             return cat
 
-        mood = mood.lower()
-
-        if mood == "sleepy":
-            traits["ears"] = "droopy"
-            if not mouth_locked:
-                traits["mouth"] = "neutral"
-            traits["whiskers"] = "short"
-
-        elif mood == "happy":
-            if not mouth_locked:
-                traits["mouth"] = "smile"
-            traits["ears"] = "short"
-            traits["whiskers"] = "long"
-
-        elif mood == "angry":
-            if not mouth_locked:
-                traits["mouth"] = "scowl"
-            traits["ears"] = "round"
-            traits["whiskers"] = "curled"
-
-        elif mood == "loving":
-            if not mouth_locked:
-                traits["mouth"] = "kiss"
-            traits["ears"] = "pointy"
-            traits["whiskers"] = "long"
-
-        elif mood == "curious":
-            traits["ears"] = "short"
-            if not mouth_locked:
-                traits["mouth"] = None
-            traits["whiskers"] = "long"
-
-        elif mood == "excited":
-            if not mouth_locked:
-                traits["mouth"] = "open"
-            traits["ears"] = "long"
-            traits["whiskers"] = "long"
-        
-        elif mood == "sad":
-            if not mouth_locked:
-                traits["mouth"] = "frown"
-            traits["ears"] = "droopy"
-            traits["whiskers"] = "short"
-
+        for trait, value in MOOD_OVERRIDES.get(mood.lower(), ()):
+            if trait == "mouth" and mouth_locked:
+                continue
+            traits[trait] = value
 
         return cat
 
+    # Random Cats
+    ####################################################################
+    def random_cat(self):
+        """
+        Make a new cat with random traits.
+        """
+        # imported on first use, most programs never need an RNG
+        import random
+
+        choose_mood_mode = random.choice([True, False])
+
+        # Mode 1: No mood, all random traits
+        if not choose_mood_mode:
+            traits = {}
+            for t, options in RANDOM_TRAITS.items():
+                if t == "mood":
+                    continue
+                traits[t] = random.choice(options)
+            cat_obj = {"type": "cat", "traits": traits}
+
+        # Mode 2: Random mood, override, then fill remaining traits
+        else:
+            mood = random.choice(RANDOM_TRAITS["mood"])
+            traits = {"mood": mood}
+            cat_obj = {"type": "cat", "traits": traits}
+            cat_obj = self.apply_mood_override(cat_obj)
+
+            for t, options in RANDOM_TRAITS.items():
+                if t not in traits:
+                    traits[t] = random.choice(options)
+
+        return cat_obj
+
+    # Litters (see cadl_litter)
+    ####################################################################
+    def _lookup_litter(self, name):
+        litter = symtab.lookup(name)
+        if not (isinstance(litter, dict) and litter.get("type") == "litter"):
+            raise ValueError(f"{name} is not a litter, where needs a litter")
+        return litter
+
+    def _where(self, litter, cond):
+        """
+        Return the rows of litter matching a where clause.
+        """
+        from cadl_litter import select
+        _, op, (_, trait), expr = cond
+        return select(litter, trait, op, self.visit(expr))
+
+    def _draw_litter(self, litter, rows):
+        """
+        Draw the given rows of litter (all members by default).
+        """
+        from cadl_litter import member, store_member
+        names = litter["names"]
+        if rows is None:
+            rows = range(len(names))
+        for i in rows:
+            cat = self.apply_mood_override(member(litter, i))
+            store_member(litter, i, cat)
+            if self.on_draw is not None:
+                self.on_draw(names[i], cat)
+            else:
+                print(draw_text(names[i], cat), end="")
+
+    # Cat declarations
+    ####################################################################
+    def _traits(self, traits_list):
+        """
+        Evaluate the trait list of a cat declaration into a dict.
+        """
+        traits = {}
+
+        for trait_node in traits_list[1]:
+            # ('TRAIT', ('ID', tname), expr)
+            _, (_, tname), expr = trait_node
+
+            # prevent unquoted values
+            if not self.checked and isinstance(expr, tuple) \
+                    and expr[0] == "ID":
+                bad = expr[1]
+                raise ValueError(
+                    f"Trait value '{bad}' must be quoted.\n"
+                    f"Example: {tname} = \"{bad}\";"
+                )
+
+            traits[tname] = self.visit(expr)
+
+        return traits
+
     # Tuple AST Interpreter (used by cadl_fe.py)
     ###############################################################
     def visitTuple(self, node):
@@ -101,26 +218,24 @@ class CADLInterpWalk:
         if tag == "CATDECL":
             _, id_node, traits_list = node
             _, name = id_node
-            traits = {}
-
-            for trait_node in traits_list[1]:
-                # ('TRAIT', ('ID', tname), expr)
-                _, (_, tname), expr = trait_node
-
-                # prevent unquoted values
-                if isinstance(expr, tuple) and expr[0] == "ID":
-                    bad = expr[1]
-                    raise ValueError(
-                        f"Trait value '{bad}' must be quoted.\n"
-                        f"Example: {tname} = \"{bad}\";"
-                    )
-
-                traits[tname] = self.visit(expr)
-
-            cat_obj = {"type": "cat", "traits": traits}
+            cat_obj = {"type": "cat", "traits": self._traits(traits_list)}
             symtab.declare(name, cat_obj)
             return
 
+        # CATDECL_PROTO: cat with a prototype (see cadl_proto), only
+        # its own traits are stored
+        if tag == "CATDECL_PROTO":
+            _, id_node, (_, proto_name), traits_list = node
+            _, name = id_node
+            proto = symtab.lookup(proto_name)
+            if not (isinstance(proto, dict) and proto.get("type") == "cat"):
+                raise ValueError(
+                    f"cat {name}: prototype {proto_name} is not a cat"
+                )
+            from cadl_proto import derive
+            symtab.declare(name, derive(proto, self._traits(traits_list)))
+            return
+
         # CATDECL_SIMPLE
         if tag == "CATDECL_SIMPLE":
             _, id_node = node
@@ -133,11 +248,48 @@ class CADLInterpWalk:
             _, id_node = node
             _, name = id_node
             cat = symtab.lookup(name)
+            if cat["type"] == "litter":
+                self._draw_litter(cat, None)
+                return
+            cat = self.apply_mood_override(cat)
+            if self.on_draw is not None:
+                self.on_draw(name, cat)
+                return
+            print(draw_text(name, cat), end="")
+            return
+
+        # DRAW_WHERE: draw the litter members matching the condition
+        if tag == "DRAW_WHERE":
+            _, id_node, cond = node
+            _, name = id_node
+            litter = self._lookup_litter(name)
+            self._draw_litter(litter, self._where(litter, cond))
+            return
+
+        # DRAW_AT: place the cat on the scene canvas
+        if tag == "DRAW_AT":
+            _, id_node, x_expr, y_expr = node
+            _, name = id_node
+            x = self.visit(x_expr)
+            y = self.visit(y_expr)
+            # bools are ints to Python but not to CADL
+            if not (isinstance(x, int) and isinstance(y, int)
+                    and not isinstance(x, bool) and not isinstance(y, bool)
+                    and x >= 0 and y >= 0):
+                raise ValueError(
+                    f"draw {name} at: position must be two "
+                    f"non-negative integers, got {x!r}, {y!r}"
+                )
+            cat = symtab.lookup(name)
+            if cat["type"] == "litter":
+                raise ValueError(f"draw {name} at: cannot position a litter")
             cat = self.apply_mood_override(cat)
-            print(render_cat(cat))
-            # Print the cat's ID as its name unless ID is "noname"
-            if name.lower() != "noname":
-                print(name)
+            # a sink timing the draws (see cadl_stats) times this too
+            place = getattr(self.on_draw, "place", None)
+            if place is not None:
+                place(self.place, name, x, y, cat)
+            else:
+                self.place(name, x, y, cat)
             return
 
         # RANDOMCATDECL / ASSIGN_RANDOMCAT
@@ -145,37 +297,7 @@ class CADLInterpWalk:
             _, id_node = node
             _, name = id_node
             declare = (tag == "RANDOMCATDECL")
-
-            choose_mood_mode = random.choice([True, False])
-
-            all_traits = {
-                "ears": ["pointy", "droopy", "round", "long", "short"],
-                "mouth": ["smile", "frown", "neutral", "open", "smirk"],
-                "body": ["smooth", "fluffy", "normal", "chubby"],
-                "tail": ["none", "fluffy", "straight", "curled"],
-                "whiskers": ["long", "short", "curled"],
-                "mood": ["happy", "sleepy", "excited", "loving", "curious", "angry"],
-            }
-
-            # Mode 1: No mood, all random traits
-            if not choose_mood_mode:
-                traits = {}
-                for t, options in all_traits.items():
-                    if t == "mood":
-                        continue
-                    traits[t] = random.choice(options)
-                cat_obj = {"type": "cat", "traits": traits}
-
-            # Mode 2: Random mood, override, then fill remaining traits
-            else:
-                mood = random.choice(all_traits["mood"])
-                traits = {"mood": mood}
-                cat_obj = {"type": "cat", "traits": traits}
-                cat_obj = self.apply_mood_override(cat_obj)
-
-                for t, options in all_traits.items():
-                    if t not in traits:
-                        traits[t] = random.choice(options)
+            cat_obj = self.random_cat()
 
             if declare:
                 symtab.declare(name, cat_obj)
@@ -183,13 +305,47 @@ class CADLInterpWalk:
                 symtab.update(name, cat_obj)
             return
 
+        # LITTERDECL: litter of copies of existing cats
+        if tag == "LITTERDECL":
+            _, id_node, (_, members) = node
+            _, name = id_node
+            names = [m for (_, m) in members]
+            cats = []
+            for m in names:
+                cat = symtab.lookup(m)
+                if not (isinstance(cat, dict) and cat.get("type") == "cat"):
+                    raise ValueError(
+                        f"litter {name}: {m} is not a cat"
+                    )
+                cats.append(cat)
+            from cadl_litter import from_cats
+            symtab.declare(name, from_cats(names, cats))
+            return
+
+        # RANDOMLITTERDECL: litter of random cats
+        if tag == "RANDOMLITTERDECL":
+            _, id_node, count_expr = node
+            _, name = id_node
+            n = self.visit(count_expr)
+            if not isinstance(n, int) or n < 0:
+                raise ValueError(
+                    f"randomcat {name}[...]: size must be a "
+                    f"non-negative integer, got {n!r}"
+                )
+            from cadl_litter import from_cats
+            cats = [self.random_cat() for _ in range(n)]
+            names = [f"{name}[{i}]" for i in range(n)]
+            symtab.declare(name, from_cats(names, cats))
+            return
+
         # TRAITASSIGN
         if tag == "TRAITASSIGN":
             _, id_node, trait_node, expr = node
             _, catname = id_node
             _, traitname = trait_node
 
-            if isinstance(expr, tuple) and expr[0] == "ID":
+            if not self.checked and isinstance(expr, tuple) \
+                    and expr[0] == "ID":
                 bad = expr[1]
                 raise ValueError(
                     f"Trait value '{bad}' must be quoted.\n"
@@ -198,6 +354,10 @@ class CADLInterpWalk:
 
             value = self.visit(expr)
             cat = symtab.lookup(catname)
+            if cat["type"] == "litter":
+                from cadl_litter import assign
+                assign(cat, traitname, value)
+                return
             cat["traits"][traitname] = value
 
             if traitname == "mood":
@@ -206,12 +366,34 @@ class CADLInterpWalk:
             symtab.update(catname, cat)
             return
 
+        # TRAITASSIGN_WHERE: assign to the litter members matching
+        # the condition
+        if tag == "TRAITASSIGN_WHERE":
+            _, id_node, trait_node, expr, cond = node
+            _, name = id_node
+            _, traitname = trait_node
+
+            if not self.checked and isinstance(expr, tuple) \
+                    and expr[0] == "ID":
+                bad = expr[1]
+                raise ValueError(
+                    f"Trait value '{bad}' must be quoted.\n"
+                    f"Example: {traitname} = \"{bad}\";"
+                )
+
+            litter = self._lookup_litter(name)
+            rows = self._where(litter, cond)
+            from cadl_litter import assign
+            assign(litter, traitname, self.visit(expr), rows)
+            return
+
         # ASSIGN (non-cat variable assignment)
         if tag == "ASSIGN":
             _, id_node, expr = node
             _, name = id_node
 
-            if isinstance(expr, tuple) and expr[0] == "ID":
+            if not self.checked and isinstance(expr, tuple) \
+                    and expr[0] == "ID":
                 bad = expr[1]
                 raise ValueError(
                     f"Value '{bad}' must be quoted.\n"
@@ -232,10 +414,46 @@ class CADLInterpWalk:
         # WHILE
         if tag == "WHILE":
             _, expr, stmt = node
+            tier = self.tier
+            if tier is not None:
+                loop = tier.loop(node)
+                if loop is not None:
+                    loop()
+                    return
             while self.visit(expr):
                 self.visit(stmt)
                 if self.return_flag:
                     break
+                if tier is not None:
+                    loop = tier.back_edge(node)
+                    if loop is not None:
+                        # hot, the compiled loop runs the rest
+                        loop()
+                        break
+            return
+
+        # REPEAT: counted loop, the count is evaluated once and the
+        # iterations run as a plain Python range loop
+        if tag == "REPEAT":
+            _, expr, stmt = node
+            count = self.visit(expr)
+            if not isinstance(count, int) or isinstance(count, bool):
+                raise ValueError(
+                    f"repeat count must be an integer, got {count!r}"
+                )
+            visit = self.visit
+            tier = self.tier
+            body = None if tier is None else tier.loop(node)
+            for _ in range(count):
+                if body is not None:
+                    body()
+                else:
+                    visit(stmt)
+                if self.return_flag:
+                    break
+                if body is None and tier is not None:
+                    # once hot, the compiled body runs the rest
+                    body = tier.back_edge(node)
             return
 
         # IF
@@ -243,7 +461,7 @@ class CADLInterpWalk:
             _, expr, then_stmt, else_stmt = node
             if self.visit(expr):
                 self.visit(then_stmt)
-            elif isinstance(else_stmt, tuple) and else_stmt[0] != "NIL":
+            elif is_node(else_stmt) and else_stmt[0] != "NIL":
                 self.visit(else_stmt)
             return
 
@@ -253,6 +471,15 @@ class CADLInterpWalk:
             self.visit(sl)
             return
 
+        # IMPORT
+        if tag == "IMPORT":
+            _, path_node = node
+            if self.modules is None:
+                from cadl_import import ModuleLoader
+                self.modules = ModuleLoader(self.search_path)
+            self.modules.import_into_scope(self.visit(path_node), self)
+            return
+
         # FUNDECL
         if tag == "FUNDECL":
             _, id_node, params_list, body = node
@@ -291,7 +518,13 @@ class CADLInterpWalk:
             _, id_node, trait_node = node
             _, catname = id_node
             _, traitname = trait_node
-            return symtab.lookup(catname)["traits"][traitname]
+            cat = symtab.lookup(catname)
+            if cat["type"] == "litter":
+                raise ValueError(
+                    f"{catname}.{traitname}: a litter has no single "
+                    f"trait value"
+                )
+            return cat["traits"][traitname]
 
         if tag == "NOT":
             _, expr = node
@@ -308,17 +541,44 @@ class CADLInterpWalk:
     # Function Call Helper
     ####################################################################
     def _call_function_by_name(self, name, args_list):
-        func = symtab.lookup(name)
-        if not isinstance(func, tuple) or func[0] != "FUNDECL":
-            raise RuntimeError(f"{name} is not a function")
-
-        _, _, params_list, body = func
+        func = self._lookup_function(name)
 
         if args_list[0] == "LIST":
             arg_values = [self.visit(a) for a in args_list[1]]
         else:
             arg_values = []
 
+        return self._call_function(func, arg_values)
+
+    def _lookup_function(self, name):
+        func = symtab.lookup(name)
+        if not is_node(func) or func[0] != "FUNDECL":
+            raise RuntimeError(f"{name} is not a function")
+        return func
+
+    def _call_function(self, func, arg_values):
+        memo = self.memo
+        if memo is None:
+            if not self.memoize:
+                return self._run_function(func, arg_values)
+            from cadl_purity import Memo
+            memo = self.memo = Memo()
+        key = memo.key(func, arg_values)
+        if key is None:
+            return self._run_function(func, arg_values)
+        result = memo.get(key, func)
+        if result is memo.MISS:
+            result = self._run_function(func, arg_values)
+            memo.put(key, func, result)
+        else:
+            # the state a call leaves behind
+            self.return_flag = False
+            self.return_value = None
+        return result
+
+    def _run_function(self, func, arg_values):
+        _, _, params_list, body = func
+
         param_names = [p[1] for p in params_list[1]]
 
         symtab.push_scope()
@@ -329,7 +589,11 @@ class CADLInterpWalk:
         self.return_flag = False
         self.return_value = None
 
-        self.visit(body)
+        compiled = None if self.tier is None else self.tier.function(func)
+        if compiled is not None:
+            compiled()
+        else:
+            self.visit(body)
 
         result = self.return_value
         self.return_flag = False    # clear return state after the call
@@ -337,10 +601,48 @@ class CADLInterpWalk:
         symtab.pop_scope()
         return result
 
+    # Scene output
+    ####################################################################
+    def place(self, name, x, y, cat):
+        """
+        Put cat on the scene canvas with its top left corner at
+        column x, row y.
+        """
+        if self.canvas is None:
+            from cadl_canvas import Canvas
+            self.canvas = Canvas()
+        try:
+            self.canvas.blit(x, y, draw_text(name, cat))
+        except ValueError as e:
+            raise ValueError(f"draw {name} at: {e}")
+
+    def finish(self):
+        """
+        Print the scene built by positioned draws, if any, or pass it
+        to the on_draw sink.  Called once the program (or REPL input)
+        has run.
+        """
+        if self.canvas is not None:
+            compose = getattr(self.on_draw, "compose", None)
+            if compose is not None:
+                text = compose(self.canvas.render)
+            else:
+                text = self.canvas.render()
+            self.canvas = None
+            scene = getattr(self.on_draw, "scene", None)
+            if scene is not None:
+                scene(text)
+            else:
+                print(text)
+
     # Dispatcher
     ####################################################################
     def visit(self, node):
         if isinstance(node, tuple):
             return self.visitTuple(node)
+        if hasattr(node, "as_tuple"):
+            # a node of a flat AST, run as its tag and children, which
+            # are views of the flat AST in turn
+            return self.visitTuple(node.as_tuple())
 
         raise RuntimeError("Unknown node type passed to interpreter")
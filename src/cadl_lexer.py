@@ -8,6 +8,7 @@ token object (type, value).
 '''
 
 import re
+from itertools import islice
 
 token_specs = [
 #   type:          value:
@@ -22,8 +23,13 @@ token_specs = [
     ('RANDOMCAT',  r'randomcat'),
     ('RETURN',     r'return'),    
     ('WHILE',      r'while'),
+    ('REPEAT',     r'repeat\b'),
     ('IF',         r'if'),
     ('ELSE',       r'else'),
+    ('IMPORT',     r'import\b'),
+    ('AT',         r'at\b'),
+    ('LITTER',     r'litter\b'),
+    ('WHERE',      r'where\b'),
     # Operators
     ('EQ',         r'=='),
     ('NOTEQ',      r'!='),
@@ -35,8 +41,11 @@ token_specs = [
     ('RPAREN',     r'\)'),
     ('LCURLY',     r'{'),
     ('RCURLY',     r'}'),
+    ('LBRACKET',   r'\['),
+    ('RBRACKET',   r'\]'),
     ('SEMI',       r';'),
     ('COMMA',      r','),
+    ('COLON',      r':'),
     # Literals
     ('STRING',     r'"[^"]*"'),
     ('INTEGER',    r'[0-9]+'),
@@ -48,37 +57,210 @@ token_specs = [
 # used for sanity checking in lexer.
 token_types = set(type for (type,_) in token_specs)
 
+# token types the lexer drops on the floor
+ignored_types = frozenset(['WHITESPACE','COMMENT'])
+
+# the master pattern is built and compiled once at import time
+# instead of on every call to tokenize
+token_re = re.compile('|'.join('(?P<{}>{})'.format(type,regex)
+                               for (type,regex) in token_specs))
+
+# bytes version of the master pattern for memory-mapped sources,
+# compiled on first use.  A mapped source keeps its \r\n or \r line
+# ends, which reading it as text turns into \n, so there they are
+# whitespace too and end comments
+token_bytes_re = None
+mapped_specs = {'COMMENT': r'//[^\r\n]*', 'WHITESPACE': r'[ \t\r\n]+'}
+
 class Token:
-    def __init__(self,type,value):
+    # programs have millions of tokens, no per-token __dict__
+    __slots__ = ('type','value','line','col')
+
+    def __init__(self,type,value,line=0,col=0):
         self.type = type
         self.value = value
+        # source position of the first character of the token
+        self.line = line
+        self.col = col
 
     def __str__(self):
         return 'Token({},{})'.format(self.type,self.value)
 
-def tokenize(code):
+class MappedToken(Token):
+    """
+    Token that only remembers where its text is in the source buffer;
+    the value is decoded from the buffer when someone asks for it.
+    """
+    __slots__ = ('buf','start','end')
+
+    def __init__(self,type,buf,start,end,line=0,col=0):
+        self.type = type
+        self.buf = buf
+        self.start = start
+        self.end = end
+        self.line = line
+        self.col = col
+
+    @property
+    def value(self):
+        value = self.buf[self.start:self.end].decode('utf-8')
+        if '\r' in value:
+            # a string across lines, as reading the source as text has it
+            value = value.replace('\r\n', '\n').replace('\r', '\n')
+        return value
+
+def tokenize(code, diagnostics=None):
+    """
+    List of the tokens of code.  Unexpected characters raise a
+    ValueError, or, given a diagnostics list, are skipped and recorded
+    there as (line, col, message) so lexing can carry on.
+    """
     tokens = []
-    re_list = ['(?P<{}>{})'.format(type,re) for (type,re) in token_specs]
-    combined_re = '|'.join(re_list)
-    match_object_list = list(re.finditer(combined_re, code))
+    match_object_list = list(token_re.finditer(code))
+    line = 1
+    line_start = 0
     for mo in match_object_list:
         type = mo.lastgroup
         value = mo.group()
-        if type in ['WHITESPACE','COMMENT']:
-            continue #ignore
+        if type in ignored_types:
+            pass #ignore
         elif type == 'UNKNOWN':
-            raise ValueError("unexpected character '{}'".format(value))
+            if diagnostics is None:
+                raise ValueError("unexpected character '{}' at line {}"
+                                 .format(value, line))
+            diagnostics.append((line, mo.start() - line_start + 1,
+                                "unexpected character '{}'".format(value)))
         else:
-            tokens.append(Token(type, value))
-    tokens.append(Token('EOF', r'\eof'))
+            tokens.append(Token(type, value, line, mo.start() - line_start + 1))
+        # keep track of line numbers, newlines only appear in
+        # whitespace and (unterminated) string tokens
+        nl = value.count('\n')
+        if nl:
+            line += nl
+            line_start = mo.start() + value.rfind('\n') + 1
+    tokens.append(Token('EOF', r'\eof', line, len(code) - line_start + 1))
     return tokens
 
+def tokenize_file(f, chunk_size=1 << 16, diagnostics=None):
+    """
+    Generator version of tokenize that reads the source from the file
+    object f in chunks of chunk_size characters.  Only the unconsumed
+    tail of the current chunk is kept around, so memory does not grow
+    with the size of the file.  diagnostics as for tokenize.
+    """
+    buf = ''
+    base = 0        # offset of buf[0] in the whole source
+    line = 1
+    line_start = 0
+    eof = False
+    while True:
+        if not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
+        pos = 0
+        for mo in token_re.finditer(buf):
+            type = mo.lastgroup
+            value = mo.group()
+            # a match that runs into the end of the buffer, or a lone
+            # quote, may continue in the next chunk - lex it again then
+            if not eof and (mo.end() == len(buf) or
+                            (type == 'UNKNOWN' and value == '"')):
+                break
+            pos = mo.end()
+            if type in ignored_types:
+                pass #ignore
+            elif type == 'UNKNOWN':
+                if diagnostics is None:
+                    raise ValueError("unexpected character '{}' at line {}"
+                                     .format(value, line))
+                diagnostics.append((line, base + mo.start() - line_start + 1,
+                                    "unexpected character '{}'"
+                                    .format(value)))
+            else:
+                yield Token(type, value, line,
+                            base + mo.start() - line_start + 1)
+            nl = value.count('\n')
+            if nl:
+                line += nl
+                line_start = base + mo.start() + value.rfind('\n') + 1
+        buf = buf[pos:]
+        base += pos
+        if eof:
+            yield Token('EOF', r'\eof', line, base - line_start + 1)
+            return
+
+def tokenize_mmap(buf, diagnostics=None):
+    """
+    Generator of MappedTokens for a UTF-8 source held in a bytes-like
+    object, typically the mmap returned by map_file.  The source is
+    never copied into a str; only whitespace (for line counting) and
+    the values the parser asks for are copied out of the buffer.
+    Columns are byte offsets.  diagnostics as for tokenize.
+    """
+    global token_bytes_re
+    if token_bytes_re is None:
+        token_bytes_re = re.compile('|'.join(
+            '(?P<{}>{})'.format(type, mapped_specs.get(type, regex))
+            for (type, regex) in token_specs).encode())
+    line = 1
+    line_start = 0
+    for mo in token_bytes_re.finditer(buf):
+        type = mo.lastgroup
+        start, end = mo.span()
+        if type in ignored_types:
+            pass #ignore
+        elif type == 'UNKNOWN':
+            char = buf[start:end].decode('utf-8', 'replace')
+            if diagnostics is None:
+                raise ValueError("unexpected character '{}' at line {}"
+                                 .format(char, line))
+            diagnostics.append((line, start - line_start + 1,
+                                "unexpected character '{}'".format(char)))
+        else:
+            yield MappedToken(type, buf, start, end, line,
+                              start - line_start + 1)
+        if type == 'WHITESPACE' or type == 'STRING':
+            text = buf[start:end]
+            nl = text.count(b'\n')
+            last = text.rfind(b'\n')
+            if b'\r' in text:
+                # \r\n is one line end, a lone \r another
+                nl += text.count(b'\r') - text.count(b'\r\n')
+                last = max(last, text.rfind(b'\r'))
+            if nl:
+                line += nl
+                line_start = start + last + 1
+    yield Token('EOF', r'\eof', line, len(buf) - line_start + 1)
+
+def map_file(path):
+    """
+    Memory-map the file at path read-only for tokenize_mmap.  Pages
+    come straight from the page cache, so processes mapping the same
+    file share them.  Returns b'' for an empty file, which cannot be
+    mapped.
+    """
+    import mmap
+    with open(path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b''
+
 class Lexer:
-    def __init__(self, input_string):
-        self.tokens = tokenize(input_string)
+    def __init__(self, input_string, diagnostics=None):
+        # with a diagnostics list the lexer is tolerant, see tokenize
+        self.tokens = tokenize(input_string, diagnostics)
         # the following is always valid because we will always have
         # at least the EOF token on the tokens list.
         self.curr_token_ix = 0
+        # optional map id(stmt node) -> source line, filled in by the
+        # parser when source positions are requested (see cadl_fe.parse)
+        self.lines = None
+        # unexpected characters and syntax errors as (line, col,
+        # message), the parser records the latter in any case (see
+        # cadl_ll1._recover)
+        self.diagnostics = diagnostics
 
     def pointer(self):
         return self.tokens[self.curr_token_ix]
@@ -88,6 +270,22 @@ class Lexer:
             self.curr_token_ix += 1
         return self.pointer()
 
+    def peek(self):
+        # token after the current one, EOF if there is none
+        ix = min(self.curr_token_ix + 1, len(self.tokens) - 1)
+        return self.tokens[ix]
+
+    def rest(self):
+        # iterator over the tokens after the current one, for a parser
+        # that takes them off itself (see cadl_ll1); seek then makes
+        # the token it stopped at the current one
+        return islice(self.tokens, self.curr_token_ix + 1, None)
+
+    def seek(self, tk, rest):
+        # make tk, taken off rest (from the rest method), the current
+        # token, the tokens left in rest follow it
+        self.curr_token_ix = self.tokens.index(tk, self.curr_token_ix)
+
     def match(self, token_type):
         if token_type == self.pointer().type:
             tk = self.pointer()
@@ -105,6 +303,53 @@ class Lexer:
         else:
             return False
 
+class StreamLexer(Lexer):
+    """
+    Lexer over a token iterator (e.g. tokenize_file) that only keeps
+    the current and the lookahead token in memory.  diagnostics is the
+    list the token iterator records unexpected characters in, if any.
+    """
+
+    def __init__(self, token_iter, diagnostics=None):
+        self.token_iter = token_iter
+        self.lines = None
+        self.diagnostics = diagnostics
+        self.curr = next(token_iter)
+        self.ahead = None
+
+    def pointer(self):
+        return self.curr
+
+    def next(self):
+        if not self.end_of_file():
+            if self.ahead is None:
+                self.curr = next(self.token_iter)
+            else:
+                self.curr = self.ahead
+                self.ahead = None
+        return self.curr
+
+    def peek(self):
+        if self.end_of_file():
+            return self.curr
+        if self.ahead is None:
+            self.ahead = next(self.token_iter)
+        return self.ahead
+
+    def rest(self):
+        if self.ahead is not None:
+            return _prepend(self.ahead, self.token_iter)
+        return self.token_iter
+
+    def seek(self, tk, rest):
+        self.curr = tk
+        self.ahead = None
+        self.token_iter = rest
+
+def _prepend(tk, it):
+    yield tk
+    yield from it
+
 # test lexer
 if __name__ == "__main__":
 
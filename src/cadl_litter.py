@@ -0,0 +1,110 @@
+"""
+Litters: collections of cats with bulk trait operations
+
+    litter L = [Miso, Luna];        // copies of existing cats
+    randomcat L[1000];              // 1000 random cats
+    L.mood = "happy";               // assign to every member
+    L.tail = "curled" where mood == "happy";
+    draw L;                         // draw every member
+    draw L where ears != "round";
+
+A litter is stored column-wise, one list per trait,
+
+    {"type": "litter",
+     "names": ["Miso", "Luna"],
+     "traits": {"mood": ["happy", "sleepy"], "ears": [None, "long"]}}
+
+so a bulk assignment replaces or patches a single list and a where
+clause is one scan over one column, instead of a statement per cat.
+None marks a trait the member does not have; in particular a mouth
+that is None does not stop a mood from setting the mouth, the way an
+explicitly assigned mouth does for a single cat.
+"""
+
+from cadl_interp_walk import MOOD_OVERRIDES
+
+
+def from_cats(names, cats):
+    """
+    Build a litter from copies of the traits of cats.
+    """
+    columns = {}
+    n = len(cats)
+    for i, cat in enumerate(cats):
+        for trait, value in cat["traits"].items():
+            column = columns.get(trait)
+            if column is None:
+                column = columns[trait] = [None] * n
+            column[i] = value
+    return {"type": "litter", "names": list(names), "traits": columns}
+
+
+def select(litter, trait, op, value):
+    """
+    Return the rows whose trait compares EQ or NOTEQ to value.
+    """
+    column = litter["traits"].get(trait)
+    if column is None:
+        column = [None] * len(litter["names"])
+    if op == "EQ":
+        return [i for i, v in enumerate(column) if v == value]
+    return [i for i, v in enumerate(column) if v != value]
+
+
+def assign(litter, trait, value, rows=None):
+    """
+    Set trait to value for the given rows (all members by default),
+    applying the mood override when the mood changes.
+    """
+    columns = litter["traits"]
+    n = len(litter["names"])
+    column = columns.get(trait)
+    if column is None:
+        column = columns[trait] = [None] * n
+
+    if rows is None:
+        column[:] = [value] * n
+    else:
+        for i in rows:
+            column[i] = value
+
+    if trait != "mood" or value is None:
+        return
+    for t, v in MOOD_OVERRIDES.get(value.lower(), ()):
+        target = columns.get(t)
+        if target is None:
+            target = columns[t] = [None] * n
+        if t == "mouth":
+            # only members without a mouth of their own
+            for i in (range(n) if rows is None else rows):
+                if target[i] is None:
+                    target[i] = v
+        elif rows is None:
+            target[:] = [v] * n
+        else:
+            for i in rows:
+                target[i] = v
+
+
+def member(litter, i):
+    """
+    Return member i as a stand-alone cat object (a copy).
+    """
+    traits = {}
+    for trait, column in litter["traits"].items():
+        if column[i] is not None:
+            traits[trait] = column[i]
+    return {"type": "cat", "traits": traits}
+
+
+def store_member(litter, i, cat):
+    """
+    Write the traits of cat back into row i.
+    """
+    columns = litter["traits"]
+    n = len(litter["names"])
+    for trait, value in cat["traits"].items():
+        column = columns.get(trait)
+        if column is None:
+            column = columns[trait] = [None] * n
+        column[i] = value
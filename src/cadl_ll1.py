@@ -0,0 +1,1082 @@
+"""
+Table-driven LL(1) parser for CADL
+
+The parser behind cadl_fe.parse and cadl_fe.iter_stmts.  Instead of
+one Python function per grammar rule it is driven by a predictive
+parse table and an explicit stack, so the depth of nesting in a
+program is only limited by memory and not by the Python recursion
+limit.
+
+GRAMMAR below is the grammar of CADL, left factored (e.g. ID ASSIGN
+RANDOMCAT vs. ID ASSIGN exp) and with repetitions written as right
+recursive tail rules.  docs/CADLGrammar.txt is generated from it
+(python cadl_ll1.py > ../docs/CADLGrammar.txt in src/).  Every
+production carries a semantic action that builds a value from the
+values of its right hand side.  Only the tokens in VALUE_TOKENS have
+a value (the token itself), punctuation and keywords have none, and
+neither has a nonterminal whose action is None.  A Reduce in a right
+hand side is a mid-rule action: it replaces the values on top of the
+value stack, which lets tail rules add to a list or fold an operator
+chain as they go instead of once at the end.  The actions build the
+tuple AST, rows_with_actions swaps them for others (see cadl_flatast).
+
+The FIRST sets and the parse table are computed from GRAMMAR once, at
+import time.  Building the table is most of that, so it is generated
+into cadl_ll1_table (python cadl_ll1.py --table > cadl_ll1_table.py)
+and only decoded at import time, unless GRAMMAR has changed since.
+Like a recursive descent parser, a nonterminal with an empty
+(nullable) production takes it on any token that does not start one
+of its other productions, so optional parts need no FOLLOW sets and
+the dangling else binds to the nearest if.
+
+A table entry does as much as it can right away: it eats the run of
+terminals its production starts with, applies an action whose values
+are all known by then, and is expanded in place of a leading
+nonterminal for the same token.  What is left is pushed as ops that
+match a terminal, reduce and expand a nonterminal in one step each,
+see build_table.
+
+A syntax error does not end the parse: it is recorded in the token
+stream's diagnostics, the statement it is in is skipped (panic mode,
+see _recover) and the rest is parsed for more errors, by a second loop
+that only checks the syntax (_check).  The loop building the AST does
+nothing extra for that until the first error.
+"""
+
+from cadl_lexer import ignored_types, token_types
+
+
+#########################################################################
+# semantic actions
+
+def same(value):
+    # pass the single value of the right hand side on, needs no
+    # reduce step at all
+    return value
+
+class Reduce:
+    """
+    Mid-rule action: replace the top n values with action(*values).
+    """
+    def __init__(self, action, n):
+        self.action = action
+        self.n = n
+
+def _program(sl):
+    return ('STMTLIST', sl)
+
+def _stmt_cat(id_tk, suffix):
+    name = ('ID', id_tk.value)
+    if suffix is None:
+        return ('CATDECL_SIMPLE', name)
+    if suffix.__class__ is list:
+        return ('CATDECL', name, ('LIST', suffix))
+    return ('CATDECL_PROTO', name, suffix[0], ('LIST', suffix[1]))
+
+def _proto(tk, traits):
+    return (('ID', tk.value), traits)
+
+def _fundecl(id_tk, f):
+    return ('FUNDECL', ('ID', id_tk.value), f[0], f[1])
+
+def _func_suffix(params, body):
+    return (('LIST', params), body)
+
+def _return(e):
+    return ('RETURN', e)
+
+def _nil():
+    return ('NIL',)
+
+def _no_body():
+    # a cat declared without traits, cat Miso;
+    return None
+
+def _while(e, s):
+    return ('WHILE', e, s)
+
+def _repeat(e, s):
+    return ('REPEAT', e, s)
+
+def _if(e, s1, s2):
+    return ('IF', e, s1, s2)
+
+def _block(sl):
+    return ('BLOCK', ('STMTLIST', sl))
+
+def _import(tk):
+    return ('IMPORT', ('STRING', tk.value))
+
+def _litter(id_tk, ids):
+    return ('LITTERDECL', ('ID', id_tk.value), ('LIST', ids))
+
+# the suffixes of draw and randomcat get the ID token before them and
+# make the statement
+def _draw(id_tk):
+    return ('DRAW', ('ID', id_tk.value))
+
+def _draw_where(id_tk, cond):
+    return ('DRAW_WHERE', ('ID', id_tk.value), cond)
+
+def _draw_at(id_tk, x, y):
+    return ('DRAW_AT', ('ID', id_tk.value), x, y)
+
+def _randomcat(id_tk):
+    return ('RANDOMCATDECL', ('ID', id_tk.value))
+
+def _random_litter(id_tk, size):
+    return ('RANDOMLITTERDECL', ('ID', id_tk.value), size)
+
+# statements starting with an ID, the actions get the ID token
+def _trait_assign(id_tk, trait_tk, e):
+    return ('TRAITASSIGN', ('ID', id_tk.value), ('ID', trait_tk.value), e)
+
+def _trait_assign_where(id_tk, trait_tk, e, cond):
+    return ('TRAITASSIGN_WHERE', ('ID', id_tk.value),
+            ('ID', trait_tk.value), e, cond)
+
+def _assign(id_tk, e):
+    return ('ASSIGN', ('ID', id_tk.value), e)
+
+def _assign_random(id_tk):
+    return ('ASSIGN_RANDOMCAT', ('ID', id_tk.value))
+
+def _call_stmt(id_tk, args):
+    return ('CALLSTMT', ('ID', id_tk.value), ('LIST', args))
+
+def _where(trait_tk, op, e):
+    return ('WHERE', op.type, ('ID', trait_tk.value), e)
+
+def _id(tk):
+    return ('ID', tk.value)
+
+def _integer(tk):
+    return ('INTEGER', int(tk.value))
+
+def _string(tk):
+    return ('STRING', tk.value)
+
+def _not(e):
+    return ('NOT', e)
+
+def _attr(name, trait_tk):
+    return ('ATTR', name, ('ID', trait_tk.value))
+
+def _call(name, args):
+    return ('CALLEXP', name, ('LIST', args))
+
+def _binop(e, op, rhs):
+    return (op.type, e, rhs)
+
+def _first_trait(id_tk, e):
+    return [('TRAIT', ('ID', id_tk.value), e)]
+
+def _add_trait(lst, id_tk, e):
+    lst.append(('TRAIT', ('ID', id_tk.value), e))
+    return lst
+
+def _first_id(tk):
+    return [('ID', tk.value)]
+
+def _add_id(lst, tk):
+    lst.append(('ID', tk.value))
+    return lst
+
+def _first(value):
+    return [value]
+
+def _append(lst, value):
+    lst.append(value)
+    return lst
+
+NEW_LIST = Reduce(list, 0)
+APPEND = Reduce(_append, 2)
+
+
+#########################################################################
+# the grammar
+#
+# (lhs, rhs, action): uppercase symbols are token types, lowercase
+# symbols nonterminals.  action is called with the values of the
+# right hand side symbols.  The first rule is the start rule.
+
+# tokens whose value the actions need
+VALUE_TOKENS = frozenset(['ID', 'STRING', 'INTEGER', 'EQ', 'NOTEQ'])
+
+GRAMMAR = [
+    # lists are plain python lists here, the actions using them wrap
+    # them up as ('LIST', ...) or ('STMTLIST', ...)
+    ('program',        ['stmt_list'],                 _program),
+    ('stmt_list',      [NEW_LIST, 'stmts'],           same),
+    ('stmts',          ['stmt', APPEND, 'stmts'],     None),
+    ('stmts',          [],                            None),
+
+    ('stmt',           ['CAT', 'ID', 'cat_suffix'],   _stmt_cat),
+    ('stmt',           ['FUNC', 'ID', 'func_suffix'], _fundecl),
+    ('stmt',           ['DRAW', 'ID', 'draw_suffix', 'semi'],
+                                                      same),
+    ('stmt',           ['RANDOMCAT', 'ID', 'random_size', 'semi'],
+                                                      same),
+    ('stmt',           ['ID', 'id_suffix', 'semi'],   same),
+    ('stmt',           ['RETURN', 'return_value', 'semi'],
+                                                      _return),
+    ('stmt',           ['WHILE', 'LPAREN', 'exp', 'RPAREN', 'stmt'],
+                                                      _while),
+    ('stmt',           ['REPEAT', 'LPAREN', 'exp', 'RPAREN', 'stmt'],
+                                                      _repeat),
+    ('stmt',           ['IF', 'LPAREN', 'exp', 'RPAREN', 'stmt',
+                        'else_part'],                 _if),
+    ('stmt',           ['LCURLY', 'stmt_list', 'RCURLY'],
+                                                      _block),
+    ('stmt',           ['IMPORT', 'STRING', 'semi'],  _import),
+    ('stmt',           ['LITTER', 'ID', 'ASSIGN', 'LBRACKET', 'id_list',
+                        'RBRACKET', 'semi'],          _litter),
+
+    ('semi',           ['SEMI'],                      None),
+    ('semi',           [],                            None),
+
+    ('cat_suffix',     ['LCURLY', 'trait_list', 'RCURLY'],
+                                                      same),
+    ('cat_suffix',     ['SEMI'],                      _no_body),
+    ('cat_suffix',     ['COLON', 'ID', 'proto_body'], _proto),
+    ('proto_body',     ['LCURLY', 'trait_list', 'RCURLY'],
+                                                      same),
+    ('proto_body',     ['SEMI'],                      list),
+
+    ('func_suffix',    ['LPAREN', 'id_list', 'RPAREN', 'stmt'],
+                                                      _func_suffix),
+
+    # draw_suffix, random_size and id_suffix turn the ID token before
+    # them into the statement
+    ('draw_suffix',    ['AT', 'exp', 'COMMA', 'exp', Reduce(_draw_at, 3)],
+                                                      None),
+    ('draw_suffix',    ['where', Reduce(_draw_where, 2)],
+                                                      None),
+    ('draw_suffix',    [Reduce(_draw, 1)],            None),
+
+    ('random_size',    ['LBRACKET', 'exp', 'RBRACKET',
+                        Reduce(_random_litter, 2)],   None),
+    ('random_size',    [Reduce(_randomcat, 1)],       None),
+
+    ('return_value',   ['exp'],                       same),
+    ('return_value',   [],                            _nil),
+
+    ('else_part',      ['ELSE', 'stmt'],              same),
+    ('else_part',      [],                            _nil),
+
+    ('id_list',        ['ID', Reduce(_first_id, 1), 'id_tail'],
+                                                      same),
+    ('id_list',        [],                            list),
+    ('id_tail',        ['COMMA', 'ID', Reduce(_add_id, 2), 'id_tail'],
+                                                      None),
+    ('id_tail',        [],                            None),
+
+    ('trait_list',     ['ID', 'ASSIGN', 'exp', 'semi',
+                        Reduce(_first_trait, 2), 'traits'],
+                                                      same),
+    ('traits',         ['ID', 'ASSIGN', 'exp', 'semi',
+                        Reduce(_add_trait, 3), 'traits'],
+                                                      None),
+    ('traits',         [],                            None),
+
+    ('where',          ['WHERE', 'ID', 'where_op', 'exp'],
+                                                      _where),
+    ('where_op',       ['EQ'],                        same),
+    ('where_op',       ['NOTEQ'],                     same),
+
+    ('id_suffix',      ['DOT', 'ID', 'ASSIGN', 'exp', 'trait_where'],
+                                                      None),
+    ('id_suffix',      ['ASSIGN', 'assign_rhs'],      None),
+    ('id_suffix',      ['LPAREN', 'args', 'RPAREN', Reduce(_call_stmt, 2)],
+                                                      None),
+    ('assign_rhs',     ['RANDOMCAT', Reduce(_assign_random, 1)],
+                                                      None),
+    ('assign_rhs',     ['exp', Reduce(_assign, 2)],   None),
+    ('trait_where',    ['where', Reduce(_trait_assign_where, 4)],
+                                                      None),
+    ('trait_where',    [Reduce(_trait_assign, 3)],    None),
+
+    ('exp',            ['primary', 'eq_tail'],        same),
+    ('eq_tail',        ['EQ', 'primary', Reduce(_binop, 3), 'eq_tail'],
+                                                      None),
+    ('eq_tail',        ['NOTEQ', 'primary', Reduce(_binop, 3), 'eq_tail'],
+                                                      None),
+    ('eq_tail',        [],                            None),
+
+    ('primary',        ['INTEGER'],                   _integer),
+    ('primary',        ['STRING'],                    _string),
+    ('primary',        ['ID', Reduce(_id, 1), 'primary_suffix'],
+                                                      same),
+    ('primary',        ['LPAREN', 'exp', 'RPAREN'],   same),
+    ('primary',        ['NOT', 'primary'],            _not),
+    # primary_suffix turns the ID before it into an attribute or call
+    ('primary_suffix', ['DOT', 'ID', Reduce(_attr, 2)],
+                                                      None),
+    ('primary_suffix', ['LPAREN', 'args', 'RPAREN', Reduce(_call, 2)],
+                                                      None),
+    ('primary_suffix', [],                            None),
+
+    ('args',           ['exp', Reduce(_first, 1), 'args_tail'],
+                                                      same),
+    ('args',           [],                            list),
+    ('args_tail',      ['COMMA', 'exp', APPEND, 'args_tail'],
+                                                      None),
+    ('args_tail',      [],                            None),
+]
+
+# messages for nonterminals that fail with something more helpful
+# than a plain syntax error
+ERRORS = {
+    'trait_list': "trait_list: expected trait at {}",
+    'proto_body': "cat_suffix: syntax error at {}",
+    'where_op':   "where: expected == or != at {}",
+    'assign_rhs': "exp: syntax error at {}",
+}
+
+def with_actions(grammar, actions):
+    """
+    grammar with every action, mid-rule ones included, replaced by
+    actions.get(action, action), for a parser building something else
+    than tuples (see cadl_flatast.parse_flat).
+    """
+    def swap(sym):
+        if sym.__class__ is Reduce:
+            return Reduce(actions.get(sym.action, sym.action), sym.n)
+        return sym
+    return [(lhs, [swap(sym) for sym in rhs], actions.get(action, action))
+            for (lhs, rhs, action) in grammar]
+
+
+#########################################################################
+# parse table construction
+
+def first_sets(grammar):
+    """
+    Return (FIRST, NULLABLE): the token types each nonterminal can
+    start with, and the set of nonterminals that can derive nothing.
+    """
+    nonterms = {lhs for (lhs, _, _) in grammar}
+    first = {nt: set() for nt in nonterms}
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs, _ in grammar:
+            f = first[lhs]
+            n = len(f)
+            for sym in rhs:
+                if sym.__class__ is Reduce:
+                    continue
+                if sym not in nonterms:
+                    f.add(sym)
+                    break
+                f |= first[sym]
+                if sym not in nullable:
+                    break
+            else:
+                if lhs not in nullable:
+                    nullable.add(lhs)
+                    changed = True
+            if len(f) != n:
+                changed = True
+    return ({nt: frozenset(f) for (nt, f) in first.items()},
+            frozenset(nullable))
+
+def rhs_first(rhs, first, nullable):
+    """
+    FIRST set of a sequence of symbols, and whether it is nullable.
+    """
+    f = set()
+    for sym in rhs:
+        if sym.__class__ is Reduce:
+            continue
+        if sym not in first:
+            f.add(sym)
+            return f, False
+        f |= first[sym]
+        if sym not in nullable:
+            return f, False
+    return f, True
+
+# terminal modes of an op
+MATCH = 1       # the terminal must come next
+KEEP = 2        # and its value is needed
+OPTIONAL = 3    # it may come next, skipped if it does
+END = 4         # never matches, the end of the parse
+
+# action of the op at the end of a statement whose line is recorded,
+# unless that is the action making the statement; the number of
+# values of such an op is -1 - n, see parse_nonterm
+_STMT_END = object()
+
+def build_table(grammar, lines=False):
+    """
+    Build the parse table for grammar.
+
+    Returns (names, first, rows): the nonterminals in the order they
+    first appear, their FIRST sets, and for every nonterminal a row
+    mapping each token type to the entry for the production to use on
+    it, None where it is a syntax error.  Under the key None a row
+    holds the name of its nonterminal, for error messages.
+
+    An entry is (eat, run, now, ops, op, mark).  eat is how the current
+    token, the first terminal of the production, is eaten (0 if the
+    production does not start with one, see MATCH and KEEP), run holds
+    (token type, keep) for the terminals after it, which are matched
+    and eaten right away, their values pushed if keep is set.  now is
+    a reduce (action, number of values) to apply right after that,
+    e.g. the whole action of a production that has no values but those
+    of its run.  op is the first op for the rest of the right hand
+    side, run right away, ops the others, pushed on the parse stack
+    last first.
+
+    An op is (terminal, mode, action, n, row) and does, in that order
+    and each part only if set: match terminal (see MATCH etc.),
+    replace the top n values with action(*values) and expand the
+    nonterminal with that row.  The right hand side is cut into as few
+    ops as that order allows, e.g. the RCURLY of a block and the
+    action building it make one op.
+
+    A production that starts with a nonterminal has that expanded in
+    place for the same token, so e.g. exp on a STRING goes down to
+    primary and eats the string in a single step, and so is a
+    nonterminal with a single, nullable production after a run (the
+    statement list of a block).  A nonterminal that is either a
+    terminal or nothing, with no value, is an OPTIONAL terminal.  With
+    lines, statement entries end with an op that records the line of
+    the statement and have mark set, see parse_nonterm.
+    """
+    names = []
+    for lhs, _, _ in grammar:
+        if lhs not in names:
+            names.append(lhs)
+    code = {nt: i for (i, nt) in enumerate(names)}
+    first, nullable = first_sets(grammar)
+    # nonterminals without a value
+    silent = {lhs for (lhs, _, action) in grammar if action is None}
+
+    # nonterminals that are an optional terminal
+    productions = {nt: [rhs for (lhs, rhs, _) in grammar if lhs == nt]
+                   for nt in names}
+    optional = {}
+    for nt, alternatives in productions.items():
+        if (nt in silent and len(alternatives) == 2
+                and sorted(map(len, alternatives)) == [0, 1]):
+            t = max(alternatives, key=len)[0]
+            if t not in code and t not in VALUE_TOKENS:
+                optional[nt] = t
+
+    rows = [{} for _ in names]
+
+    def symbol_op(sym):
+        # the op for a single symbol, as a dict of its parts
+        if sym.__class__ is Reduce:
+            return {'reduce': (sym.action, sym.n)}
+        if sym in optional:
+            return {'term': (optional[sym], OPTIONAL)}
+        if sym in code:
+            return {'nt': sym}
+        return {'term': (sym, KEEP if sym in VALUE_TOKENS else MATCH)}
+
+    order = ('term', 'reduce', 'nt')
+
+    def fuse(ops):
+        # merge neighbouring ops whose parts come in op order
+        out = []
+        for op in ops:
+            if out and (max(order.index(k) for k in out[-1])
+                        < min(order.index(k) for k in op)):
+                out[-1] = dict(out[-1], **op)
+            else:
+                out.append(op)
+        return out
+
+    compiled = []
+    for lhs, rhs, action in grammar:
+        if (lhs in silent) != (action is None):
+            raise ValueError("{}: either all or no productions need "
+                             "an action".format(lhs))
+        # values on the stack after the right hand side
+        nvalues = 0
+        for sym in rhs:
+            if sym.__class__ is Reduce:
+                nvalues -= sym.n - 1
+            elif (sym in VALUE_TOKENS
+                  or (sym in code and sym not in silent)):
+                nvalues += 1
+        if action is same and nvalues != 1:
+            raise ValueError("{}: same needs exactly one value"
+                             .format(lhs))
+        symbols = list(rhs)
+        if action is not None and action is not same:
+            symbols.append(Reduce(action, nvalues))
+        if lines and lhs == 'stmt':
+            # the end of statement op, merged into the action that
+            # makes the statement if there is one
+            if symbols[-1].__class__ is Reduce:
+                last = symbols.pop()
+                symbols.append(Reduce(last.action, -1 - last.n))
+            else:
+                symbols.append(Reduce(_STMT_END, -1))
+
+        run = []
+        i = 0
+        while (i < len(symbols) and symbols[i].__class__ is str
+               and symbols[i] not in code):
+            run.append((symbols[i], symbols[i] in VALUE_TOKENS))
+            i += 1
+        now = None
+        if (run or not symbols or symbols[0].__class__ is Reduce) and \
+                i < len(symbols) and symbols[i].__class__ is Reduce and \
+                symbols[i].n >= 0:
+            now = (symbols[i].action, symbols[i].n)
+            i += 1
+        ops = fuse([symbol_op(sym) for sym in symbols[i:]])
+        compiled.append((lhs, rhs, (tuple(run), now, ops,
+                                    lines and lhs == 'stmt')))
+
+    def make_op(op):
+        term, mode = op.get('term', (None, 0))
+        action, n = op.get('reduce', (None, 0))
+        nt = op.get('nt')
+        return (term, mode, action, n, None if nt is None else rows[code[nt]])
+
+    # entries with the ops still as dicts, leading nonterminals are
+    # expanded below
+    raw = [{} for _ in names]
+    defaults = [None] * len(names)
+    for lhs, rhs, entry in compiled:
+        row = raw[code[lhs]]
+        f, empty = rhs_first(rhs, first, nullable)
+        for t in f:
+            if t in row:
+                raise ValueError("grammar is not LL(1): {} has two "
+                                 "productions for {}".format(lhs, t))
+            row[t] = entry
+        if empty:
+            if defaults[code[lhs]] is not None:
+                raise ValueError("grammar is not LL(1): {} has two "
+                                 "empty productions".format(lhs))
+            defaults[code[lhs]] = entry
+
+    # the entry of each nonterminal with a single, nullable production:
+    # it takes that on every token
+    constant = {}
+    for lhs, rhs, entry in compiled:
+        if lhs in nullable and len(productions[lhs]) == 1:
+            constant[lhs] = entry
+
+    def expand(entry, t):
+        run, now, ops, mark = entry
+        if not ops or list(ops[0]) != ['nt']:
+            return entry
+        nt = ops[0]['nt']
+        if run or now is not None:
+            # t is eaten by then, only a constant entry can be expanded
+            inner = constant.get(nt)
+            if (inner is None or inner[0]
+                    or (now is not None and inner[1] is not None)):
+                return entry
+        else:
+            inner = raw[code[nt]].get(t)
+            if inner is None:
+                return entry
+            inner = expand(inner, t)
+        inner_run, inner_now, inner_ops, inner_mark = inner
+        return (run or inner_run, inner_now if now is None else now,
+                fuse(list(inner_ops) + list(ops[1:])), mark or inner_mark)
+
+    def make_entry(entry):
+        run, now, ops, mark = entry
+        ops = [make_op(op) for op in reversed(ops)]
+        # the first op is not pushed, it runs right away
+        first = ops.pop() if ops else None
+        # the first terminal of the run is the token the entry is
+        # picked by, it needs no check
+        eat = 0
+        if run:
+            eat = KEEP if run[0][1] else MATCH
+        entry = (eat, run[1:], now, tuple(ops), first, mark)
+        return EMPTY if entry == EMPTY else entry
+
+    # a nullable nonterminal takes its empty production on every token
+    # that starts no other, so its row has an entry for every token
+    # type; ops refer to the rows, which exist (empty) by now
+    types = sorted(token_types - {'UNKNOWN'} - ignored_types) + ['EOF']
+    for nt, row in enumerate(raw):
+        entries = {}
+        default = None
+        if defaults[nt] is not None:
+            default = make_entry(defaults[nt])
+        for t in types:
+            if t in row:
+                entries[t] = make_entry(expand(row[t], t))
+            elif default is not None:
+                entries[t] = default
+        entries[None] = names[nt]
+        rows[nt].update(entries)
+    return names, first, rows
+
+# entry of an empty production with nothing to do
+EMPTY = (0, (), None, (), None, False)
+
+def grammar_key(grammar):
+    """
+    String that changes with anything build_table makes the table of
+    grammar from, bar build_table itself.
+    """
+    def name(action):
+        return None if action is None else action.__name__
+    return repr(([(lhs, [(name(sym.action), sym.n)
+                         if sym.__class__ is Reduce else sym
+                         for sym in rhs], name(action))
+                  for (lhs, rhs, action) in grammar],
+                 sorted(VALUE_TOKENS), sorted(token_types)))
+
+def encode_table(grammar, names, first, rows):
+    """
+    A table built by build_table in the form of cadl_ll1_table.TABLE:
+    plain data, with actions by name and rows by number.
+    """
+    import builtins
+    code = {id(row): i for (i, row) in enumerate(rows)}
+    actions = []
+    entries = []
+    entry_ix = {}
+
+    def action_ix(action):
+        name = action.__name__
+        if (globals().get(name) is not action
+                and getattr(builtins, name, None) is not action):
+            raise ValueError("action {} is not a global of cadl_ll1"
+                             .format(name))
+        if name not in actions:
+            actions.append(name)
+        return actions.index(name)
+
+    def op(o):
+        term, mode, action, n, row = o
+        return (term, mode, None if action is None else action_ix(action),
+                n, None if row is None else code[id(row)])
+
+    def entry(e):
+        if id(e) not in entry_ix:
+            eat, run, now, ops, first_op, mark = e
+            if now is not None:
+                now = (action_ix(now[0]), now[1])
+            entry_ix[id(e)] = len(entries)
+            entries.append((eat, run, now, tuple(map(op, ops)),
+                            None if first_op is None else op(first_op),
+                            mark))
+        return entry_ix[id(e)]
+
+    return (grammar_key(grammar), names,
+            {nt: sorted(f) for (nt, f) in first.items()},
+            actions, entries,
+            [{t: entry(e) for (t, e) in row.items() if t is not None}
+             for row in rows])
+
+def decode_table(table, actions=None):
+    """
+    (names, first, rows) of a table encoded by encode_table, with every
+    action replaced by actions.get(action, action) if actions are given
+    (see rows_with_actions).
+    """
+    import builtins
+    _, names, first, action_names, entries, row_entries = table
+    funcs = [globals().get(name) or getattr(builtins, name)
+             for name in action_names]
+    if actions is not None:
+        funcs = [actions.get(f, f) for f in funcs]
+    rows = [{} for _ in names]
+
+    def op(o):
+        term, mode, action, n, row = o
+        return (term, mode, None if action is None else funcs[action],
+                n, None if row is None else rows[row])
+
+    decoded = []
+    for eat, run, now, ops, first_op, mark in entries:
+        if now is not None:
+            now = (funcs[now[0]], now[1])
+        e = (eat, run, now, tuple(map(op, ops)),
+             None if first_op is None else op(first_op), mark)
+        decoded.append(EMPTY if e == EMPTY else e)
+    # ops refer to the rows made above, fill them in place
+    for nt, row in enumerate(row_entries):
+        rows[nt].update((t, decoded[i]) for (t, i) in row.items())
+        rows[nt][None] = names[nt]
+    return names, {nt: frozenset(f) for (nt, f) in first.items()}, rows
+
+# the table generated into cadl_ll1_table, unless GRAMMAR has changed
+# since; decoding it is several times faster than building it
+try:
+    from cadl_ll1_table import TABLE as _table
+except ImportError:
+    _table = None
+if _table is not None and _table[0] != grammar_key(GRAMMAR):
+    _table = None
+
+if _table is not None:
+    NAMES, FIRST, ROWS = decode_table(_table)
+else:
+    NAMES, FIRST, ROWS = build_table(GRAMMAR)
+CODE = {nt: i for (i, nt) in enumerate(NAMES)}
+
+def rows_with_actions(actions):
+    """
+    The rows of the table with every action, mid-rule ones included,
+    replaced by actions.get(action, action), for a parser building
+    something else than tuples (see cadl_flatast.parse_flat).
+    """
+    if _table is not None:
+        return decode_table(_table, actions)[2]
+    return build_table(with_actions(GRAMMAR, actions))[2]
+
+# the rows recording statement lines, built on first use (see
+# lines_rows), only --check and --profile need them
+_lines_rows = None
+
+def lines_rows():
+    global _lines_rows
+    if _lines_rows is None:
+        _lines_rows = build_table(GRAMMAR, lines=True)[2]
+    return _lines_rows
+
+# the op under all others, ends the parse
+_END_OP = ('<end>', END, None, 0, None)
+
+# token types a statement can start with
+STMT_FIRST = FIRST['stmt']
+
+
+#########################################################################
+# the parser
+
+def _error(row, tk):
+    name = row[None]
+    msg = ERRORS.get(name, name + ": syntax error at {}")
+    return SyntaxError(msg.format(tk.value))
+
+def parse_nonterm(stream, start, lines=None, rows=None):
+    """
+    Parse one start (a nonterminal name) from the token stream
+    and return its value.  With a lines dictionary, record the
+    source line of every statement node (see cadl_fe.parse).  rows
+    are those of a table built from the grammar with other actions
+    (see with_actions), ROWS by default.
+    """
+    if rows is None:
+        rows = ROWS if lines is None else lines_rows()
+    tk = stream.pointer()
+    tokens = stream.rest()
+    advance = tokens.__next__
+    stack = [_END_OP]
+    op = (None, 0, None, 0, rows[CODE[start]])
+    pop = stack.pop
+    extend = stack.extend
+    values = []
+    push = values.append
+    pop_value = values.pop
+    # first lines of the statements being parsed
+    stmt_lines = []
+
+    try:
+        while True:
+            term, mode, action, n, row = op
+
+            if term is not None:
+                if tk.type == term:
+                    if mode == KEEP:
+                        push(tk)
+                    tk = advance()
+                elif mode != OPTIONAL:
+                    if mode == END:
+                        break
+                    # pending: the ops of the statement left to do,
+                    # besides those on the stack, see _recover
+                    pending = (op,)
+                    stream.seek(tk, tokens)
+                    stream.match(term)      # raises the syntax error
+
+            if action is not None:
+                if n == 1:
+                    values[-1] = action(values[-1])
+                elif n == 2:
+                    last = pop_value()
+                    values[-1] = action(values[-1], last)
+                elif n == 3:
+                    last = pop_value()
+                    middle = pop_value()
+                    values[-1] = action(values[-1], middle, last)
+                elif n < 0:
+                    # end of statement, reduce the n = -1 - n values
+                    # making it, if any, and record its line
+                    if action is not _STMT_END:
+                        n = -1 - n
+                        args = values[-n:]
+                        del values[-n:]
+                        push(action(*args))
+                    lines[id(values[-1])] = stmt_lines.pop()
+                else:
+                    args = values[-n:]
+                    del values[-n:]
+                    push(action(*args))
+
+            if row is not None:
+                # nonterminal, expand with the entry the table picks
+                entry = row.get(tk.type)
+                if entry is not EMPTY:
+                    if entry is None:
+                        pending = ()
+                        raise _error(row, tk)
+                    eat, run, now, ops, op, mark = entry
+                    if mark:
+                        stmt_lines.append(tk.line)
+                    if eat:
+                        if eat == KEEP:
+                            push(tk)
+                        tk = advance()
+                        for t, keep in run:
+                            if tk.type != t:
+                                pending = ops + (op,)
+                                stream.seek(tk, tokens)
+                                stream.match(t)
+                            if keep:
+                                push(tk)
+                            tk = advance()
+                    if now is not None:
+                        action, n = now
+                        if n == 1:
+                            values[-1] = action(values[-1])
+                        elif n == 0:
+                            push(action())
+                        else:
+                            args = values[-n:]
+                            del values[-n:]
+                            push(action(*args))
+                    if ops:
+                        extend(ops)
+                    if op is not None:
+                        continue
+            op = pop()
+    except SyntaxError as e:
+        # carry on to the end without building values, see _check
+        tk = _check(stream, tk, tokens, stack, pending, e)
+        values = [None]
+    finally:
+        stream.seek(tk, tokens)
+
+    return values[0]
+
+def _check(stream, tk, tokens, stack, pending, error):
+    """
+    Recover from error (see _recover) and parse the rest of the
+    nonterminal parse_nonterm was parsing like it does, but only
+    checking the syntax: the values are of no use any more once there
+    is an error.  Every further error is recovered from the same way.
+    Returns the token after the nonterminal.
+    """
+    advance = tokens.__next__
+    pop = stack.pop
+    extend = stack.extend
+    while True:
+        tk, op = _recover(stream, tk, tokens, stack, pending, error)
+        try:
+            while True:
+                term, mode, _, _, row = op
+                if term is not None:
+                    if tk.type == term:
+                        tk = advance()
+                    elif mode != OPTIONAL:
+                        if mode == END:
+                            return tk
+                        pending = (op,)
+                        stream.seek(tk, tokens)
+                        stream.match(term)
+                if row is not None:
+                    entry = row.get(tk.type)
+                    if entry is not EMPTY:
+                        if entry is None:
+                            pending = ()
+                            raise _error(row, tk)
+                        eat, run, _, ops, op, _ = entry
+                        if eat:
+                            tk = advance()
+                            for t, _ in run:
+                                if tk.type != t:
+                                    pending = ops + (op,)
+                                    stream.seek(tk, tokens)
+                                    stream.match(t)
+                                tk = advance()
+                        if ops:
+                            extend(ops)
+                        if op is not None:
+                            continue
+                op = pop()
+        except SyntaxError as e:
+            error = e
+
+def _recover(stream, tk, tokens, stack, pending, error):
+    """
+    Panic-mode error recovery: record error, raised on token tk, in
+    stream.diagnostics and skip the statement it is in, the innermost
+    one in a statement list.  Its ops are dropped from the stack and
+    tokens up to and including the next SEMI, or up to the RCURLY
+    closing the block the statement is in, whichever comes first.  A
+    {...} group of the statement itself (a cat, func, while, ... body),
+    including one the error is in, is dropped as a whole and ends the
+    statement.  Without a statement list, e.g. for a top-level
+    statement of iter_stmts, the parse ends there.
+
+    pending are the ops of the statement left to do that are not on
+    the stack.  Returns (token, op) to go on with.
+    """
+    stream.diagnostics.append((tk.line, tk.col, str(error)))
+    # all ops left, the last one next, and the one going on with the
+    # statement list after the statement
+    ops = stack + [o for o in pending if o is not None]
+    i = len(ops) - 1
+    while i > 0 and (ops[i][4] is None or ops[i][4][None] != 'stmts'):
+        i -= 1
+    if i > 0:
+        op = (None, 0, None, 0, ops[i][4])
+    else:
+        op = _END_OP
+    del stack[max(i, 1):]
+    # the braces the statement opened are those of the RCURLY still
+    # to come
+    depth = 0
+    for o in ops[i + 1:]:
+        if o[0] == 'RCURLY':
+            depth += 1
+    advance = tokens.__next__
+    while True:
+        t = tk.type
+        if t == 'EOF':
+            break
+        if t == 'LCURLY':
+            depth += 1
+        elif t == 'RCURLY':
+            if depth == 0:
+                break
+            depth -= 1
+            if depth == 0:
+                tk = advance()
+                break
+        elif t == 'SEMI' and depth == 0:
+            tk = advance()
+            break
+        tk = advance()
+    return tk, op
+
+def _stray(token_stream):
+    # a token no statement starts with, e.g. a stray }, is reported
+    # and dropped
+    tk = token_stream.pointer()
+    token_stream.diagnostics.append(
+        (tk.line, tk.col, "parse: syntax error at {}".format(tk.value)))
+    token_stream.next()
+
+# top-level driver, see cadl_fe.parse
+#
+# Returns the program, or None if there were syntax errors; they are
+# in token_stream.diagnostics then.  rows are passed on to
+# parse_nonterm.
+def parse(token_stream, lines=None, rows=None):
+    if token_stream.diagnostics is None:
+        token_stream.diagnostics = []
+    token_stream.lines = lines
+    program = parse_nonterm(token_stream, 'program', lines, rows)
+    while not token_stream.end_of_file():
+        _stray(token_stream)
+        parse_nonterm(token_stream, 'stmt_list', None, rows)
+    if token_stream.diagnostics:
+        return None
+    return program
+
+# statement-at-a-time driver, see cadl_fe.iter_stmts
+#
+# Once there is a syntax error (or unexpected character) in
+# token_stream.diagnostics the rest is parsed for more errors, but no
+# statement is yielded any more.
+def iter_stmts(token_stream):
+    if token_stream.diagnostics is None:
+        token_stream.diagnostics = []
+    diagnostics = token_stream.diagnostics
+    while True:
+        t = token_stream.pointer().type
+        if t in STMT_FIRST:
+            s = parse_nonterm(token_stream, 'stmt', token_stream.lines)
+            if not diagnostics:
+                yield s
+        elif t == 'EOF':
+            return
+        else:
+            _stray(token_stream)
+
+#########################################################################
+# the grammar as text, see docs/CADLGrammar.txt
+
+def grammar_text(grammar=GRAMMAR):
+    """
+    The productions of grammar in the notation of docs/CADLGrammar.txt,
+    each with the tokens it is picked on.
+    """
+    first, nullable = first_sets(grammar)
+    out = []
+    names = []
+    for lhs, _, _ in grammar:
+        if lhs not in names:
+            names.append(lhs)
+    for nt in names:
+        lines = []
+        for lhs, rhs, _ in grammar:
+            if lhs != nt:
+                continue
+            f, _ = rhs_first(rhs, first, nullable)
+            symbols = [sym for sym in rhs if sym.__class__ is str]
+            if symbols:
+                lines.append("{{{}}} {}".format(",".join(sorted(f)),
+                                                " ".join(symbols)))
+            else:
+                lines.append("/* empty */")
+        head = "# {} : ".format(nt)
+        out.append(head + ("\n#" + " " * (len(head) - 3) + "| ")
+                   .join(lines))
+    return "\n\n".join(out) + "\n"
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["--table"]:
+        import pprint
+        print("""\
+# Generated from GRAMMAR in cadl_ll1.py, the parse table build_table
+# makes of it (see encode_table), by
+#
+#     python cadl_ll1.py --table > cadl_ll1_table.py
+#
+# Do not edit.  A table of another grammar is ignored.
+""")
+        print("TABLE = " + pprint.pformat(
+            encode_table(GRAMMAR, *build_table(GRAMMAR)), width=79))
+        sys.exit()
+
+    print("""\
+========================
+CADL Grammar
+========================
+
+Generated from GRAMMAR in src/cadl_ll1.py, the table the parser is
+built from, by
+
+    python cadl_ll1.py > ../docs/CADLGrammar.txt
+
+The grammar is LL(1) and left factored, repetitions are right
+recursive tail rules.  {...} are the tokens a production is picked
+on; a nonterminal takes its /* empty */ production on any other
+token, so a semi (SEMI) may always be left out and else binds to the
+nearest if.
+""")
+    print(grammar_text(), end="")
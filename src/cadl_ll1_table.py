@@ -0,0 +1,1025 @@
+# Generated from GRAMMAR in cadl_ll1.py, the parse table build_table
+# makes of it (see encode_table), by
+#
+#     python cadl_ll1.py --table > cadl_ll1_table.py
+#
+# Do not edit.  A table of another grammar is ignored.
+
+TABLE = ("([('program', ['stmt_list'], '_program'), ('stmt_list', [('list', 0), "
+ "'stmts'], 'same'), ('stmts', ['stmt', ('_append', 2), 'stmts'], None), "
+ "('stmts', [], None), ('stmt', ['CAT', 'ID', 'cat_suffix'], '_stmt_cat'), "
+ "('stmt', ['FUNC', 'ID', 'func_suffix'], '_fundecl'), ('stmt', ['DRAW', "
+ "'ID', 'draw_suffix', 'semi'], 'same'), ('stmt', ['RANDOMCAT', 'ID', "
+ "'random_size', 'semi'], 'same'), ('stmt', ['ID', 'id_suffix', 'semi'], "
+ "'same'), ('stmt', ['RETURN', 'return_value', 'semi'], '_return'), ('stmt', "
+ "['WHILE', 'LPAREN', 'exp', 'RPAREN', 'stmt'], '_while'), ('stmt', "
+ "['REPEAT', 'LPAREN', 'exp', 'RPAREN', 'stmt'], '_repeat'), ('stmt', ['IF', "
+ "'LPAREN', 'exp', 'RPAREN', 'stmt', 'else_part'], '_if'), ('stmt', "
+ "['LCURLY', 'stmt_list', 'RCURLY'], '_block'), ('stmt', ['IMPORT', 'STRING', "
+ "'semi'], '_import'), ('stmt', ['LITTER', 'ID', 'ASSIGN', 'LBRACKET', "
+ "'id_list', 'RBRACKET', 'semi'], '_litter'), ('semi', ['SEMI'], None), "
+ "('semi', [], None), ('cat_suffix', ['LCURLY', 'trait_list', 'RCURLY'], "
+ "'same'), ('cat_suffix', ['SEMI'], '_no_body'), ('cat_suffix', ['COLON', "
+ "'ID', 'proto_body'], '_proto'), ('proto_body', ['LCURLY', 'trait_list', "
+ "'RCURLY'], 'same'), ('proto_body', ['SEMI'], 'list'), ('func_suffix', "
+ "['LPAREN', 'id_list', 'RPAREN', 'stmt'], '_func_suffix'), ('draw_suffix', "
+ "['AT', 'exp', 'COMMA', 'exp', ('_draw_at', 3)], None), ('draw_suffix', "
+ "['where', ('_draw_where', 2)], None), ('draw_suffix', [('_draw', 1)], "
+ "None), ('random_size', ['LBRACKET', 'exp', 'RBRACKET', ('_random_litter', "
+ "2)], None), ('random_size', [('_randomcat', 1)], None), ('return_value', "
+ "['exp'], 'same'), ('return_value', [], '_nil'), ('else_part', ['ELSE', "
+ "'stmt'], 'same'), ('else_part', [], '_nil'), ('id_list', ['ID', "
+ "('_first_id', 1), 'id_tail'], 'same'), ('id_list', [], 'list'), ('id_tail', "
+ "['COMMA', 'ID', ('_add_id', 2), 'id_tail'], None), ('id_tail', [], None), "
+ "('trait_list', ['ID', 'ASSIGN', 'exp', 'semi', ('_first_trait', 2), "
+ "'traits'], 'same'), ('traits', ['ID', 'ASSIGN', 'exp', 'semi', "
+ "('_add_trait', 3), 'traits'], None), ('traits', [], None), ('where', "
+ "['WHERE', 'ID', 'where_op', 'exp'], '_where'), ('where_op', ['EQ'], "
+ "'same'), ('where_op', ['NOTEQ'], 'same'), ('id_suffix', ['DOT', 'ID', "
+ "'ASSIGN', 'exp', 'trait_where'], None), ('id_suffix', ['ASSIGN', "
+ "'assign_rhs'], None), ('id_suffix', ['LPAREN', 'args', 'RPAREN', "
+ "('_call_stmt', 2)], None), ('assign_rhs', ['RANDOMCAT', ('_assign_random', "
+ "1)], None), ('assign_rhs', ['exp', ('_assign', 2)], None), ('trait_where', "
+ "['where', ('_trait_assign_where', 4)], None), ('trait_where', "
+ "[('_trait_assign', 3)], None), ('exp', ['primary', 'eq_tail'], 'same'), "
+ "('eq_tail', ['EQ', 'primary', ('_binop', 3), 'eq_tail'], None), ('eq_tail', "
+ "['NOTEQ', 'primary', ('_binop', 3), 'eq_tail'], None), ('eq_tail', [], "
+ "None), ('primary', ['INTEGER'], '_integer'), ('primary', ['STRING'], "
+ "'_string'), ('primary', ['ID', ('_id', 1), 'primary_suffix'], 'same'), "
+ "('primary', ['LPAREN', 'exp', 'RPAREN'], 'same'), ('primary', ['NOT', "
+ "'primary'], '_not'), ('primary_suffix', ['DOT', 'ID', ('_attr', 2)], None), "
+ "('primary_suffix', ['LPAREN', 'args', 'RPAREN', ('_call', 2)], None), "
+ "('primary_suffix', [], None), ('args', ['exp', ('_first', 1), 'args_tail'], "
+ "'same'), ('args', [], 'list'), ('args_tail', ['COMMA', 'exp', ('_append', "
+ "2), 'args_tail'], None), ('args_tail', [], None)], ['EQ', 'ID', 'INTEGER', "
+ "'NOTEQ', 'STRING'], ['ASSIGN', 'AT', 'CAT', 'COLON', 'COMMA', 'COMMENT', "
+ "'DOT', 'DRAW', 'ELSE', 'EQ', 'FUNC', 'ID', 'IF', 'IMPORT', 'INTEGER', "
+ "'LBRACKET', 'LCURLY', 'LITTER', 'LPAREN', 'NOT', 'NOTEQ', 'RANDOMCAT', "
+ "'RBRACKET', 'RCURLY', 'REPEAT', 'RETURN', 'RPAREN', 'SEMI', 'STRING', "
+ "'UNKNOWN', 'WHERE', 'WHILE', 'WHITESPACE'])",
+ ['program',
+  'stmt_list',
+  'stmts',
+  'stmt',
+  'semi',
+  'cat_suffix',
+  'proto_body',
+  'func_suffix',
+  'draw_suffix',
+  'random_size',
+  'return_value',
+  'else_part',
+  'id_list',
+  'id_tail',
+  'trait_list',
+  'traits',
+  'where',
+  'where_op',
+  'id_suffix',
+  'assign_rhs',
+  'trait_where',
+  'exp',
+  'eq_tail',
+  'primary',
+  'primary_suffix',
+  'args',
+  'args_tail'],
+ {'args': ['ID', 'INTEGER', 'LPAREN', 'NOT', 'STRING'],
+  'args_tail': ['COMMA'],
+  'assign_rhs': ['ID', 'INTEGER', 'LPAREN', 'NOT', 'RANDOMCAT', 'STRING'],
+  'cat_suffix': ['COLON', 'LCURLY', 'SEMI'],
+  'draw_suffix': ['AT', 'WHERE'],
+  'else_part': ['ELSE'],
+  'eq_tail': ['EQ', 'NOTEQ'],
+  'exp': ['ID', 'INTEGER', 'LPAREN', 'NOT', 'STRING'],
+  'func_suffix': ['LPAREN'],
+  'id_list': ['ID'],
+  'id_suffix': ['ASSIGN', 'DOT', 'LPAREN'],
+  'id_tail': ['COMMA'],
+  'primary': ['ID', 'INTEGER', 'LPAREN', 'NOT', 'STRING'],
+  'primary_suffix': ['DOT', 'LPAREN'],
+  'program': ['CAT',
+              'DRAW',
+              'FUNC',
+              'ID',
+              'IF',
+              'IMPORT',
+              'LCURLY',
+              'LITTER',
+              'RANDOMCAT',
+              'REPEAT',
+              'RETURN',
+              'WHILE'],
+  'proto_body': ['LCURLY', 'SEMI'],
+  'random_size': ['LBRACKET'],
+  'return_value': ['ID', 'INTEGER', 'LPAREN', 'NOT', 'STRING'],
+  'semi': ['SEMI'],
+  'stmt': ['CAT',
+           'DRAW',
+           'FUNC',
+           'ID',
+           'IF',
+           'IMPORT',
+           'LCURLY',
+           'LITTER',
+           'RANDOMCAT',
+           'REPEAT',
+           'RETURN',
+           'WHILE'],
+  'stmt_list': ['CAT',
+                'DRAW',
+                'FUNC',
+                'ID',
+                'IF',
+                'IMPORT',
+                'LCURLY',
+                'LITTER',
+                'RANDOMCAT',
+                'REPEAT',
+                'RETURN',
+                'WHILE'],
+  'stmts': ['CAT',
+            'DRAW',
+            'FUNC',
+            'ID',
+            'IF',
+            'IMPORT',
+            'LCURLY',
+            'LITTER',
+            'RANDOMCAT',
+            'REPEAT',
+            'RETURN',
+            'WHILE'],
+  'trait_list': ['ID'],
+  'trait_where': ['WHERE'],
+  'traits': ['ID'],
+  'where': ['WHERE'],
+  'where_op': ['EQ', 'NOTEQ']},
+ ['_program',
+  'list',
+  '_append',
+  '_stmt_cat',
+  '_fundecl',
+  '_if',
+  '_import',
+  '_block',
+  '_litter',
+  '_repeat',
+  '_return',
+  '_while',
+  '_proto',
+  '_no_body',
+  '_func_suffix',
+  '_draw',
+  '_draw_at',
+  '_draw_where',
+  '_where',
+  '_randomcat',
+  '_random_litter',
+  '_nil',
+  '_id',
+  '_integer',
+  '_not',
+  '_string',
+  '_first_id',
+  '_add_id',
+  '_first_trait',
+  '_add_trait',
+  '_call_stmt',
+  '_assign',
+  '_assign_random',
+  '_trait_assign',
+  '_trait_assign_where',
+  '_binop',
+  '_attr',
+  '_call',
+  '_first'],
+ [(0, (), None, ((None, 0, 0, 1, None),), (None, 0, None, 0, 1), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), ((None, 0, 0, 1, None),), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), (1, 0), (), (None, 0, None, 0, 2), False),
+  (0, (), None, (), None, False),
+  (1,
+   (('ID', True),),
+   None,
+   ((None, 0, 2, 2, 2), (None, 0, 3, 2, None)),
+   (None, 0, None, 0, 5),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   (('SEMI', 3, 2, 2, 2),),
+   (None, 0, None, 0, 8),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   ((None, 0, 2, 2, 2), (None, 0, 4, 2, None)),
+   (None, 0, None, 0, 7),
+   False),
+  (2, (), None, (('SEMI', 3, 2, 2, 2),), (None, 0, None, 0, 18), False),
+  (1,
+   (('LPAREN', False),),
+   None,
+   ((None, 0, 2, 2, 2),
+    (None, 0, 5, 3, None),
+    (None, 0, None, 0, 11),
+    ('RPAREN', 1, None, 0, 3)),
+   (None, 0, None, 0, 21),
+   False),
+  (1,
+   (('STRING', True),),
+   None,
+   ((None, 0, 2, 2, 2),),
+   ('SEMI', 3, 6, 1, None),
+   False),
+  (1,
+   (),
+   (1, 0),
+   ((None, 0, 2, 2, 2), ('RCURLY', 1, 7, 1, None)),
+   (None, 0, None, 0, 2),
+   False),
+  (1,
+   (('ID', True), ('ASSIGN', False), ('LBRACKET', False)),
+   None,
+   ((None, 0, 2, 2, 2),
+    ('SEMI', 3, 8, 2, None),
+    ('RBRACKET', 1, None, 0, None)),
+   (None, 0, None, 0, 12),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   (('SEMI', 3, 2, 2, 2),),
+   (None, 0, None, 0, 9),
+   False),
+  (1,
+   (('LPAREN', False),),
+   None,
+   ((None, 0, 2, 2, 2), (None, 0, 9, 2, None), ('RPAREN', 1, None, 0, 3)),
+   (None, 0, None, 0, 21),
+   False),
+  (1,
+   (),
+   None,
+   ((None, 0, 2, 2, 2), ('SEMI', 3, 10, 1, None)),
+   (None, 0, None, 0, 10),
+   False),
+  (1,
+   (('LPAREN', False),),
+   None,
+   ((None, 0, 2, 2, 2), (None, 0, 11, 2, None), ('RPAREN', 1, None, 0, 3)),
+   (None, 0, None, 0, 21),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   ((None, 0, 3, 2, None),),
+   (None, 0, None, 0, 5),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   (('SEMI', 3, None, 0, None),),
+   (None, 0, None, 0, 8),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   ((None, 0, 4, 2, None),),
+   (None, 0, None, 0, 7),
+   False),
+  (2, (), None, (('SEMI', 3, None, 0, None),), (None, 0, None, 0, 18), False),
+  (1,
+   (('LPAREN', False),),
+   None,
+   ((None, 0, 5, 3, None), (None, 0, None, 0, 11), ('RPAREN', 1, None, 0, 3)),
+   (None, 0, None, 0, 21),
+   False),
+  (1, (('STRING', True),), None, (), ('SEMI', 3, 6, 1, None), False),
+  (1, (), (1, 0), (('RCURLY', 1, 7, 1, None),), (None, 0, None, 0, 2), False),
+  (1,
+   (('ID', True), ('ASSIGN', False), ('LBRACKET', False)),
+   None,
+   (('SEMI', 3, 8, 2, None), ('RBRACKET', 1, None, 0, None)),
+   (None, 0, None, 0, 12),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   (('SEMI', 3, None, 0, None),),
+   (None, 0, None, 0, 9),
+   False),
+  (1,
+   (('LPAREN', False),),
+   None,
+   ((None, 0, 9, 2, None), ('RPAREN', 1, None, 0, 3)),
+   (None, 0, None, 0, 21),
+   False),
+  (1, (), None, (('SEMI', 3, 10, 1, None),), (None, 0, None, 0, 10), False),
+  (1,
+   (('LPAREN', False),),
+   None,
+   ((None, 0, 11, 2, None), ('RPAREN', 1, None, 0, 3)),
+   (None, 0, None, 0, 21),
+   False),
+  (1, (), None, (), None, False),
+  (1,
+   (('ID', True),),
+   None,
+   ((None, 0, 12, 2, None),),
+   (None, 0, None, 0, 6),
+   False),
+  (1,
+   (),
+   None,
+   (('RCURLY', 1, None, 0, None),),
+   (None, 0, None, 0, 14),
+   False),
+  (1, (), (13, 0), (), None, False),
+  (1,
+   (),
+   None,
+   (('RCURLY', 1, None, 0, None),),
+   (None, 0, None, 0, 14),
+   False),
+  (1, (), (1, 0), (), None, False),
+  (1,
+   (),
+   None,
+   ((None, 0, 14, 2, None), ('RPAREN', 1, None, 0, 3)),
+   (None, 0, None, 0, 12),
+   False),
+  (0, (), (15, 1), (), None, False),
+  (1,
+   (),
+   None,
+   ((None, 0, 16, 3, None), ('COMMA', 1, None, 0, 21)),
+   (None, 0, None, 0, 21),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   ((None, 0, 17, 2, None), (None, 0, 18, 3, None), (None, 0, None, 0, 21)),
+   (None, 0, None, 0, 17),
+   False),
+  (0, (), (19, 1), (), None, False),
+  (1,
+   (),
+   None,
+   (('RBRACKET', 1, 20, 2, None),),
+   (None, 0, None, 0, 21),
+   False),
+  (0, (), (21, 0), (), None, False),
+  (2, (), (22, 1), ((None, 0, None, 0, 22),), (None, 0, None, 0, 24), False),
+  (2, (), (23, 1), (), (None, 0, None, 0, 22), False),
+  (1, (), None, (('RPAREN', 1, None, 0, 22),), (None, 0, None, 0, 21), False),
+  (1, (), None, ((None, 0, 24, 1, 22),), (None, 0, None, 0, 23), False),
+  (2, (), (25, 1), (), (None, 0, None, 0, 22), False),
+  (0, (), (21, 0), (), None, False),
+  (1, (), None, (), (None, 0, None, 0, 3), False),
+  (0, (), (1, 0), (), None, False),
+  (2, (), (26, 1), (), (None, 0, None, 0, 13), False),
+  (1, (('ID', True),), (27, 2), (), (None, 0, None, 0, 13), False),
+  (2,
+   (('ASSIGN', False),),
+   None,
+   (('SEMI', 3, 28, 2, 15),),
+   (None, 0, None, 0, 21),
+   False),
+  (2,
+   (('ASSIGN', False),),
+   None,
+   (('SEMI', 3, 29, 3, 15),),
+   (None, 0, None, 0, 21),
+   False),
+  (1,
+   (('ID', True),),
+   None,
+   ((None, 0, 18, 3, None), (None, 0, None, 0, 21)),
+   (None, 0, None, 0, 17),
+   False),
+  (2, (), None, (), None, False),
+  (2, (), None, (), None, False),
+  (1, (), None, (), (None, 0, None, 0, 19), False),
+  (1,
+   (('ID', True), ('ASSIGN', False)),
+   None,
+   ((None, 0, None, 0, 20),),
+   (None, 0, None, 0, 21),
+   False),
+  (1, (), None, (('RPAREN', 1, 30, 2, None),), (None, 0, None, 0, 25), False),
+  (2,
+   (),
+   (22, 1),
+   ((None, 0, 31, 2, None), (None, 0, None, 0, 22)),
+   (None, 0, None, 0, 24),
+   False),
+  (2, (), (23, 1), ((None, 0, 31, 2, None),), (None, 0, None, 0, 22), False),
+  (1,
+   (),
+   None,
+   ((None, 0, 31, 2, None), ('RPAREN', 1, None, 0, 22)),
+   (None, 0, None, 0, 21),
+   False),
+  (1,
+   (),
+   None,
+   ((None, 0, 31, 2, None), (None, 0, 24, 1, 22)),
+   (None, 0, None, 0, 23),
+   False),
+  (1, (), (32, 1), (), None, False),
+  (2, (), (25, 1), ((None, 0, 31, 2, None),), (None, 0, None, 0, 22), False),
+  (0, (), (33, 3), (), None, False),
+  (1,
+   (('ID', True),),
+   None,
+   ((None, 0, 34, 4, None), (None, 0, 18, 3, None), (None, 0, None, 0, 21)),
+   (None, 0, None, 0, 17),
+   False),
+  (2, (), (22, 1), ((None, 0, None, 0, 22),), (None, 0, None, 0, 24), False),
+  (2, (), (23, 1), (), (None, 0, None, 0, 22), False),
+  (1, (), None, (('RPAREN', 1, None, 0, 22),), (None, 0, None, 0, 21), False),
+  (1, (), None, ((None, 0, 24, 1, 22),), (None, 0, None, 0, 23), False),
+  (2, (), (25, 1), (), (None, 0, None, 0, 22), False),
+  (2, (), None, ((None, 0, 35, 3, 22),), (None, 0, None, 0, 23), False),
+  (2, (), None, ((None, 0, 35, 3, 22),), (None, 0, None, 0, 23), False),
+  (2, (), (22, 1), (), (None, 0, None, 0, 24), False),
+  (2, (), (23, 1), (), None, False),
+  (1,
+   (),
+   None,
+   (('RPAREN', 1, None, 0, None),),
+   (None, 0, None, 0, 21),
+   False),
+  (1, (), None, ((None, 0, 24, 1, None),), (None, 0, None, 0, 23), False),
+  (2, (), (25, 1), (), None, False),
+  (1, (('ID', True),), (36, 2), (), None, False),
+  (1, (), None, (('RPAREN', 1, 37, 2, None),), (None, 0, None, 0, 25), False),
+  (0, (), (1, 0), (), None, False),
+  (2,
+   (),
+   (22, 1),
+   ((None, 0, 38, 1, 26), (None, 0, None, 0, 22)),
+   (None, 0, None, 0, 24),
+   False),
+  (2, (), (23, 1), ((None, 0, 38, 1, 26),), (None, 0, None, 0, 22), False),
+  (1,
+   (),
+   None,
+   ((None, 0, 38, 1, 26), ('RPAREN', 1, None, 0, 22)),
+   (None, 0, None, 0, 21),
+   False),
+  (1,
+   (),
+   None,
+   ((None, 0, 38, 1, 26), (None, 0, 24, 1, 22)),
+   (None, 0, None, 0, 23),
+   False),
+  (2, (), (25, 1), ((None, 0, 38, 1, 26),), (None, 0, None, 0, 22), False),
+  (1, (), None, ((None, 0, 2, 2, 26),), (None, 0, None, 0, 21), False)],
+ [{'ASSIGN': 0,
+   'AT': 0,
+   'CAT': 1,
+   'COLON': 0,
+   'COMMA': 0,
+   'DOT': 0,
+   'DRAW': 2,
+   'ELSE': 0,
+   'EOF': 0,
+   'EQ': 0,
+   'FUNC': 3,
+   'ID': 4,
+   'IF': 5,
+   'IMPORT': 6,
+   'INTEGER': 0,
+   'LBRACKET': 0,
+   'LCURLY': 7,
+   'LITTER': 8,
+   'LPAREN': 0,
+   'NOT': 0,
+   'NOTEQ': 0,
+   'RANDOMCAT': 9,
+   'RBRACKET': 0,
+   'RCURLY': 0,
+   'REPEAT': 10,
+   'RETURN': 11,
+   'RPAREN': 0,
+   'SEMI': 0,
+   'STRING': 0,
+   'WHERE': 0,
+   'WHILE': 12},
+  {'ASSIGN': 13,
+   'AT': 13,
+   'CAT': 14,
+   'COLON': 13,
+   'COMMA': 13,
+   'DOT': 13,
+   'DRAW': 15,
+   'ELSE': 13,
+   'EOF': 13,
+   'EQ': 13,
+   'FUNC': 16,
+   'ID': 17,
+   'IF': 18,
+   'IMPORT': 19,
+   'INTEGER': 13,
+   'LBRACKET': 13,
+   'LCURLY': 20,
+   'LITTER': 21,
+   'LPAREN': 13,
+   'NOT': 13,
+   'NOTEQ': 13,
+   'RANDOMCAT': 22,
+   'RBRACKET': 13,
+   'RCURLY': 13,
+   'REPEAT': 23,
+   'RETURN': 24,
+   'RPAREN': 13,
+   'SEMI': 13,
+   'STRING': 13,
+   'WHERE': 13,
+   'WHILE': 25},
+  {'ASSIGN': 26,
+   'AT': 26,
+   'CAT': 27,
+   'COLON': 26,
+   'COMMA': 26,
+   'DOT': 26,
+   'DRAW': 28,
+   'ELSE': 26,
+   'EOF': 26,
+   'EQ': 26,
+   'FUNC': 29,
+   'ID': 30,
+   'IF': 31,
+   'IMPORT': 32,
+   'INTEGER': 26,
+   'LBRACKET': 26,
+   'LCURLY': 33,
+   'LITTER': 34,
+   'LPAREN': 26,
+   'NOT': 26,
+   'NOTEQ': 26,
+   'RANDOMCAT': 35,
+   'RBRACKET': 26,
+   'RCURLY': 26,
+   'REPEAT': 36,
+   'RETURN': 37,
+   'RPAREN': 26,
+   'SEMI': 26,
+   'STRING': 26,
+   'WHERE': 26,
+   'WHILE': 38},
+  {'CAT': 39,
+   'DRAW': 40,
+   'FUNC': 41,
+   'ID': 42,
+   'IF': 43,
+   'IMPORT': 44,
+   'LCURLY': 45,
+   'LITTER': 46,
+   'RANDOMCAT': 47,
+   'REPEAT': 48,
+   'RETURN': 49,
+   'WHILE': 50},
+  {'ASSIGN': 26,
+   'AT': 26,
+   'CAT': 26,
+   'COLON': 26,
+   'COMMA': 26,
+   'DOT': 26,
+   'DRAW': 26,
+   'ELSE': 26,
+   'EOF': 26,
+   'EQ': 26,
+   'FUNC': 26,
+   'ID': 26,
+   'IF': 26,
+   'IMPORT': 26,
+   'INTEGER': 26,
+   'LBRACKET': 26,
+   'LCURLY': 26,
+   'LITTER': 26,
+   'LPAREN': 26,
+   'NOT': 26,
+   'NOTEQ': 26,
+   'RANDOMCAT': 26,
+   'RBRACKET': 26,
+   'RCURLY': 26,
+   'REPEAT': 26,
+   'RETURN': 26,
+   'RPAREN': 26,
+   'SEMI': 51,
+   'STRING': 26,
+   'WHERE': 26,
+   'WHILE': 26},
+  {'COLON': 52, 'LCURLY': 53, 'SEMI': 54},
+  {'LCURLY': 55, 'SEMI': 56},
+  {'LPAREN': 57},
+  {'ASSIGN': 58,
+   'AT': 59,
+   'CAT': 58,
+   'COLON': 58,
+   'COMMA': 58,
+   'DOT': 58,
+   'DRAW': 58,
+   'ELSE': 58,
+   'EOF': 58,
+   'EQ': 58,
+   'FUNC': 58,
+   'ID': 58,
+   'IF': 58,
+   'IMPORT': 58,
+   'INTEGER': 58,
+   'LBRACKET': 58,
+   'LCURLY': 58,
+   'LITTER': 58,
+   'LPAREN': 58,
+   'NOT': 58,
+   'NOTEQ': 58,
+   'RANDOMCAT': 58,
+   'RBRACKET': 58,
+   'RCURLY': 58,
+   'REPEAT': 58,
+   'RETURN': 58,
+   'RPAREN': 58,
+   'SEMI': 58,
+   'STRING': 58,
+   'WHERE': 60,
+   'WHILE': 58},
+  {'ASSIGN': 61,
+   'AT': 61,
+   'CAT': 61,
+   'COLON': 61,
+   'COMMA': 61,
+   'DOT': 61,
+   'DRAW': 61,
+   'ELSE': 61,
+   'EOF': 61,
+   'EQ': 61,
+   'FUNC': 61,
+   'ID': 61,
+   'IF': 61,
+   'IMPORT': 61,
+   'INTEGER': 61,
+   'LBRACKET': 62,
+   'LCURLY': 61,
+   'LITTER': 61,
+   'LPAREN': 61,
+   'NOT': 61,
+   'NOTEQ': 61,
+   'RANDOMCAT': 61,
+   'RBRACKET': 61,
+   'RCURLY': 61,
+   'REPEAT': 61,
+   'RETURN': 61,
+   'RPAREN': 61,
+   'SEMI': 61,
+   'STRING': 61,
+   'WHERE': 61,
+   'WHILE': 61},
+  {'ASSIGN': 63,
+   'AT': 63,
+   'CAT': 63,
+   'COLON': 63,
+   'COMMA': 63,
+   'DOT': 63,
+   'DRAW': 63,
+   'ELSE': 63,
+   'EOF': 63,
+   'EQ': 63,
+   'FUNC': 63,
+   'ID': 64,
+   'IF': 63,
+   'IMPORT': 63,
+   'INTEGER': 65,
+   'LBRACKET': 63,
+   'LCURLY': 63,
+   'LITTER': 63,
+   'LPAREN': 66,
+   'NOT': 67,
+   'NOTEQ': 63,
+   'RANDOMCAT': 63,
+   'RBRACKET': 63,
+   'RCURLY': 63,
+   'REPEAT': 63,
+   'RETURN': 63,
+   'RPAREN': 63,
+   'SEMI': 63,
+   'STRING': 68,
+   'WHERE': 63,
+   'WHILE': 63},
+  {'ASSIGN': 69,
+   'AT': 69,
+   'CAT': 69,
+   'COLON': 69,
+   'COMMA': 69,
+   'DOT': 69,
+   'DRAW': 69,
+   'ELSE': 70,
+   'EOF': 69,
+   'EQ': 69,
+   'FUNC': 69,
+   'ID': 69,
+   'IF': 69,
+   'IMPORT': 69,
+   'INTEGER': 69,
+   'LBRACKET': 69,
+   'LCURLY': 69,
+   'LITTER': 69,
+   'LPAREN': 69,
+   'NOT': 69,
+   'NOTEQ': 69,
+   'RANDOMCAT': 69,
+   'RBRACKET': 69,
+   'RCURLY': 69,
+   'REPEAT': 69,
+   'RETURN': 69,
+   'RPAREN': 69,
+   'SEMI': 69,
+   'STRING': 69,
+   'WHERE': 69,
+   'WHILE': 69},
+  {'ASSIGN': 71,
+   'AT': 71,
+   'CAT': 71,
+   'COLON': 71,
+   'COMMA': 71,
+   'DOT': 71,
+   'DRAW': 71,
+   'ELSE': 71,
+   'EOF': 71,
+   'EQ': 71,
+   'FUNC': 71,
+   'ID': 72,
+   'IF': 71,
+   'IMPORT': 71,
+   'INTEGER': 71,
+   'LBRACKET': 71,
+   'LCURLY': 71,
+   'LITTER': 71,
+   'LPAREN': 71,
+   'NOT': 71,
+   'NOTEQ': 71,
+   'RANDOMCAT': 71,
+   'RBRACKET': 71,
+   'RCURLY': 71,
+   'REPEAT': 71,
+   'RETURN': 71,
+   'RPAREN': 71,
+   'SEMI': 71,
+   'STRING': 71,
+   'WHERE': 71,
+   'WHILE': 71},
+  {'ASSIGN': 26,
+   'AT': 26,
+   'CAT': 26,
+   'COLON': 26,
+   'COMMA': 73,
+   'DOT': 26,
+   'DRAW': 26,
+   'ELSE': 26,
+   'EOF': 26,
+   'EQ': 26,
+   'FUNC': 26,
+   'ID': 26,
+   'IF': 26,
+   'IMPORT': 26,
+   'INTEGER': 26,
+   'LBRACKET': 26,
+   'LCURLY': 26,
+   'LITTER': 26,
+   'LPAREN': 26,
+   'NOT': 26,
+   'NOTEQ': 26,
+   'RANDOMCAT': 26,
+   'RBRACKET': 26,
+   'RCURLY': 26,
+   'REPEAT': 26,
+   'RETURN': 26,
+   'RPAREN': 26,
+   'SEMI': 26,
+   'STRING': 26,
+   'WHERE': 26,
+   'WHILE': 26},
+  {'ID': 74},
+  {'ASSIGN': 26,
+   'AT': 26,
+   'CAT': 26,
+   'COLON': 26,
+   'COMMA': 26,
+   'DOT': 26,
+   'DRAW': 26,
+   'ELSE': 26,
+   'EOF': 26,
+   'EQ': 26,
+   'FUNC': 26,
+   'ID': 75,
+   'IF': 26,
+   'IMPORT': 26,
+   'INTEGER': 26,
+   'LBRACKET': 26,
+   'LCURLY': 26,
+   'LITTER': 26,
+   'LPAREN': 26,
+   'NOT': 26,
+   'NOTEQ': 26,
+   'RANDOMCAT': 26,
+   'RBRACKET': 26,
+   'RCURLY': 26,
+   'REPEAT': 26,
+   'RETURN': 26,
+   'RPAREN': 26,
+   'SEMI': 26,
+   'STRING': 26,
+   'WHERE': 26,
+   'WHILE': 26},
+  {'WHERE': 76},
+  {'EQ': 77, 'NOTEQ': 78},
+  {'ASSIGN': 79, 'DOT': 80, 'LPAREN': 81},
+  {'ID': 82,
+   'INTEGER': 83,
+   'LPAREN': 84,
+   'NOT': 85,
+   'RANDOMCAT': 86,
+   'STRING': 87},
+  {'ASSIGN': 88,
+   'AT': 88,
+   'CAT': 88,
+   'COLON': 88,
+   'COMMA': 88,
+   'DOT': 88,
+   'DRAW': 88,
+   'ELSE': 88,
+   'EOF': 88,
+   'EQ': 88,
+   'FUNC': 88,
+   'ID': 88,
+   'IF': 88,
+   'IMPORT': 88,
+   'INTEGER': 88,
+   'LBRACKET': 88,
+   'LCURLY': 88,
+   'LITTER': 88,
+   'LPAREN': 88,
+   'NOT': 88,
+   'NOTEQ': 88,
+   'RANDOMCAT': 88,
+   'RBRACKET': 88,
+   'RCURLY': 88,
+   'REPEAT': 88,
+   'RETURN': 88,
+   'RPAREN': 88,
+   'SEMI': 88,
+   'STRING': 88,
+   'WHERE': 89,
+   'WHILE': 88},
+  {'ID': 90, 'INTEGER': 91, 'LPAREN': 92, 'NOT': 93, 'STRING': 94},
+  {'ASSIGN': 26,
+   'AT': 26,
+   'CAT': 26,
+   'COLON': 26,
+   'COMMA': 26,
+   'DOT': 26,
+   'DRAW': 26,
+   'ELSE': 26,
+   'EOF': 26,
+   'EQ': 95,
+   'FUNC': 26,
+   'ID': 26,
+   'IF': 26,
+   'IMPORT': 26,
+   'INTEGER': 26,
+   'LBRACKET': 26,
+   'LCURLY': 26,
+   'LITTER': 26,
+   'LPAREN': 26,
+   'NOT': 26,
+   'NOTEQ': 96,
+   'RANDOMCAT': 26,
+   'RBRACKET': 26,
+   'RCURLY': 26,
+   'REPEAT': 26,
+   'RETURN': 26,
+   'RPAREN': 26,
+   'SEMI': 26,
+   'STRING': 26,
+   'WHERE': 26,
+   'WHILE': 26},
+  {'ID': 97, 'INTEGER': 98, 'LPAREN': 99, 'NOT': 100, 'STRING': 101},
+  {'ASSIGN': 26,
+   'AT': 26,
+   'CAT': 26,
+   'COLON': 26,
+   'COMMA': 26,
+   'DOT': 102,
+   'DRAW': 26,
+   'ELSE': 26,
+   'EOF': 26,
+   'EQ': 26,
+   'FUNC': 26,
+   'ID': 26,
+   'IF': 26,
+   'IMPORT': 26,
+   'INTEGER': 26,
+   'LBRACKET': 26,
+   'LCURLY': 26,
+   'LITTER': 26,
+   'LPAREN': 103,
+   'NOT': 26,
+   'NOTEQ': 26,
+   'RANDOMCAT': 26,
+   'RBRACKET': 26,
+   'RCURLY': 26,
+   'REPEAT': 26,
+   'RETURN': 26,
+   'RPAREN': 26,
+   'SEMI': 26,
+   'STRING': 26,
+   'WHERE': 26,
+   'WHILE': 26},
+  {'ASSIGN': 104,
+   'AT': 104,
+   'CAT': 104,
+   'COLON': 104,
+   'COMMA': 104,
+   'DOT': 104,
+   'DRAW': 104,
+   'ELSE': 104,
+   'EOF': 104,
+   'EQ': 104,
+   'FUNC': 104,
+   'ID': 105,
+   'IF': 104,
+   'IMPORT': 104,
+   'INTEGER': 106,
+   'LBRACKET': 104,
+   'LCURLY': 104,
+   'LITTER': 104,
+   'LPAREN': 107,
+   'NOT': 108,
+   'NOTEQ': 104,
+   'RANDOMCAT': 104,
+   'RBRACKET': 104,
+   'RCURLY': 104,
+   'REPEAT': 104,
+   'RETURN': 104,
+   'RPAREN': 104,
+   'SEMI': 104,
+   'STRING': 109,
+   'WHERE': 104,
+   'WHILE': 104},
+  {'ASSIGN': 26,
+   'AT': 26,
+   'CAT': 26,
+   'COLON': 26,
+   'COMMA': 110,
+   'DOT': 26,
+   'DRAW': 26,
+   'ELSE': 26,
+   'EOF': 26,
+   'EQ': 26,
+   'FUNC': 26,
+   'ID': 26,
+   'IF': 26,
+   'IMPORT': 26,
+   'INTEGER': 26,
+   'LBRACKET': 26,
+   'LCURLY': 26,
+   'LITTER': 26,
+   'LPAREN': 26,
+   'NOT': 26,
+   'NOTEQ': 26,
+   'RANDOMCAT': 26,
+   'RBRACKET': 26,
+   'RCURLY': 26,
+   'REPEAT': 26,
+   'RETURN': 26,
+   'RPAREN': 26,
+   'SEMI': 26,
+   'STRING': 26,
+   'WHERE': 26,
+   'WHILE': 26}])
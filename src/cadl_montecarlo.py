@@ -0,0 +1,252 @@
+"""
+Monte Carlo runs of randomized CADL programs
+
+A program using randomcat draws different cats every time it runs.
+run_many runs it N times with the seeds S, S+1, ..., S+N-1, spread
+over a pool of worker processes, and reports how the results are
+distributed:
+
+    python cadl_interp.py --runs 1000 --seed-base 0 -j 4 program.cadl
+
+The program is parsed (and checked, with --check) once; every worker
+receives the AST once and runs it as often as it is asked to, each
+run with a fresh symbol table and walker and random.seed(seed).  The
+randomcat logic itself is the walker's (random_cat), only counted.
+
+Nothing of a run is kept but its counts:
+
+  - the trait combination of every cat made by randomcat, and the
+    value of each trait on its own
+  - every drawn frame, by cat name and traits
+  - a digest of everything the run printed, to count distinct outputs
+  - the error a run stopped at, if any
+
+Workers merge the counts of their runs, the parent merges those of
+the workers, so memory grows with the number of distinct cats and
+frames, not with the number of runs.  The result is the same for any
+number of workers.
+"""
+
+import hashlib
+import io
+import random
+import sys
+from collections import Counter
+from contextlib import redirect_stdout
+
+from cadl_symtab import symtab
+
+# trait combinations listed in the report
+TOP = 10
+
+# runs per job handed to a worker, enough to keep the pool busy
+# without paying for a round trip per run
+JOBS_PER_WORKER = 4
+
+
+class Tally:
+    """
+    Counts of a number of runs, merged with +=.
+    """
+
+    def __init__(self):
+        self.runs = 0
+        self.draws = 0
+        self.cats = Counter()       # sorted trait items -> randomcats
+        self.frames = Counter()     # (name, sorted trait items) -> draws
+        self.outputs = Counter()    # digest of a run's output -> runs
+        self.errors = Counter()     # error message -> runs
+
+    def __iadd__(self, other):
+        self.runs += other.runs
+        self.draws += other.draws
+        self.cats.update(other.cats)
+        self.frames.update(other.frames)
+        self.outputs.update(other.outputs)
+        self.errors.update(other.errors)
+        return self
+
+    def traits(self):
+        """
+        Counter of (trait, value) over all randomcats.
+        """
+        counts = Counter()
+        for combination, n in self.cats.items():
+            for item in combination:
+                counts[item] += n
+        return counts
+
+
+class Digest(io.TextIOBase):
+    """
+    Stands in for stdout during a run, keeps only a hash of the text.
+    """
+
+    def __init__(self):
+        self.hash = hashlib.blake2b(digest_size=16)
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.hash.update(text.encode("utf-8"))
+        return len(text)
+
+
+class FrameSink:
+    """
+    on_draw sink counting the frames of a run and printing them as
+    the walker would, each distinct frame rendered once per worker.
+    """
+
+    def __init__(self, tally):
+        self.tally = tally
+        # frozenset key -> (stable key, text)
+        self.seen = {}
+
+    def __call__(self, name, cat):
+        from cadl_interp_walk import draw_text
+        try:
+            key = (name, frozenset(cat["traits"].items()))
+            entry = self.seen.get(key)
+        except TypeError:
+            key = None  # unhashable trait value, rendered every time
+            entry = None
+        if entry is None:
+            traits = cat["traits"]
+            if traits.__class__ is not dict:
+                from cadl_proto import flat_cat
+                traits = flat_cat(cat)["traits"]
+            entry = ((name, tuple(sorted(traits.items(), key=repr))),
+                     draw_text(name, cat))
+            if key is not None:
+                self.seen[key] = entry
+        self.tally.frames[entry[0]] += 1
+        self.tally.draws += 1
+        sys.stdout.write(entry[1])
+
+
+# Workers
+########################################################################
+
+# set up by start_worker, one program per worker process
+_program = None
+
+
+def start_worker(ast, checked=False, snapshot=None, search_path=None,
+                 tiered=False, memoize=True):
+    global _program
+    _program = (ast, checked, snapshot, search_path, tiered, memoize)
+    # import up front so that the first job is not charged for it
+    import cadl_interp_walk, cadl_ascii_render  # noqa
+
+
+def run_seeds(seeds):
+    """
+    Run the worker's program once for each seed and return the Tally.
+    """
+    from cadl_interp import start_tier
+    from cadl_interp_walk import CADLInterpWalk
+    ast, checked, snapshot, search_path, tiered, memoize = _program
+    tally = Tally()
+    sink = FrameSink(tally)
+    for seed in seeds:
+        if snapshot is None:
+            symtab.initialize()
+        else:
+            from cadl_snapshot import restore_snapshot
+            restore_snapshot(snapshot)
+        walker = CADLInterpWalk(on_draw=sink, search_path=search_path)
+        walker.checked = checked
+        start_tier(walker, tiered)
+        walker.memoize = memoize
+        make_cat = walker.random_cat
+
+        def random_cat():
+            cat = make_cat()
+            tally.cats[tuple(sorted(cat["traits"].items(), key=repr))] += 1
+            return cat
+        walker.random_cat = random_cat
+
+        random.seed(seed)
+        out = Digest()
+        with redirect_stdout(out):
+            try:
+                walker.visit(ast)
+                walker.finish()
+            except Exception as e:
+                tally.errors[str(e)] += 1
+                print("error: " + str(e))
+        tally.outputs[out.hash.digest()] += 1
+        tally.runs += 1
+    return tally
+
+
+def run_many(ast, runs, seed_base=0, workers=1, checked=False,
+             snapshot=None, search_path=None, tiered=False, memoize=True):
+    """
+    Run ast with the seeds seed_base ... seed_base + runs - 1 on
+    workers processes and return the merged Tally.
+    """
+    setup = (ast, checked, snapshot, search_path, tiered, memoize)
+    seeds = range(seed_base, seed_base + runs)
+    if workers <= 1 or runs <= 1:
+        start_worker(*setup)
+        return run_seeds(seeds)
+
+    size = max(1, -(-runs // (workers * JOBS_PER_WORKER)))
+    jobs = [seeds[i:i + size] for i in range(0, runs, size)]
+    from concurrent.futures import ProcessPoolExecutor
+    total = Tally()
+    with ProcessPoolExecutor(max_workers=workers, initializer=start_worker,
+                             initargs=setup) as pool:
+        for tally in pool.map(run_seeds, jobs):
+            total += tally
+    return total
+
+
+# Report
+########################################################################
+
+def report(tally, seed_base=0, top=TOP, write=None):
+    """
+    Write a summary of tally with write(text), sys.stdout.write by
+    default.
+    """
+    write = write or sys.stdout.write
+    write("runs      {} (seeds {}..{})\n".format(
+        tally.runs, seed_base, seed_base + tally.runs - 1))
+    write("outputs   {} distinct\n".format(len(tally.outputs)))
+    write("draws     {}, {} distinct frames\n".format(
+        tally.draws, len(tally.frames)))
+    failed = sum(tally.errors.values())
+    if failed:
+        write("errors    {} runs failed\n".format(failed))
+        for message, n in tally.errors.most_common(3):
+            write("  {:>8}  {}\n".format(n, message))
+
+    cats = sum(tally.cats.values())
+    write("randomcat {} cats, {} trait combinations\n".format(
+        cats, len(tally.cats)))
+    if not cats:
+        return
+
+    # each trait on its own, values by count
+    by_trait = {}
+    for (trait, value), n in tally.traits().items():
+        by_trait.setdefault(trait, []).append((n, value))
+    write("\ntraits\n")
+    for trait in sorted(by_trait):
+        values = sorted(by_trait[trait],
+                        key=lambda nv: (-nv[0], repr(nv[1])))
+        write("  {:<10}{}\n".format(trait, "  ".join(
+            "{} {:.1%}".format(value, n / cats) for (n, value) in values)))
+
+    write("\ntop trait combinations\n")
+    write("  {:>8}  {:>6}  traits\n".format("count", "share"))
+    # trait values may be None (see RANDOM_TRAITS), hence repr
+    ranked = sorted(tally.cats.items(),
+                    key=lambda cn: (-cn[1], repr(cn[0])))
+    for combination, n in ranked[:top]:
+        write("  {:>8}  {:>6.1%}  {}\n".format(n, n / cats, " ".join(
+            "{}={}".format(t, v) for (t, v) in combination)))
@@ -0,0 +1,123 @@
+"""
+Sampling profiler for CADL programs
+
+Reports where time goes in terms of the CADL program (source lines and
+CADL function calls) rather than the Python functions of the interpreter.
+
+A timer thread wakes up every `interval` seconds, grabs the Python stack
+of the thread running the interpreter and walks it looking for:
+
+  - CADLInterpWalk.visitTuple frames, whose `node` local is mapped back
+    to its source line with the line map filled in by cadl_fe.parse
+  - CADLInterpWalk._call_function_by_name frames, whose `name` local
+    is the CADL function being called
+
+so the interpreter itself runs without any instrumentation.  Samples are
+aggregated into collapsed stacks,
+
+    <main>:15;toggleMood:3 42
+
+one stack per line followed by its sample count, which is the input
+format of flamegraph.pl, speedscope, inferno and friends.
+"""
+
+import sys
+import threading
+from collections import Counter
+
+from cadl_interp_walk import CADLInterpWalk
+
+VISIT_CODE = CADLInterpWalk.visitTuple.__code__
+CALL_CODE = CADLInterpWalk._call_function_by_name.__code__
+
+
+class Profiler:
+
+    def __init__(self, lines, interval=0.001):
+        # lines: id(stmt node) -> source line, see cadl_fe.parse
+        self.lines = lines
+        self.interval = interval
+        self.samples = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._target = None
+
+    # Sampling
+    ####################################################################
+    def start(self, thread_id=None):
+        """
+        Start sampling the thread with the given ident (default: the
+        calling thread).
+        """
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name="cadl-profiler",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = self.cadl_stack(frame)
+            if stack:
+                self.samples[stack] += 1
+
+    def cadl_stack(self, frame):
+        """
+        Translate a Python frame chain into a collapsed CADL stack.
+        """
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            if code is VISIT_CODE or code is CALL_CODE:
+                frames.append(frame)
+            frame = frame.f_back
+
+        stack = []
+        func = "<main>"
+        line = None
+        # outermost frame first
+        for f in reversed(frames):
+            if f.f_code is CALL_CODE:
+                stack.append(self._label(func, line))
+                func = f.f_locals.get("name", "?")
+                line = None
+            else:
+                node_line = self.lines.get(id(f.f_locals.get("node")))
+                if node_line is not None:
+                    line = node_line
+
+        if line is None and not stack:
+            # not (yet) inside the CADL program
+            return None
+        stack.append(self._label(func, line))
+        return ";".join(stack)
+
+    @staticmethod
+    def _label(func, line):
+        if line is None:
+            return func
+        return "{}:{}".format(func, line)
+
+    # Output
+    ####################################################################
+    def write_collapsed(self, f):
+        for stack, count in sorted(self.samples.items()):
+            f.write("{} {}\n".format(stack, count))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
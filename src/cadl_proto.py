@@ -0,0 +1,228 @@
+"""
+Prototype-based cats for CADL
+
+    cat Kitten : Miso { tail = "curled"; }
+
+declares Kitten with Miso as its prototype.  Kitten's traits are a
+ProtoTraits that holds only the traits set on Kitten itself and looks
+every other trait up in Miso's traits, so a family of thousands of
+similar cats costs memory for their differences only.  The lookup is
+live: a trait changed on Miso later is seen by every cat derived from
+it that does not set the trait itself.
+
+A ProtoTraits behaves like the traits dict of any other cat.  Writes
+(trait assignment, mood override) go to the cat's own traits.  flat()
+returns all traits as a plain dict for the renderer.  Prototypes cache
+theirs, so drawing a derived cat only copies its prototype's cached
+dict and adds its own traits; derived cats cache nothing.  A cat
+becomes a prototype by having its traits wrapped in a ProtoTraits
+without a prototype of its own, so that writes to it are noticed too.
+
+Every prototype has a version, bumped when one of its traits is
+written, and its cache is good for the version it was made at.  A
+write to a prototype bumps the version of the prototypes derived from
+it as well, down to those whose cache is stale already, and leaves
+every other family of cats alone.
+"""
+
+from collections.abc import MutableMapping
+
+
+class ProtoTraits(MutableMapping):
+
+    __slots__ = ("own", "proto", "heirs", "version", "_flat", "_version")
+
+    def __init__(self, own, proto=None):
+        self.own = own
+        self.proto = proto
+        # prototypes derived from this one, a list on the traits of
+        # prototypes only (see share)
+        self.heirs = None
+        self.version = 0
+        # flat() cache of a prototype and the version it was made at
+        self._flat = None
+        self._version = -1
+
+    def __getitem__(self, trait):
+        traits = self
+        while traits is not None:
+            own = traits.own
+            if trait in own:
+                return own[trait]
+            traits = traits.proto
+        raise KeyError(trait)
+
+    def get(self, trait, default=None):
+        try:
+            return self[trait]
+        except KeyError:
+            return default
+
+    def __contains__(self, trait):
+        traits = self
+        while traits is not None:
+            if trait in traits.own:
+                return True
+            traits = traits.proto
+        return False
+
+    def __setitem__(self, trait, value):
+        own = self.own
+        if trait in own and own[trait] == value:
+            return      # e.g. a mood override drawing the cat again
+        own[trait] = value
+        if self.heirs is not None:
+            self.changed()
+
+    def __delitem__(self, trait):
+        # only a trait of the cat itself, the prototype's shows again
+        del self.own[trait]
+        if self.heirs is not None:
+            self.changed()
+
+    def share(self):
+        """
+        Make these the traits of a prototype.
+        """
+        if self.heirs is None:
+            self.heirs = []
+            if self.proto is not None:
+                self.proto.heirs.append(self)
+
+    def changed(self):
+        """
+        Bump the version of this prototype and of those derived from
+        it.  A cache is only made along with the caches of all
+        prototypes above it, so below a stale one all are stale.
+        """
+        stack = [self]
+        while stack:
+            traits = stack.pop()
+            traits.version += 1
+            for heir in traits.heirs:
+                if heir._version == heir.version:
+                    stack.append(heir)
+
+    def flat(self):
+        """
+        All traits as a dict, prototype traits first.  Do not modify.
+        """
+        if self._version == self.version:
+            return self._flat
+        # walk up to the nearest up to date cache (chains can be long)
+        chain = []
+        traits = self
+        while traits is not None and traits._version != traits.version:
+            chain.append(traits)
+            traits = traits.proto
+        flat = {} if traits is None else traits._flat
+        for t in reversed(chain):
+            flat = dict(flat)
+            flat.update(t.own)
+            if t.heirs is not None:
+                t._flat = flat
+                t._version = t.version
+        return flat
+
+    def __iter__(self):
+        return iter(self.flat())
+
+    def __len__(self):
+        return len(self.flat())
+
+    def __repr__(self):
+        return "ProtoTraits({!r}, {!r})".format(self.own, self.proto)
+
+
+def derive(proto_cat, own):
+    """
+    Return a new cat with traits own and proto_cat as its prototype.
+    """
+    traits = proto_cat["traits"]
+    if not isinstance(traits, ProtoTraits):
+        traits = proto_cat["traits"] = ProtoTraits(traits)
+    traits.share()
+    return {"type": "cat", "traits": ProtoTraits(own, traits)}
+
+
+def flat_cat(cat):
+    """
+    cat itself, or for a prototype-based cat a copy with flat traits.
+    """
+    traits = cat["traits"]
+    if isinstance(traits, ProtoTraits):
+        return {"type": "cat", "traits": traits.flat()}
+    return cat
+
+
+# Snapshots (see cadl_snapshot)
+########################################################################
+#
+# marshal only knows plain values, so ProtoTraits are stored as
+# ("__proto__", own, prototype) tuples.  A prototype shared by many
+# cats becomes one shared tuple, which marshal writes once and loads
+# as a single object again.
+
+PROTO_TAG = "__proto__"
+
+
+def encode_globals(scope):
+    """
+    Copy of the global scope with prototype-based cats and functions
+    declared by a flat AST (see cadl_flatast) in marshal form, or scope
+    itself if it has neither.
+    """
+    memo = {}
+    out = None
+    for name, value in scope.items():
+        if isinstance(value, dict) and isinstance(value.get("traits"),
+                                                  ProtoTraits):
+            if out is None:
+                out = dict(scope)
+            out[name] = dict(value, traits=_encode(value["traits"], memo))
+        elif isinstance(value, tuple) and any(
+                hasattr(item, "to_tuple") for item in value):
+            # a FUNDECL run from a flat AST, its children still views
+            if out is None:
+                out = dict(scope)
+            out[name] = tuple(item.to_tuple() if hasattr(item, "to_tuple")
+                              else item for item in value)
+    return scope if out is None else out
+
+
+def _encode(traits, memo):
+    # iterative, prototype chains can be long
+    chain = []
+    while traits is not None and id(traits) not in memo:
+        chain.append(traits)
+        traits = traits.proto
+    encoded = None if traits is None else memo[id(traits)]
+    for t in reversed(chain):
+        encoded = memo[id(t)] = (PROTO_TAG, t.own, encoded)
+    return encoded
+
+
+def decode_globals(scope):
+    """
+    Turn the prototype-based cats of a restored scope back into
+    ProtoTraits, in place.
+    """
+    memo = {}
+    for value in scope.values():
+        if isinstance(value, dict):
+            traits = value.get("traits")
+            if isinstance(traits, tuple) and traits[:1] == (PROTO_TAG,):
+                value["traits"] = _decode(traits, memo)
+
+
+def _decode(encoded, memo):
+    chain = []
+    while encoded is not None and id(encoded) not in memo:
+        chain.append(encoded)
+        encoded = encoded[2]
+    traits = None if encoded is None else memo[id(encoded)]
+    for e in reversed(chain):
+        if traits is not None:
+            traits.share()
+        traits = memo[id(e)] = ProtoTraits(e[1], traits)
+    return traits
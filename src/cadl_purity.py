@@ -0,0 +1,133 @@
+"""
+Purity analysis and memoization of CADL functions
+
+A function like
+
+    func toggleMood(m) {
+        if (m == "happy") { return "curious"; } else { return "happy"; }
+    }
+
+only looks at its parameters and returns a value: called twice with
+the same arguments it does the same thing twice.  is_pure proves that
+of a FUNDECL by looking at its body, and CADLInterpWalk then answers
+repeated calls from a Memo, without pushing a scope or walking the
+body.
+
+A function is pure if its body consists of nothing but
+
+  - blocks, if, while, repeat and return
+  - assignments to its own parameters
+  - literals, its parameters, not, == and !=
+
+Everything else makes it impure: trait assignments, draws, cats,
+litters and randomcats, imports, reading any name that is not a
+parameter (a global that may change between calls) and calling other
+functions, which are looked up by name when called and so are global
+reads as well.
+
+A call is only memoized if it passes one argument per parameter (a
+missing one would be looked up in the enclosing scopes) and all of
+them are strings, integers or nil, which compare and hash alike
+exactly when they are the same CADL value.  A call that fails is not
+memoized and runs (and fails) again the next time.
+
+The memo is a bounded LRU cache per walker (MEMO_SIZE results);
+CADLInterpWalk.memoize = False (cadl_interp.py --no-memo) turns it
+off.
+"""
+
+from collections import OrderedDict
+
+# memoized results kept per walker
+MEMO_SIZE = 4096
+
+# tags of the nodes a pure function body may contain, besides ID and
+# ASSIGN, which have to refer to parameters, and the literals
+PURE_TAGS = {
+    "STMTLIST", "BLOCK", "IF", "WHILE", "REPEAT", "RETURN",
+    "NOT", "EQ", "NOTEQ",
+}
+LITERAL_TAGS = {"INTEGER", "STRING", "NIL"}
+
+# argument classes a call can be memoized for; bool is left out on
+# purpose, True and 1 would share an entry
+KEY_CLASSES = (str, int, type(None))
+
+
+def is_pure(func):
+    """
+    True if the FUNDECL func is pure in the sense above.
+    """
+    _, _, params_list, body = func
+    params = {p[1] for p in params_list[1]}
+    stack = [body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if node is None:
+            continue    # no else part
+        tag = node[0]
+        if tag == "ID":
+            if node[1] not in params:
+                return False
+        elif tag == "ASSIGN":
+            if node[1][1] not in params:
+                return False
+            stack.append(node[2])
+        elif tag in PURE_TAGS:
+            stack.extend(node[1:])
+        elif tag not in LITERAL_TAGS:
+            return False
+    return True
+
+
+class Memo:
+
+    # get result for a call that has no entry
+    MISS = object()
+
+    def __init__(self, size=MEMO_SIZE):
+        self.size = size
+        # (id(func), *args) -> (func, result), least recently used first;
+        # func is kept so that its id cannot be reused
+        self.results = OrderedDict()
+        # id(func) -> (func, pure, number of parameters)
+        self.functions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, func, args):
+        """
+        Memo key of calling func with args, None if the call cannot be
+        memoized.
+        """
+        entry = self.functions.get(id(func))
+        if entry is None or entry[0] is not func:
+            entry = (func, is_pure(func), len(func[2][1]))
+            self.functions[id(func)] = entry
+        if not entry[1] or len(args) != entry[2]:
+            return None
+        for a in args:
+            if a.__class__ not in KEY_CLASSES:
+                return None
+        return (id(func), *args)
+
+    def get(self, key, func):
+        """
+        Result memoized under key, or Memo.MISS.
+        """
+        entry = self.results.get(key)
+        if entry is None or entry[0] is not func:
+            self.misses += 1
+            return self.MISS
+        self.results.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, func, result):
+        results = self.results
+        results[key] = (func, result)
+        if len(results) > self.size:
+            results.popitem(last=False)
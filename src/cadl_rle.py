@@ -0,0 +1,105 @@
+"""
+Run-length encoded draw output for CADL
+
+Loops tend to draw the same, unchanged cat over and over.  FrameDeduper
+is an on_draw sink (see CADLInterpWalk) that compares every draw with
+the previous one by its (name, traits) state before anything is
+rendered; a repeated draw only bumps a counter, and a run of identical
+draws is rendered and written once when it ends.
+
+Two output formats:
+
+  - plain: the frame as a draw prints it, followed by a "(x N)" line
+    when it was drawn N > 1 times in a row
+  - rle: a lossless frame stream,
+
+        CADL-RLE 1
+        <count> <number of lines>
+        <lines of the frame>
+        ...
+
+    which expand_rle turns back into exactly the text the program
+    would have printed without deduplication.
+
+The scene of positioned draws (see cadl_canvas) is written as one more
+frame of its own, so it does not break the stream.
+"""
+
+import sys
+
+from cadl_interp_walk import draw_text
+
+RLE_HEADER = "CADL-RLE 1\n"
+
+
+class FrameDeduper:
+
+    def __init__(self, write=None, rle=False):
+        # write(text) receives the output, sys.stdout.write by default
+        self.write = write or sys.stdout.write
+        self.rle = rle
+        self.key = None
+        self.text = None
+        self.count = 0
+        if rle:
+            self.write(RLE_HEADER)
+
+    def __call__(self, name, cat):
+        try:
+            key = (name, frozenset(cat["traits"].items()))
+            hash(key)
+        except TypeError:
+            key = None  # unhashable trait value, never merged
+        if key is not None and key == self.key:
+            self.count += 1
+            return
+        self.flush()
+        self.key = key
+        self.text = draw_text(name, cat)
+        self.count = 1
+
+    def scene(self, text):
+        self.flush()
+        self.text = text + "\n"    # as printed
+        self.count = 1
+        self.flush()
+
+    def flush(self):
+        """
+        Write out the pending run of identical frames.
+        """
+        if not self.count:
+            return
+        if self.rle:
+            self.write("{} {}\n".format(self.count, self.text.count("\n")))
+            self.write(self.text)
+        else:
+            self.write(self.text)
+            if self.count > 1:
+                self.write("(x {})\n".format(self.count))
+        self.key = None
+        self.text = None
+        self.count = 0
+
+    def close(self):
+        self.flush()
+
+
+def expand_rle(lines, write):
+    """
+    Expand an RLE frame stream, given as an iterator of lines, into
+    the original draw output.
+    """
+    lines = iter(lines)
+    if next(lines, None) != RLE_HEADER:
+        raise ValueError("not a CADL-RLE stream")
+    for header in lines:
+        count, nlines = (int(n) for n in header.split())
+        text = "".join(next(lines) for _ in range(nlines))
+        for _ in range(count):
+            write(text)
+
+
+# expand an RLE stream: python cadl_rle.py < frames.rle
+if __name__ == "__main__":
+    expand_rle(sys.stdin, sys.stdout.write)
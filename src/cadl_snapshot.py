@@ -0,0 +1,82 @@
+"""
+Interpreter state snapshots for CADL
+
+A snapshot captures everything a CADL program leaves behind in the
+global scope - cats, function declarations and plain variables - plus
+the state of the random number generator, so a shared prelude can be
+run once and every following program can start from its end state:
+
+    snap = take_snapshot()      # after running the prelude
+    ...
+    restore_snapshot(snap)      # instead of symtab.initialize()
+
+CADL values are plain dicts, lists, tuples, strings and numbers (the
+traits of prototype-based cats are converted, see cadl_proto), so
+snapshots are serialized with marshal: compact, and restoring one is
+a single marshal.loads.  Every restore builds fresh objects, so any
+number of runs can fork from the same snapshot without seeing each
+other's changes.  As with any marshal data, only load snapshots you
+created yourself, and with the same Python version.
+"""
+
+import marshal
+import sys
+
+from cadl_symtab import symtab
+
+MAGIC = b"CADLSNAP\x01"
+
+
+def take_snapshot():
+    """
+    Serialize the global scope and RNG state into bytes.
+    """
+    from cadl_proto import encode_globals
+    random = sys.modules.get("random")
+    state = {
+        "globals": encode_globals(symtab.scoped_symtab[-1]),
+        # programs that never used randomcat never imported random
+        "random": random.getstate() if random is not None else None,
+    }
+    try:
+        return MAGIC + marshal.dumps(state, marshal.version)
+    except ValueError as e:
+        raise ValueError("cannot snapshot interpreter state: {}".format(e))
+
+
+def restore_snapshot(data):
+    """
+    Reset the symbol table to the state captured in data.
+    """
+    if not is_snapshot(data):
+        raise ValueError("not a CADL snapshot")
+    state = marshal.loads(memoryview(data)[len(MAGIC):])
+    from cadl_proto import decode_globals
+    decode_globals(state["globals"])
+    symtab.initialize()
+    symtab.scoped_symtab[0] = state["globals"]
+    if state["random"] is not None:
+        import random
+        random.setstate(state["random"])
+
+
+def is_snapshot(data):
+    return data[:len(MAGIC)] == MAGIC
+
+
+def save_snapshot(path, data=None):
+    """
+    Write a snapshot (by default of the current state) to path.
+    """
+    if data is None:
+        data = take_snapshot()
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def load_snapshot(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if not is_snapshot(data):
+        raise ValueError("{} is not a CADL snapshot".format(path))
+    return data
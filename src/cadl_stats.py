@@ -0,0 +1,273 @@
+"""
+Phase-level timing and memory statistics for CADL runs
+
+    python cadl_interp.py --stats program.cadl
+    python cadl_interp.py --stats-json stats.json program.cadl
+
+interp(..., stats=Stats()) runs the program in separate phases and
+measures each of them on its own:
+
+  - lex      turning the source into tokens (cadl_lexer.Lexer)
+  - parse    building the AST from the tokens
+  - check    the static trait check, with --check only
+  - execute  running the program, draws excluded
+  - render   turning drawn cats into text (or whatever the on_draw
+             sink makes of them) and writing it out, the scene of
+             positioned draws included, from placing the first cat
+             on it (and importing numpy) on
+
+For every phase the wall time, the CPU time and the peak memory
+traced by tracemalloc above what was allocated when the phase started.
+Draws happen in the middle of execution, so a Stats.sink wraps the
+draw output and the scene canvas and books the time spent in them to
+render instead.  Along
+with the phases go counts of tokens, AST nodes, draws and cats (cats
+and litter members defined when the program ended).
+
+Tracing memory slows Python down a lot (a draw-heavy program runs
+about ten times slower), the times are those of the traced run.  That
+hits every phase alike, so the split between front end and execution
+still shows; Stats(trace_memory=False) (--stats-no-memory) times the
+phases without it and reports no memory.
+
+The report is text (report()) or a dict (as_dict()) ready for json.
+"""
+
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from cadl_symtab import symtab
+
+PHASES = ["lex", "parse", "check", "execute", "render"]
+
+
+class Stats:
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        # phase -> [wall seconds, cpu seconds, peak bytes]
+        self.phases = {}
+        self.counts = {"tokens": 0, "ast_nodes": 0, "draws": 0, "cats": 0}
+        # peak seen in the running phase before a draw reset it
+        self._outer_peak = 0
+        # memory allocated by the draws of the running phase and still
+        # held, e.g. numpy once a positioned draw imported it, which is
+        # not that of the phase
+        self._render_held = 0
+        self._started = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+    def _add(self, name, wall, cpu, peak):
+        entry = self.phases.setdefault(name, [0.0, 0.0, 0])
+        entry[0] += wall
+        entry[1] += cpu
+        entry[2] = max(entry[2], peak)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measure the with block as (part of) phase name, less the draws
+        made in it (see sink).
+        """
+        render = self.phases.get("render", (0.0, 0.0))[:2]
+        base = 0
+        if self.trace_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._outer_peak = 0
+        self._render_held = 0
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            cpu = time.process_time() - cpu
+            wall = time.perf_counter() - wall
+            now = self.phases.get("render", (0.0, 0.0))
+            wall -= now[0] - render[0]
+            cpu -= now[1] - render[1]
+            peak = 0
+            if self.trace_memory:
+                peak = max(self._outer_peak, self._phase_peak()) - base
+            self._add(name, wall, cpu, max(peak, 0))
+
+    def _phase_peak(self):
+        # peak traced since the last reset, less what draws still hold
+        return tracemalloc.get_traced_memory()[1] - self._render_held
+
+    def front_end(self, text, lines=None):
+        """
+        Lex and parse text as separate phases and return the AST.
+        """
+        from cadl_fe import parse
+        from cadl_lexer import Lexer
+        import cadl_ll1  # noqa, loading the parse tables is not parsing
+        with self.phase("lex"):
+            tokens = Lexer(text, [])
+        self.counts["tokens"] = len(tokens.tokens) - 1    # EOF
+        with self.phase("parse"):
+            ast = parse(tokens, lines)
+        self.counts["ast_nodes"] = count_nodes(ast)
+        return ast
+
+    def sink(self, on_draw=None):
+        """
+        on_draw sink that times the draws as render and passes them
+        on to on_draw, or prints them as the walker would.
+        """
+        return RenderSink(self, on_draw)
+
+    def finish(self):
+        """
+        Count the cats left and stop tracing memory.
+        """
+        cats = 0
+        for value in symtab.scoped_symtab[-1].values():
+            if isinstance(value, dict):
+                if value.get("type") == "cat":
+                    cats += 1
+                elif value.get("type") == "litter":
+                    cats += len(value["names"])
+        self.counts["cats"] = cats
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def as_dict(self):
+        phases = {}
+        for name in PHASES:
+            if name in self.phases:
+                wall, cpu, peak = self.phases[name]
+                phases[name] = {
+                    "wall_ms": round(wall * 1000, 3),
+                    "cpu_ms": round(cpu * 1000, 3),
+                    "peak_kib": (round(peak / 1024, 1)
+                                 if self.trace_memory else None),
+                }
+        return {
+            "phases": phases,
+            "total": {
+                "wall_ms": round(sum(p[0] for p in self.phases.values())
+                                 * 1000, 3),
+                "cpu_ms": round(sum(p[1] for p in self.phases.values())
+                                * 1000, 3),
+            },
+            "counts": dict(self.counts),
+            "memory_traced": self.trace_memory,
+        }
+
+    def report(self, write=None):
+        """
+        Write the statistics as a table, to stderr by default.
+        """
+        write = write or sys.stderr.write
+        data = self.as_dict()
+        write("{:<10}{:>12}{:>12}{:>12}\n".format(
+            "phase", "wall ms", "cpu ms", "peak KiB"))
+        for name, p in data["phases"].items():
+            peak = "-" if p["peak_kib"] is None else "{:.1f}".format(
+                p["peak_kib"])
+            write("{:<10}{:>12.3f}{:>12.3f}{:>12}\n".format(
+                name, p["wall_ms"], p["cpu_ms"], peak))
+        total = data["total"]
+        write("{:<10}{:>12.3f}{:>12.3f}\n".format(
+            "total", total["wall_ms"], total["cpu_ms"]))
+        write(" ".join("{}={}".format(k, v)
+                       for (k, v) in data["counts"].items()) + "\n")
+
+
+class RenderSink:
+    """
+    See Stats.sink.
+    """
+
+    def __init__(self, stats, on_draw):
+        self.stats = stats
+        self.on_draw = on_draw
+
+    def __call__(self, name, cat):
+        self.render(self.draw, name, cat)
+        self.stats.counts["draws"] += 1
+
+    def draw(self, name, cat):
+        if self.on_draw is not None:
+            self.on_draw(name, cat)
+        else:
+            from cadl_interp_walk import draw_text
+            print(draw_text(name, cat), end="")
+
+    def place(self, place, name, x, y, cat):
+        # a positioned draw, place puts the cat on the scene canvas
+        self.render(place, name, x, y, cat)
+        self.stats.counts["draws"] += 1
+
+    def compose(self, render):
+        # the scene canvas turned into text by render()
+        return self.render(render)
+
+    def scene(self, text):
+        # the scene of positioned draws, passed on like a draw
+        scene = getattr(self.on_draw, "scene", None)
+        if scene is not None:
+            self.render(scene, text)
+        else:
+            self.render(print, text)
+
+    def render(self, output, *args):
+        """
+        Call output(*args), booked as render, and return its result.
+        """
+        stats = self.stats
+        trace = stats.trace_memory
+        if trace:
+            # keep the peak of the running phase before taking over
+            current = tracemalloc.get_traced_memory()[0]
+            stats._outer_peak = max(stats._outer_peak, stats._phase_peak())
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        result = output(*args)
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+        peak = 0
+        if trace:
+            after, peak = tracemalloc.get_traced_memory()
+            peak -= current
+            stats._render_held += after - current
+            tracemalloc.reset_peak()
+        stats._add("render", wall, cpu, peak)
+        return result
+
+    def close(self):
+        # the rest of a buffering sink is written out here, which is
+        # rendering too
+        close = getattr(self.on_draw, "close", None)
+        if close is not None:
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            close()
+            self.stats._add("render", time.perf_counter() - wall,
+                            time.process_time() - cpu, 0)
+
+
+def count_nodes(ast):
+    """
+    Number of nodes (tagged tuples) in ast.
+    """
+    n = 0
+    stack = [ast]
+    pop = stack.pop
+    push = stack.extend
+    while stack:
+        node = pop()
+        if node.__class__ is tuple:
+            if node and node[0].__class__ is str:
+                n += 1
+            push(node)
+        elif node.__class__ is list:
+            push(node)
+    return n
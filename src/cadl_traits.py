@@ -0,0 +1,30 @@
+"""
+Trait registry for CADL
+
+The traits a cat can have and the values each of them accepts, as
+documented in docs/CADLTraits.txt; tools/conformance.py fails if the
+two disagree.  Values are case-insensitive, like in the renderer.
+"""
+
+TRAITS = {
+    "ears":     ("pointy", "droopy", "round", "long", "short"),
+    "mouth":    ("smile", "frown", "kiss", "scowl", "open", "smirk",
+                 "neutral", "none"),
+    "body":     ("smooth", "fluffy", "normal", "chubby"),
+    "tail":     ("fluffy", "straight", "curled", "none"),
+    "mood":     ("happy", "sleepy", "excited", "loving", "curious",
+                 "angry", "sad"),
+    "whiskers": ("long", "short", "curled"),
+}
+
+
+def is_trait(name):
+    return name in TRAITS
+
+
+def is_value(trait, value):
+    """
+    True if value is one of the values of trait.
+    """
+    return (isinstance(value, str)
+            and value.lower() in TRAITS.get(trait, ()))
@@ -4,46 +4,206 @@
 #      (TYPE [, child1, child2,...])
 #
 # tuple format for tree nodes.
+#
+# The tree is walked with an explicit stack, so any depth of nesting
+# can be dumped, and the output is collected in a buffer that is
+# written out in large chunks instead of a print per fragment.
+#
+# A FlatAST (see cadl_flatast) or a FlatNode view is dumped exactly
+# like the tuple AST it stands for.
+#
+# dump_json and dump_sexp stream the same tree to a file in machine
+# readable form,
+#
+#   JSON:   {"type": "DRAW", "children": [{"type": "ID", "children":
+#           ["Miso"]}]}, lists become arrays
+#   S-expr: (DRAW (ID Miso)), lists become [...]
 
-def dumpast(node):
-    _dumpast(node)
-    print('')
+import sys
 
-def _dumpast(node, level=0):
+# write the buffer out once it holds this many fragments
+CHUNK = 4096
 
-    if isinstance(node, tuple):
-        indent(level)
-        nchildren = len(node) - 1
+class _Buffer:
+    # collects output fragments and writes them in chunks
 
-        print("(%s" % node[0], end='')
+    def __init__(self, out):
+        self.write_out = (out or sys.stdout).write
+        self.parts = []
+        self.append = self.parts.append
 
-        if nchildren > 0:
-            print(" ", end='')
+    def check(self):
+        if len(self.parts) >= CHUNK:
+            self.flush()
+
+    def flush(self):
+        self.write_out(''.join(self.parts))
+        self.parts.clear()
+
+def _root(node):
+    if hasattr(node, 'view'):
+        node = node.view()   # FlatAST, start at the root
+    return node
+
+def _children(node):
+    # (tag or None for a list, children) of an inner node, or None;
+    # a FlatNode indexes like a tuple
+    if isinstance(node, tuple) or hasattr(node, 'to_tuple'):
+        return node[0], node[1:]
+    if isinstance(node, list):
+        return None, node
+    return None
 
-        for c in range(nchildren):
-            _dumpast(node[c+1], level+1)
-            if c != nchildren-1:
-                print(' ', end='')
+##################################################################
+# the tree in the indented text form of -d
+
+def dumpast(node, out=None):
+    buf = _Buffer(out)
+    _dumpast(_root(node), buf)
+    buf.append('\n')
+    buf.flush()
+
+def _dumpast(node, buf):
+    append = buf.append
+    # newline and bars for every level of indentation
+    indents = ['\n']
+    # pending work, nodes as (level, node) and literal text as str
+    stack = [(0, node)]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        item = pop()
+        if item.__class__ is str:
+            append(item)
+            continue
 
-        print(")", end='')
-    elif isinstance(node, list):
-        indent(level)
-        nchildren = len(node)
+        level, node = item
+        inner = _children(node)
+        if inner is None:
+            append(str(node))
+            continue
 
-        print("[", end='')
+        while len(indents) <= level:
+            indents.append(indents[-1] + '  |')
+        tag, children = inner
+        append(indents[level])
+        if tag is None:
+            append('[')
+            close = ']'
+        else:
+            append('(%s' % tag)
+            close = ')'
 
+        nchildren = len(children)
         if nchildren > 0:
-            print(" ", end='')
-
-        for c in range(nchildren):
-            _dumpast(node[c], level+1)
-            if c != nchildren-1:
-                print(' ', end='')
-        print("]", end='')
-    else:
-        print("%s" % str(node), end='')
-
-def indent(level):
-    print('')
-    for i in range(level):
-        print('  |',end='')
+            append(' ')
+        push(close)
+        for c in range(nchildren - 1, -1, -1):
+            push((level + 1, children[c]))
+            if c != 0:
+                push(' ')
+        buf.check()
+
+##################################################################
+# JSON
+
+def dump_json(node, out):
+    import json
+    encode = json.dumps
+
+    buf = _Buffer(out)
+    append = buf.append
+    stack = [_root(node)]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        item = pop()
+        if item.__class__ is _Text:
+            append(item.text)
+            continue
+
+        inner = _children(item)
+        if inner is None:
+            append(encode(item))
+            continue
+
+        tag, children = inner
+        if tag is None:
+            append('[')
+            push(_CLOSE_LIST)
+        else:
+            append('{"type": %s, "children": [' % encode(tag))
+            push(_CLOSE_NODE)
+        for c in range(len(children) - 1, -1, -1):
+            push(children[c])
+            if c != 0:
+                push(_COMMA)
+        buf.check()
+
+    append('\n')
+    buf.flush()
+
+class _Text:
+    # literal output on the work stack of dump_json and dump_sexp,
+    # which unlike _dumpast also push bare strings from the tree
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+_CLOSE_LIST = _Text(']')
+_CLOSE_NODE = _Text(']}')
+_COMMA = _Text(', ')
+_SPACE = _Text(' ')
+_CLOSE_PAREN = _Text(')')
+
+##################################################################
+# S-expressions
+
+def _atom(value):
+    # symbols and the quoted strings of STRING nodes as they are,
+    # anything else as a quoted string
+    if isinstance(value, int):
+        return str(value)
+    if value and (value.isidentifier()
+                  or (len(value) >= 2 and value[0] == value[-1] == '"'
+                      and '"' not in value[1:-1]
+                      and '\\' not in value)):
+        return value
+    return '"%s"' % value.replace('\\', '\\\\').replace('"', '\\"')
+
+def dump_sexp(node, out):
+    buf = _Buffer(out)
+    append = buf.append
+    stack = [_root(node)]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        item = pop()
+        if item.__class__ is _Text:
+            append(item.text)
+            continue
+
+        inner = _children(item)
+        if inner is None:
+            append(_atom(item))
+            continue
+
+        tag, children = inner
+        if tag is None:
+            append('[')
+            push(_CLOSE_LIST)
+        else:
+            append('(%s' % tag)
+            push(_CLOSE_PAREN)
+        for c in range(len(children) - 1, -1, -1):
+            push(children[c])
+            if c != 0 or tag is not None:
+                push(_SPACE)
+        buf.check()
+
+    append('\n')
+    buf.flush()
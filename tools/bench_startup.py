@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Start-up benchmark for the cadl_interp CLI
+
+Runs short CLI invocations under `python -X importtime` and checks
+them against a hard budget:
+
+  - the total time spent importing modules that are not already
+    loaded by a bare interpreter start (median over --repeat runs)
+  - a list of modules each scenario must not import at all
+
+Exits with status 1 if any scenario is over budget so it can be used
+as a gate.  With --zipapp the bundle built by tools/cadl_bundle.py is
+measured instead; any zipapp is started through runpy, which the
+interpreter imports before our code runs, so only the forbidden module
+lists are enforced there and the import times are informational.
+
+    python tools/bench_startup.py [--repeat N] [--zipapp cadl.pyz]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+SAMPLE = os.path.join(ROOT, "tests", "simpleProgram.txt")
+
+# name, CLI arguments, import budget (microseconds), forbidden modules
+SCENARIOS = [
+    ("help", ["--help"], 3000,
+     ["random", "typing", "re", "cadl_lexer", "cadl_interp_walk"]),
+    ("dump", ["-d", SAMPLE], 15000,
+     ["random", "typing", "cadl_interp_walk", "cadl_ascii_render"]),
+    ("run", [SAMPLE], 20000,
+     ["random", "typing"]),
+]
+
+
+def importtime(cmd):
+    """
+    Run cmd with -X importtime and return ({module: self_us}, wall_s).
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + cmd,
+                          stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE,
+                          text=True)
+    wall = time.perf_counter() - start
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        modules[fields[2].strip()] = int(fields[0])
+    return modules, wall
+
+
+def main(argv):
+    repeat = 7
+    target = [os.path.join(SRC, "cadl_interp.py")]
+    enforce_budget = True
+    i = 0
+    while i < len(argv):
+        if argv[i] == "--repeat":
+            repeat = int(argv[i + 1])
+            i += 2
+        elif argv[i] == "--zipapp":
+            target = [argv[i + 1]]
+            enforce_budget = False
+            i += 2
+        else:
+            print(__doc__)
+            return 2
+
+    baseline, _ = importtime(["-c", "pass"])
+
+    failed = False
+    print("{:<6} {:>12} {:>10} {:>10}  {}".format(
+        "case", "imports[us]", "budget", "wall[ms]", "status"))
+    for name, args, budget, forbidden in SCENARIOS:
+        totals = []
+        walls = []
+        seen = set()
+        for _ in range(repeat):
+            modules, wall = importtime(target + args)
+            extra = {m: us for m, us in modules.items() if m not in baseline}
+            totals.append(sum(extra.values()))
+            walls.append(wall)
+            seen.update(extra)
+
+        total = statistics.median(totals)
+        wall = statistics.median(walls) * 1000
+        problems = []
+        if enforce_budget and total > budget:
+            problems.append("over budget")
+        bad = sorted(m for m in forbidden if m in seen)
+        if bad:
+            problems.append("imports " + ", ".join(bad))
+        failed = failed or bool(problems)
+        print("{:<6} {:>12.0f} {:>10} {:>10.1f}  {}".format(
+            name, total, budget, wall, "; ".join(problems) or "ok"))
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
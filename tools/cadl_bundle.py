@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+"""
+Bundle builder for CADL
+
+Packages the modules in src/ into a single archive holding precompiled
+bytecode, so a run does not have to locate and compile seven separate
+source files.
+
+    python tools/cadl_bundle.py zipapp [-o dist/cadl.pyz]
+
+builds an executable zipapp,
+
+    python dist/cadl.pyz [options] [file]
+
+which behaves exactly like src/cadl_interp.py.  The .pyc files are
+compiled as unchecked hash-based pycs (PEP 552) so they are used as-is,
+which means the bundle is tied to the Python version that built it; the
+default file name carries the interpreter's cache tag.  Entries are
+stored uncompressed so loading them does not need zlib.
+
+    python tools/cadl_bundle.py pyodide [-o docs/bundle]
+
+builds the archive used by the playground (docs/pyodide-loader.js):
+a zip with every module as source and bytecode, named after the hash
+of its contents, plus a manifest.json pointing at it.  zipimport uses a
+.pyc when its magic number matches the running Python and falls back
+to the .py next to it otherwise, so build it with the Python version of
+the Pyodide release the site loads to get the bytecode benefit.
+
+    python tools/cadl_bundle.py check ARCHIVE
+
+imports CADL from the archive in an isolated interpreter, checks the
+modules really came from the archive and that every program in tests/
+gives the same output as the sources in src/.  Works offline.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import py_compile
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+DIST = os.path.join(ROOT, "dist")
+PLAYGROUND = os.path.join(ROOT, "docs", "bundle")
+TESTS = os.path.join(ROOT, "tests")
+
+MAIN = """\
+import sys
+import cadl_interp
+sys.exit(cadl_interp.main(sys.argv[1:]))
+"""
+
+# fixed timestamp for zip entries so identical sources give
+# byte-identical archives
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def source_modules():
+    """
+    Return the sorted list of module sources in src/.
+    """
+    return sorted(glob.glob(os.path.join(SRC, "*.py")))
+
+
+def compile_module(path, tmpdir):
+    """
+    Compile the module at path and return the bytes of its .pyc.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    cfile = os.path.join(tmpdir, name + ".pyc")
+    py_compile.compile(
+        path, cfile=cfile, dfile=os.path.basename(path), doraise=True,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    with open(cfile, "rb") as f:
+        return f.read()
+
+
+def write_entry(zf, name, data):
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE)
+    info.compress_type = zipfile.ZIP_STORED
+    info.external_attr = 0o644 << 16
+    zf.writestr(info, data)
+
+
+def build_zipapp(output=None):
+    """
+    Build an executable zipapp with a .pyc for every module in src/.
+    """
+    if output is None:
+        tag = sys.implementation.cache_tag
+        output = os.path.join(DIST, "cadl-{}.pyz".format(tag))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as tmpdir, \
+            open(output, "wb") as f:
+        f.write(b"#!/usr/bin/env python3\n")
+        with zipfile.ZipFile(f, "w") as zf:
+            for path in source_modules():
+                name = os.path.splitext(os.path.basename(path))[0]
+                write_entry(zf, name + ".pyc", compile_module(path, tmpdir))
+            write_entry(zf, "__main__.py", MAIN)
+    os.chmod(output, 0o755)
+    return output
+
+
+def build_pyodide(outdir=None):
+    """
+    Build the content-addressed playground archive and its manifest.
+    Returns the path of the archive.
+    """
+    outdir = outdir or PLAYGROUND
+    os.makedirs(outdir, exist_ok=True)
+
+    modules = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_archive = os.path.join(tmpdir, "cadl.zip")
+        with zipfile.ZipFile(tmp_archive, "w") as zf:
+            for path in source_modules():
+                name = os.path.splitext(os.path.basename(path))[0]
+                with open(path, "rb") as f:
+                    write_entry(zf, name + ".py", f.read())
+                write_entry(zf, name + ".pyc", compile_module(path, tmpdir))
+                modules.append(name)
+        with open(tmp_archive, "rb") as f:
+            data = f.read()
+
+    digest = hashlib.sha256(data).hexdigest()
+    archive = "cadl-{}.zip".format(digest[:16])
+    with open(os.path.join(outdir, archive), "wb") as f:
+        f.write(data)
+
+    manifest = {
+        "archive": archive,
+        "sha256": digest,
+        "python": sys.implementation.cache_tag,
+        "modules": modules,
+    }
+    with open(os.path.join(outdir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return os.path.join(outdir, archive)
+
+
+# Runs inside the isolated interpreter started by check_archive.
+# Prints one JSON record per test program.
+CHECK_SCRIPT = """\
+import contextlib, io, json, random, sys
+archive, tests = sys.argv[1], sys.argv[2:]
+sys.path.insert(0, archive)
+import cadl_interp
+for name in sorted(sys.modules):
+    mod = sys.modules[name]
+    if name.startswith("cadl") or name == "dumpast":
+        origin = getattr(mod, "__file__", "") or ""
+        if not origin.startswith(archive):
+            raise SystemExit("{} not loaded from archive: {}".format(name, origin))
+for path in tests:
+    random.seed(0)
+    buf = io.StringIO()
+    with open(path) as f, contextlib.redirect_stdout(buf):
+        cadl_interp.interp(f.read())
+    print(json.dumps([path, buf.getvalue()]))
+"""
+
+
+def run_check_script(path_entry, tests):
+    proc = subprocess.run(
+        [sys.executable, "-I", "-c", CHECK_SCRIPT, path_entry] + tests,
+        capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip() or proc.stdout.strip())
+    return [json.loads(line) for line in proc.stdout.splitlines()]
+
+
+def check_archive(archive):
+    """
+    Import CADL from archive in a fresh isolated interpreter and
+    compare its output on tests/ with the sources in src/.
+    Returns a list of problems, empty if the archive is good.
+    """
+    tests = sorted(glob.glob(os.path.join(TESTS, "*.txt")))
+    problems = []
+    try:
+        from_archive = run_check_script(os.path.abspath(archive), tests)
+        from_source = run_check_script(SRC, tests)
+    except RuntimeError as e:
+        return [str(e)]
+    for (path, got), (_, expected) in zip(from_archive, from_source):
+        if got != expected:
+            problems.append("output differs for {}".format(
+                os.path.relpath(path, ROOT)))
+    return problems
+
+
+USAGE = """\
+usage: cadl_bundle.py zipapp [-o OUTPUT]
+       cadl_bundle.py pyodide [-o OUTDIR]
+       cadl_bundle.py check ARCHIVE
+"""
+
+
+def main(argv):
+    if not argv or argv[0] in ("-h", "--help"):
+        print(USAGE, end="")
+        return 0 if argv else 2
+
+    command, args = argv[0], argv[1:]
+
+    if command == "check":
+        if len(args) != 1:
+            print(USAGE, end="")
+            return 2
+        problems = check_archive(args[0])
+        for problem in problems:
+            print("error: " + problem)
+        if not problems:
+            print("ok")
+        return 1 if problems else 0
+
+    output = None
+    if len(args) == 2 and args[0] == "-o":
+        output = args[1]
+    elif args:
+        print(USAGE, end="")
+        return 2
+
+    if command == "zipapp":
+        print(build_zipapp(output))
+        return 0
+
+    if command == "pyodide":
+        print(build_pyodide(output))
+        return 0
+
+    print("unknown command {}".format(command))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
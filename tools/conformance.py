@@ -0,0 +1,580 @@
+#!/usr/bin/env python
+"""
+Differential conformance runner for CADL
+
+Runs every program in tests/ (and, with --generate, randomly generated
+programs) through each execution engine with the same RNG seed and
+compares their output byte for byte against the first engine, the
+plain tree walker.  Divergences are reported with a diff, timings
+side by side; the exit status is 1 if any engine diverged.
+
+    python tools/conformance.py [-j N] [--engines walk,flat,...]
+                                [--generate N] [--gen-seed S]
+                                [--seed S] [--repeat N] [--timing]
+                                [--keep DIR] [--write-asts]
+
+Timings are the fastest of --repeat runs (3 by default) of each job,
+the output compared is that of the first run.  Programs run in a
+process pool (-j, one worker per CPU by default),
+each (program, engine) pair as a separate job.  An engine is a
+function engine(source, search_path) that runs source and prints to
+stdout; add new execution paths to ENGINES (and DEFAULT_ENGINES) to
+put them under test.  --engines all runs every registered engine.
+
+Every program is also parsed by each of the PARSERS, which must all
+build the same AST (or report the same syntax errors), and the AST
+of a program in tests/ must match its dump in tests/ast/, written by
+--write-asts after a change to the grammar or the AST.  The parse
+table generated into src/cadl_ll1_table.py must be up to date, and
+the trait registry (src/cadl_traits.py) must list the traits and
+values docs/CADLTraits.txt does.
+
+--generate programs only use statements that terminate (while loops
+assign the value they are waiting for at the end of their body) and
+only valid trait values, and are reproducible from --gen-seed; --keep
+writes them to DIR so a divergence can be replayed with cadl_interp.
+"""
+
+import contextlib
+import difflib
+import glob
+import io
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCS = os.path.join(ROOT, "docs")
+SRC = os.path.join(ROOT, "src")
+TESTS = os.path.join(ROOT, "tests")
+AST_DIR = os.path.join(TESTS, "ast")
+
+sys.path.insert(0, SRC)
+
+
+# Engines
+########################################################
+
+def run_walk(source, search_path):
+    from cadl_interp import interp
+    interp(source, search_path=search_path)
+
+
+def run_stream(source, search_path):
+    from cadl_interp import interp_stream
+    interp_stream(io.StringIO(source), chunk_size=4096,
+                  search_path=search_path)
+
+
+def run_flat(source, search_path):
+    from cadl_interp import interp
+    interp(source, search_path=search_path, flat=True)
+
+
+def run_checked(source, search_path):
+    from cadl_interp import interp
+    interp(source, search_path=search_path, check=True)
+
+
+def run_tiered(source, search_path):
+    # thresholds of 1 so that every function and loop that runs
+    # goes through the compiled tier of cadl_compile
+    from cadl_interp import interp
+    interp(source, search_path=search_path,
+           tiered={"call_threshold": 1, "loop_threshold": 1})
+
+
+def run_nomemo(source, search_path):
+    # every call of a pure function runs its body (see cadl_purity)
+    from cadl_interp import interp
+    interp(source, search_path=search_path, memoize=False)
+
+
+# name -> engine, the first one is the reference
+ENGINES = {
+    "walk": run_walk,
+    "stream": run_stream,
+    "flat": run_flat,
+    "checked": run_checked,
+    "tiered": run_tiered,
+    "nomemo": run_nomemo,
+}
+
+# engines run when --engines is not given
+DEFAULT_ENGINES = ["walk", "stream", "flat", "checked", "tiered", "nomemo"]
+
+
+def warm_up():
+    # import everything the engines use up front so that the first
+    # job in each worker is not charged for it
+    import cadl_interp, cadl_interp_walk, cadl_ascii_render   # noqa
+    import cadl_flatast, cadl_check, cadl_litter, cadl_canvas  # noqa
+    import cadl_compile, cadl_purity  # noqa
+
+
+def run_job(job):
+    """
+    Run one (case, engine) job repeat times and return (case, engine,
+    output of the first run, fastest time in seconds).
+    """
+    case, source, search_path, engine, seed, repeat = job
+    output = None
+    best = None
+    for _ in range(repeat):
+        out = io.StringIO()
+        random.seed(seed)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            try:
+                ENGINES[engine](source, search_path)
+            except Exception as e:
+                # engines print their own errors, this is a crash
+                print("crash: {}: {}".format(type(e).__name__, e))
+        secs = time.perf_counter() - start
+        if output is None:
+            output = out.getvalue()
+        best = secs if best is None else min(best, secs)
+    return case, engine, output, best
+
+
+# Parsers
+########################################################
+
+def parse_tuple(source):
+    from cadl_fe import parse
+    return parse(source)
+
+
+def parse_lines(source):
+    # the table recording statement lines, used by --check and --profile
+    from cadl_fe import parse
+    from cadl_lexer import Lexer
+    return parse(Lexer(source, []), lines={})
+
+
+def parse_flat(source):
+    from cadl_flatast import parse_flat
+    return parse_flat(source)
+
+
+def parse_stmts(source):
+    # one top-level statement at a time from chunks, as --stream does
+    from cadl_fe import iter_stmts
+    from cadl_lexer import StreamLexer, tokenize_file
+    diagnostics = []
+    stream = StreamLexer(tokenize_file(io.StringIO(source), 4096,
+                                       diagnostics), diagnostics)
+    return ("STMTLIST", list(iter_stmts(stream)))
+
+
+def parse_mmap(source):
+    # the bytes of --mmap, with the \r\n line ends text mode hides
+    from cadl_fe import iter_stmts
+    from cadl_lexer import StreamLexer, tokenize_mmap
+    diagnostics = []
+    stream = StreamLexer(tokenize_mmap(
+        source.replace("\n", "\r\n").encode("utf-8"), diagnostics),
+        diagnostics)
+    return ("STMTLIST", list(iter_stmts(stream)))
+
+
+# name -> parser, the first one is the reference
+PARSERS = {
+    "tuple": parse_tuple,
+    "lines": parse_lines,
+    "flat": parse_flat,
+    "stmts": parse_stmts,
+    "mmap": parse_mmap,
+}
+
+
+def dump_ast(parser, source):
+    """
+    The AST parser makes of source in the text form of -d, or its
+    syntax errors.
+    """
+    from cadl_fe import CADLSyntaxError
+    from dumpast import dumpast
+    out = io.StringIO()
+    try:
+        dumpast(PARSERS[parser](source), out)
+    except CADLSyntaxError as e:
+        return "error: {}\n".format(e)
+    return out.getvalue()
+
+
+def check_table():
+    """
+    Report a parse table in cadl_ll1_table that is not the one
+    cadl_ll1.build_table makes of GRAMMAR now, return 1 if so.
+    """
+    import cadl_ll1
+    from cadl_ll1_table import TABLE
+    built = cadl_ll1.build_table(cadl_ll1.GRAMMAR)
+    if cadl_ll1.encode_table(cadl_ll1.GRAMMAR, *built) == TABLE:
+        return 0
+    print("PARSE TABLE out of date, regenerate it in src/ with\n"
+          "  python cadl_ll1.py --table > cadl_ll1_table.py")
+    return 1
+
+
+def doc_traits(path):
+    """
+    {trait: (values...)} as listed in docs/CADLTraits.txt at path: the
+    "- value" lines under "Values:" in the section of each "TRAIT: name".
+    """
+    traits = {}
+    values = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("TRAIT:"):
+                values = traits[line[len("TRAIT:"):].strip()] = []
+                listing = False
+            elif values is None:
+                continue
+            elif line.startswith("Values:"):
+                listing = True
+            elif listing and line.startswith("- "):
+                values.append(line[2:].strip())
+            elif line and not line.startswith("---"):
+                listing = False     # a note, not values
+    return {trait: tuple(v) for (trait, v) in traits.items()}
+
+
+def check_traits():
+    """
+    Report differences between the trait registry (cadl_traits) and
+    the traits documented in docs/CADLTraits.txt, return their number.
+    """
+    from cadl_traits import TRAITS
+    documented = doc_traits(os.path.join(DOCS, "CADLTraits.txt"))
+    differ = 0
+    for trait in sorted(set(TRAITS) | set(documented)):
+        if TRAITS.get(trait) != documented.get(trait):
+            differ += 1
+            print("TRAITS DIFFER for {}: cadl_traits {}, docs {}".format(
+                trait, TRAITS.get(trait), documented.get(trait)))
+    return differ
+
+
+def check_asts(cases, write):
+    """
+    Parse every case with every parser, report ASTs that differ from
+    the reference parser's or from the dump in tests/ast/ and return
+    their number.  With write, (re)write the dumps instead.
+    """
+    ref = next(iter(PARSERS))
+    mismatched = 0
+    for case, source, search_path in cases:
+        expected = dump_ast(ref, source)
+        got = {p: dump_ast(p, source) for p in PARSERS if p != ref}
+        if search_path is not None:
+            golden = os.path.join(AST_DIR, case[:-len(".txt")] + ".ast")
+            if write:
+                os.makedirs(AST_DIR, exist_ok=True)
+                with open(golden, "w") as f:
+                    f.write(expected)
+            elif os.path.exists(golden):
+                with open(golden) as f:
+                    got["tests/ast"] = f.read()
+            else:
+                got["tests/ast"] = "(missing, see --write-asts)\n"
+        for parser, dump in got.items():
+            if dump == expected:
+                continue
+            mismatched += 1
+            print("AST DIFFERS {} under {} (vs {})".format(case, parser, ref))
+            diff = difflib.unified_diff(
+                expected.splitlines(), dump.splitlines(),
+                ref, parser, lineterm="", n=2)
+            for n, line in enumerate(diff):
+                if n == 40:
+                    print("  ...")
+                    break
+                print("  " + line)
+    print("{} cases x {} parsers, {} AST mismatches".format(
+        len(cases), len(PARSERS), mismatched))
+    return mismatched
+
+
+# Program generator
+########################################################
+
+def generate_program(rng, size=30):
+    """
+    Return the source of a random CADL program with about size
+    top-level statements.
+    """
+    from cadl_traits import TRAITS
+    traits = sorted(TRAITS)
+    cats = []
+    # traits each cat is declared with, the only ones it is safe to
+    # read (a random cat may have any of them)
+    known = {}
+    funcs = []
+    litters = []
+    lines = []
+
+    def value(trait):
+        return '"{}"'.format(rng.choice(TRAITS[trait]))
+
+    def some_traits():
+        return rng.sample(traits, rng.randint(1, 4))
+
+    def simple(depth):
+        # a statement that can go anywhere, given at least one cat
+        cat = rng.choice(cats)
+        trait = rng.choice(traits)
+        r = rng.random()
+        if r < 0.35:
+            return ["draw {};".format(cat)]
+        if r < 0.6:
+            return ["{}.{} = {};".format(cat, trait, value(trait))]
+        if r < 0.75:
+            return ["draw {} at {}, {};".format(cat, rng.randint(0, 30),
+                                                rng.randint(0, 6))]
+        readable = [c for c in cats if known[c]]
+        if depth >= 3 or not readable:
+            return ["draw {};".format(cat)]
+        cat = rng.choice(readable)
+        trait = rng.choice(sorted(known[cat]))
+        if r < 0.8:
+            if funcs and "mood" in known[cat]:
+                return ["{}.mood = {}({}.mood);".format(
+                    cat, rng.choice(funcs), cat)]
+            return ["draw {};".format(cat)]
+        if r < 0.87:
+            op = rng.choice(["==", "!="])
+            head = "if ({}.{} {} {}) ".format(cat, trait, op, value(trait))
+            out = [head + "{"] + block(depth + 1) + ["}"]
+            if rng.random() < 0.5:
+                out += ["else {"] + block(depth + 1) + ["}"]
+            return out
+        if r < 0.94:
+            return (["repeat ({}) {{".format(rng.randint(0, 3))]
+                    + block(depth + 1) + ["}"])
+        # terminates: the body ends by setting the value waited for
+        target = value(trait)
+        return (["while ({}.{} != {}) {{".format(cat, trait, target)]
+                + block(depth + 1)
+                + ["    {}.{} = {};".format(cat, trait, target), "}"])
+
+    def block(depth):
+        out = []
+        for _ in range(rng.randint(1, 3)):
+            out += ["    " + line for line in simple(depth)]
+        return out
+
+    for i in range(size):
+        r = rng.random()
+        if not cats or r < 0.15:
+            name = "Cat{}".format(len(cats))
+            lines.append("cat {} {{".format(name))
+            known[name] = some_traits()
+            for t in known[name]:
+                lines.append("    {} = {};".format(t, value(t)))
+            lines.append("}")
+            cats.append(name)
+        elif r < 0.2 and known[cats[-1]]:
+            # derived from the newest cat, sometimes a derived one
+            name = "Cat{}".format(len(cats))
+            proto = cats[-1]
+            own = rng.sample(traits, rng.randint(0, 2))
+            if own:
+                lines.append("cat {} : {} {{".format(name, proto))
+                for t in own:
+                    lines.append("    {} = {};".format(t, value(t)))
+                lines.append("}")
+            else:
+                lines.append("cat {} : {};".format(name, proto))
+            known[name] = sorted(set(known[proto]) | set(own))
+            cats.append(name)
+        elif r < 0.23:
+            name = "Rand{}".format(len(cats))
+            lines.append("randomcat {};".format(name))
+            known[name] = []
+            cats.append(name)
+        elif r < 0.25:
+            name = "f{}".format(len(funcs))
+            result = value("mood")
+            moody = [c for c in cats if "mood" in known[c]]
+            if moody and rng.random() < 0.5:
+                # reads a global, which must keep it from being memoized
+                result = "{}.mood".format(rng.choice(moody))
+            lines += [
+                "func {}(m) {{".format(name),
+                "    if (m == {}) {{".format(value("mood")),
+                "        return {};".format(result),
+                "    }",
+                "    return m;",
+                "}",
+            ]
+            funcs.append(name)
+        elif r < 0.3 and len(cats) >= 2:
+            name = "L{}".format(len(litters))
+            members = rng.sample(cats, rng.randint(1, min(4, len(cats))))
+            lines.append("litter {} = [{}];".format(name, ", ".join(members)))
+            litters.append(name)
+        elif r < 0.35 and litters:
+            litter = rng.choice(litters)
+            trait, cond = rng.choice(traits), rng.choice(traits)
+            op = rng.choice(["==", "!="])
+            lines.append("{}.{} = {} where {} {} {};".format(
+                litter, trait, value(trait), cond, op, value(cond)))
+            lines.append("draw {} where {} {} {};".format(
+                litter, cond, op, value(cond)))
+        else:
+            lines += simple(0)
+    return "\n".join(lines) + "\n"
+
+
+# Runner
+########################################################
+
+def collect_cases(generate, gen_seed, keep):
+    """
+    Return [(case name, source, search path)].
+    """
+    cases = []
+    for path in sorted(glob.glob(os.path.join(TESTS, "*.txt"))):
+        with open(path) as f:
+            cases.append((os.path.basename(path), f.read(), [TESTS]))
+    rng = random.Random(gen_seed)
+    for i in range(generate):
+        name = "gen{:05d}.txt".format(i)
+        source = generate_program(rng, rng.randint(5, 60))
+        if keep:
+            with open(os.path.join(keep, name), "w") as f:
+                f.write(source)
+        cases.append((name, source, None))
+    return cases
+
+
+def run_all(jobs, workers):
+    if workers == 1:
+        warm_up()
+        return [run_job(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=warm_up) as pool:
+        return list(pool.map(run_job, jobs,
+                             chunksize=max(1, len(jobs) // (workers * 8))))
+
+
+def report(cases, engines, results, timing):
+    """
+    Print divergences and timings and return the number of divergent
+    (case, engine) pairs.
+    """
+    outputs = {}
+    seconds = {}
+    for case, engine, output, secs in results:
+        outputs[case, engine] = output
+        seconds[case, engine] = secs
+
+    ref = engines[0]
+    diverged = 0
+    for case, _, _ in cases:
+        expected = outputs[case, ref]
+        for engine in engines[1:]:
+            got = outputs[case, engine]
+            if got == expected:
+                continue
+            diverged += 1
+            print("DIVERGED {} under {} (vs {})".format(case, engine, ref))
+            diff = difflib.unified_diff(
+                expected.splitlines(), got.splitlines(),
+                ref, engine, lineterm="", n=2)
+            for n, line in enumerate(diff):
+                if n == 40:
+                    print("  ...")
+                    break
+                print("  " + line)
+
+    if timing:
+        print("\n{:<24}".format("case")
+              + "".join("{:>12}".format(e) for e in engines))
+        for case, _, _ in cases:
+            print("{:<24}".format(case) + "".join(
+                "{:>12.2f}".format(seconds[case, e] * 1000)
+                for e in engines))
+
+    totals = {e: sum(seconds[c, e] for (c, _, _) in cases) for e in engines}
+    print("\n{:<12} {:>10} {:>8}".format("engine", "total[ms]", "vs " + ref))
+    for e in engines:
+        ratio = totals[e] / totals[ref] if totals[ref] else 0.0
+        print("{:<12} {:>10.1f} {:>7.2f}x".format(e, totals[e] * 1000, ratio))
+    print("\n{} cases x {} engines, {} divergences".format(
+        len(cases), len(engines), diverged))
+    return diverged
+
+
+def main(argv):
+    workers = os.cpu_count() or 1
+    engines = DEFAULT_ENGINES
+    generate = 0
+    gen_seed = 0
+    seed = 1
+    repeat = 3
+    timing = False
+    keep = None
+    write_asts = False
+    i = 0
+    try:
+        while i < len(argv):
+            arg = argv[i]
+            if arg == "-j":
+                workers = int(argv[i + 1])
+            elif arg == "--engines":
+                engines = argv[i + 1].split(",")
+                if engines == ["all"]:
+                    engines = list(ENGINES)
+            elif arg == "--generate":
+                generate = int(argv[i + 1])
+            elif arg == "--gen-seed":
+                gen_seed = int(argv[i + 1])
+            elif arg == "--seed":
+                seed = int(argv[i + 1])
+            elif arg == "--repeat":
+                repeat = max(1, int(argv[i + 1]))
+            elif arg == "--keep":
+                keep = argv[i + 1]
+            elif arg == "--timing":
+                timing = True
+                i += 1
+                continue
+            elif arg == "--write-asts":
+                write_asts = True
+                i += 1
+                continue
+            else:
+                print(__doc__)
+                return 2
+            i += 2
+    except (IndexError, ValueError):
+        print(__doc__)
+        return 2
+
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        print("unknown engine(s): {} (known: {})".format(
+            ", ".join(unknown), ", ".join(ENGINES)))
+        return 2
+    if keep:
+        os.makedirs(keep, exist_ok=True)
+
+    cases = collect_cases(generate, gen_seed, keep)
+    jobs = [(case, source, search_path, engine, seed, repeat)
+            for (case, source, search_path) in cases
+            for engine in engines]
+    results = run_all(jobs, max(1, workers))
+    diverged = report(cases, engines, results, timing)
+    mismatched = (check_table() + check_traits()
+                  + check_asts(cases, write_asts))
+    return 1 if diverged or mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))